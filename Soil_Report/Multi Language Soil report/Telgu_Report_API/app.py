@@ -5,25 +5,37 @@ import base64
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from threading import Lock
+import anyio
 import ee
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.font_manager import FontProperties
 from PIL import Image, ImageDraw, ImageFont
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import cm
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import (
-    SimpleDocTemplate, Spacer, PageBreak,
+    SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle,
     Image as RLImage
 )
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
+from svglib.svglib import svg2rlg
 from io import BytesIO
+from xml.sax.saxutils import escape
 from openai import OpenAI
 
 # ─────────────────────────────────────────────
@@ -38,42 +50,45 @@ logger = logging.getLogger(__name__)
 GROQ_API_KEY     = os.environ.get("GROQ_API_KEY", "")
 GROQ_MODEL       = "llama-3.3-70b-versatile"
 LOGO_PATH        = os.path.abspath("LOGO.jpeg")
-TELUGU_FONT_PATH = os.path.abspath("unifont.otf")
-
-# Pre-load PIL fonts
-_PIL_FONTS = {}
+# One Telugu typeface for the whole report: the FreeSerif.ttf copied in by the
+# Dockerfile (covers Telugu) drives the PIL headings, the native tables and the
+# chart labels alike; unifont.otf is only the fallback when it is missing.
+RL_FONT_PATH     = os.path.abspath("FreeSerif.ttf")
+TELUGU_FONT_PATH = RL_FONT_PATH if os.path.exists(RL_FONT_PATH) else os.path.abspath("unifont.otf")
+
+# PIL fonts, loaded once per size
+@lru_cache(maxsize=None)
 def pil_font(size):
-    if size not in _PIL_FONTS:
-        try:
-            _PIL_FONTS[size] = ImageFont.truetype(TELUGU_FONT_PATH, size)
-        except Exception:
-            _PIL_FONTS[size] = ImageFont.load_default()
-    return _PIL_FONTS[size]
+    try:
+        return ImageFont.truetype(TELUGU_FONT_PATH, size)
+    except Exception:
+        return ImageFont.load_default()
+
+# ReportLab font for native tables and text blocks — unifont.otf is CFF, which
+# ReportLab can't embed, so these need FreeSerif
+if os.path.exists(RL_FONT_PATH):
+    try:
+        pdfmetrics.registerFont(TTFont("TeluguSerif", RL_FONT_PATH, shapable=True))
+    except TypeError:  # ReportLab < 4.1: no HarfBuzz shaping support
+        pdfmetrics.registerFont(TTFont("TeluguSerif", RL_FONT_PATH))
+    TFONT = "TeluguSerif"
+else:
+    TFONT = "Helvetica"
+    logger.warning("FreeSerif.ttf not found. Telugu table text may not render.")
+
+# Body style for multi-line LLM text blocks, built once
+BODY_STYLE = ParagraphStyle("body", fontName=TFONT, fontSize=11, leading=17,
+                            textColor=colors.Color(30/255, 30/255, 30/255))
 
 # Matplotlib font
 TELUGU_FP = FontProperties(fname=TELUGU_FONT_PATH) if os.path.exists(TELUGU_FONT_PATH) else None
 
 # ─────────────────────────────────────────────
-#  FastAPI App
-# ─────────────────────────────────────────────
-app = FastAPI(
-    title="FarmMatrix Telugu Soil Health API",
-    description="Satellite-based soil analysis — ICAR-aligned Telugu PDF report",
-    version="2.0.0",
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# ─────────────────────────────────────────────
-#  GEE Initialization
+#  GEE Initialization (lazy, service account only)
 # ─────────────────────────────────────────────
+@lru_cache(maxsize=1)
 def initialize_ee():
+    """Initialize EE once per process; failures are not cached, so the next call retries."""
     try:
         credentials_base64 = os.getenv("GEE_SERVICE_ACCOUNT_KEY")
         if not credentials_base64:
@@ -90,13 +105,59 @@ def initialize_ee():
         logger.error(f"GEE initialization failed: {e}")
         raise
 
-initialize_ee()
+
+def _use_orjson_for_ee():
+    """
+    EE responses are decoded by googleapiclient's JsonModel via its module-level
+    `json`; point that at orjson.loads (dumps stays stdlib). No-op if unavailable.
+    """
+    try:
+        import orjson
+        from types import SimpleNamespace
+        from googleapiclient import model as gapi_model
+    except ImportError:
+        return
+    gapi_model.json = SimpleNamespace(loads=orjson.loads, dumps=json.dumps)
+
+_use_orjson_for_ee()
+
+
+@lru_cache(maxsize=1)
+def soil_texture_img():
+    initialize_ee()
+    return ee.Image("OpenLandMap/SOL/SOL_TEXTURE-CLASS_USDA-TT_M/v02").select('b0')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm EE auth off the event loop so the first /report isn't penalized
+    try:
+        await anyio.to_thread.run_sync(initialize_ee)
+    except Exception:
+        logger.warning("GEE warm-up failed; will retry on first report request.")
+    yield
 
 # ─────────────────────────────────────────────
-#  Constants
+#  FastAPI App
 # ─────────────────────────────────────────────
-SOIL_TEXTURE_IMG = ee.Image("OpenLandMap/SOL/SOL_TEXTURE-CLASS_USDA-TT_M/v02").select('b0')
+app = FastAPI(
+    title="FarmMatrix Telugu Soil Health API",
+    description="Satellite-based soil analysis — ICAR-aligned Telugu PDF report",
+    version="2.0.0",
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
+# ─────────────────────────────────────────────
+#  Constants
+# ─────────────────────────────────────────────
 TEXTURE_CLASSES = {
     1:  "బంకమట్టి (Clay)",
     2:  "పూడిక బంకమట్టి (Silty Clay)",
@@ -268,8 +329,55 @@ SUGGESTIONS = {
     },
 }
 
+# Parameters listed in the per-parameter suggestion table (section 6)
+SUG_PARAMS = ["pH", "Salinity", "Organic Carbon", "CEC", "Nitrogen", "Phosphorus",
+              "Potassium", "Calcium", "Magnesium", "Sulphur", "NDVI", "NDWI", "LST"]
+
 ALL_BANDS = ["B2", "B3", "B4", "B5", "B6", "B7", "B8", "B8A", "B11", "B12"]
 
+# Spectral soil parameters, applied server-side to the field's mean band
+# values: param -> (EE expression, clamp lo, clamp hi)
+SOIL_EXPRESSIONS = {
+    "pH":             ("6.5+1.2*ndvi_re+0.8*B11/(B8+1e-6)-0.5*B8/(B4+1e-6)+0.15*(1-brightness)", 4.0, 9.0),
+    "Organic Carbon": ("1.2+3.5*ndvi_re+2.2*savi-1.5*(B11+B12)/2+0.4*evi", 0.1, 5.0),
+    "Salinity":       ("0.5+si*4+(1-ndvi01)*2+0.3*(1-brightness)", 0.0, 16.0),
+    "NDVI":           ("ndvi", None, None),
+    "EVI":            ("evi", None, None),
+    "FVC":            ("((ndvi-0.2)/0.6)**2", 0, 1),
+    "NDWI":           ("(B3-B8)/(B3+B8+1e-6)", None, None),
+    "Nitrogen":       ("280+300*ndre+150*evi+20*(ci_re/5)-80*brightness+30*mcari", 50, 600),
+    "Phosphorus":     ("11+15*(1-brightness)+6*ndvi+4*si+2*B3", 2, 60),
+    "Potassium":      ("150+200*B11/(B5+B6+1e-6)+80*(B11-B12)/(B11+B12+1e-6)+60*ndvi", 40, 600),
+    "Calcium":        ("550+250*(B11+B12)/(B4+B3+1e-6)+150*brightness-100*ndvi-80*(B11-B8)/(B11+B8+1e-6)", 100, 1200),
+    "Magnesium":      ("110+60*ndre+40*ci_re+30*(B11-B12)/(B11+B12+1e-6)+20*ndvi", 10, 400),
+    "Sulphur":        ("20+15*B11/(B3+B4+1e-6)+10*si+5*(B5/(B4+1e-6)-1)-8*B12/(B11+1e-6)+5*ndvi", 2, 80),
+}
+PARAM_BANDS = {p: p.lower().replace(" ", "_") for p in SOIL_EXPRESSIONS}
+
+# Fallback circle: allowed radial error as a fraction of buffer_meters
+BUFFER_MAX_ERROR = 0.02
+# Fallback circle centre is snapped to this many decimal degrees (4 ≈ 11 m)
+BUFFER_GRID_DECIMALS = 4
+
+# Key order of run_analysis() results (drives the report table order)
+PARAM_ORDER = ["pH", "Salinity", "Organic Carbon", "CEC", "Soil Texture", "LST",
+               "NDWI", "NDVI", "EVI", "FVC", "Nitrogen", "Phosphorus",
+               "Potassium", "Calcium", "Magnesium", "Sulphur"]
+
+# Max concurrent report builds (each holds a full PDF in memory)
+REPORT_LIMITER = anyio.CapacityLimiter(os.cpu_count() or 1)
+
+# Shared pool for independent, network-bound getInfo() round trips
+EE_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+# Pool for generate_pdf's independent producers (3 charts + 2 Groq calls).
+# Charts use explicit Figure/Agg canvases, never pyplot state.
+REPORT_EXECUTOR = ThreadPoolExecutor(max_workers=5)
+
+# Memoized EE lookups, keyed by (region key, args) — repeat reports for a field skip the probes
+EE_CACHE      = TTLCache(maxsize=128, ttl=3600)
+EE_CACHE_LOCK = Lock()
+
 # PIL image constants
 PAGE_W_PX = 1240
 CONTENT_W  = 1100
@@ -301,13 +409,19 @@ class ReportRequest(BaseModel):
 # ─────────────────────────────────────────────
 #  PIL Telugu Text Helpers
 # ─────────────────────────────────────────────
+# Scratch canvas for text measurement (textbbox never draws on it)
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
 def _measure_text(text, font):
-    tmp = Image.new('RGB', (1, 1))
-    d   = ImageDraw.Draw(tmp)
-    bb  = d.textbbox((0, 0), text, font=font)
+    bb = _MEASURE_DRAW.textbbox((0, 0), text, font=font)
     return bb[2] - bb[0], bb[3] - bb[1]
 
 
+@lru_cache(maxsize=None)
+def _glyph_height(font_size):
+    return _measure_text('అ', pil_font(font_size))[1]
+
+
 def wrap_text(text, font, max_w):
     words = text.split(' ')
     lines, cur = [], ''
@@ -329,10 +443,10 @@ def render_text_image(text, font_size=18, color=(0, 0, 0), bg=(255, 255, 255),
                       max_w=CONTENT_W, align='left'):
     font  = pil_font(font_size)
     lines = wrap_text(text, font, max_w - 10)
-    _, lh = _measure_text('అ', font)
+    lh    = _glyph_height(font_size)
     line_h  = lh + 6
-    total_h = line_h * len(lines) + 10
-    img  = Image.new('RGB', (max_w, max(total_h, line_h + 10)), bg)
+    total_h = line_h * len(lines) + 10  # wrap_text always returns >= 1 line
+    img  = Image.new('RGB', (max_w, total_h), bg)
     draw = ImageDraw.Draw(img)
     for i, line in enumerate(lines):
         lw, _ = _measure_text(line, font)
@@ -372,59 +486,39 @@ def t_small(text, font_size=14, color=(0, 0, 0), pw_cm=17.0):
     return t_para(text, font_size=font_size, color=color, pw_cm=pw_cm)
 
 
-# ─────────────────────────────────────────────
-#  Telugu Table Builder
-# ─────────────────────────────────────────────
-def build_telugu_table_image(headers, rows, col_widths_px, font_size=15,
-                              header_bg=(20, 100, 20), row_bg1=(255, 255, 255),
-                              row_bg2=(240, 250, 240)):
-    font   = pil_font(font_size)
-    _, ch  = _measure_text('అ', font)
-    line_h = ch + 8
-    pad    = 8
-    BORDER = 1
-    total_w = sum(col_widths_px) + len(col_widths_px) + 1
+def t_block(text):
+    """Non-empty lines of `text` as one native Paragraph joined by <br/> (splits across pages)."""
+    lines = [escape(line.strip()) for line in text.split('\n') if line.strip()]
+    return Paragraph('<br/>'.join(lines), BODY_STYLE)
 
-    def cell_lines(text, col_w):
-        return wrap_text(str(text), font, col_w - pad * 2)
 
-    row_heights = []
+# ─────────────────────────────────────────────
+#  Telugu Table Builder (native ReportLab)
+# ─────────────────────────────────────────────
+@lru_cache(maxsize=None)
+def _cell_style(font_size, color):
+    return ParagraphStyle(f"cell_{font_size}_{color}", fontName=TFONT, fontSize=font_size,
+                          leading=font_size * 1.35,
+                          textColor=colors.Color(*(c / 255 for c in color)))
+
+
+def build_telugu_table(headers, rows, col_widths_cm, font_size=9,
+                       header_bg=(20, 100, 20), row_bg1=(255, 255, 255),
+                       row_bg2=(240, 250, 240)):
+    """Rows are lists of (text, rgb) cells; each cell becomes a coloured Paragraph."""
+    data = [[Paragraph(escape(h), _cell_style(font_size, (255, 255, 255))) for h in headers]]
     for row in rows:
-        max_lines = 1
-        for ci, cell in enumerate(row):
-            txt = cell[0] if isinstance(cell, tuple) else str(cell)
-            lns = cell_lines(txt, col_widths_px[ci])
-            max_lines = max(max_lines, len(lns))
-        row_heights.append(max_lines * line_h + pad * 2)
-
-    header_h = line_h + pad * 2
-    total_h  = header_h + sum(row_heights) + len(rows) + 2
-
-    img  = Image.new('RGB', (total_w, total_h), (180, 180, 180))
-    draw = ImageDraw.Draw(img)
-
-    x = BORDER
-    draw.rectangle([0, 0, total_w - 1, header_h], fill=header_bg)
-    for hdr, cw in zip(headers, col_widths_px):
-        draw.text((x + pad, pad), hdr, font=font, fill=(255, 255, 255))
-        x += cw + BORDER
-
-    y = header_h + BORDER
-    for ri, (row, rh) in enumerate(zip(rows, row_heights)):
-        bg = row_bg1 if ri % 2 == 0 else row_bg2
-        draw.rectangle([0, y, total_w - 1, y + rh], fill=bg)
-        x = BORDER
-        for ci, (cell, cw) in enumerate(zip(row, col_widths_px)):
-            txt  = cell[0] if isinstance(cell, tuple) else str(cell)
-            tcol = cell[1] if isinstance(cell, tuple) else (0, 0, 0)
-            lns  = cell_lines(txt, cw)
-            for li, ln in enumerate(lns):
-                draw.text((x + pad, y + pad + li * line_h), ln, font=font, fill=tcol)
-            x += cw + BORDER
-        draw.line([0, y + rh, total_w - 1, y + rh], fill=(180, 180, 180), width=1)
-        y += rh + BORDER
-
-    return img
+        data.append([Paragraph(escape(str(txt)), _cell_style(font_size, tcol)) for txt, tcol in row])
+    tbl = Table(data, colWidths=[w * cm for w in col_widths_cm], repeatRows=1)
+    tbl.setStyle(TableStyle([
+        ('BACKGROUND',     (0, 0), (-1, 0), colors.Color(*(c / 255 for c in header_bg))),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.Color(*(c / 255 for c in row_bg1)),
+                                              colors.Color(*(c / 255 for c in row_bg2))]),
+        ('GRID',           (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN',         (0, 0), (-1, -1), 'TOP'),
+    ]))
+    tbl.hAlign = 'LEFT'
+    return tbl
 
 
 # ─────────────────────────────────────────────
@@ -433,7 +527,41 @@ def build_telugu_table_image(headers, rows, col_widths_px, font_size=15,
 def build_region(req: ReportRequest) -> ee.Geometry:
     if req.polygon_coords and len(req.polygon_coords) >= 3:
         return ee.Geometry.Polygon(req.polygon_coords)
-    return ee.Geometry.Point([req.lon, req.lat]).buffer(req.buffer_meters)
+    return buffer_region(*region_key(req))
+
+
+@lru_cache(maxsize=1024)
+def buffer_region(lat, lon, radius_m):
+    """Fallback circle around a grid-snapped centre, shared by all nearby requests."""
+    # Coarser circle (≤2% radial error) keeps the buffer polygon's vertex count low
+    return ee.Geometry.Point([lon, lat]).buffer(radius_m, BUFFER_MAX_ERROR * radius_m)
+
+
+def region_key(req: ReportRequest) -> tuple:
+    """Hashable identity of the region build_region() produces for this request."""
+    if req.polygon_coords and len(req.polygon_coords) >= 3:
+        return tuple(tuple(round(c, 6) for c in pt) for pt in req.polygon_coords)
+    return (round(req.lat, BUFFER_GRID_DECIMALS), round(req.lon, BUFFER_GRID_DECIMALS),
+            req.buffer_meters)
+
+
+def ee_memoized(fn):
+    """
+    Cache fn(region, *args) in EE_CACHE under (fn, region_key, *args).
+    The wrapper takes the region key first; None results are not cached.
+    """
+    @wraps(fn)
+    def wrapper(rkey, region, *args):
+        key = (fn.__name__, rkey) + tuple(tuple(a) if isinstance(a, list) else a for a in args)
+        with EE_CACHE_LOCK:
+            if key in EE_CACHE:
+                return EE_CACHE[key]
+        val = fn(region, *args)
+        if val is not None:
+            with EE_CACHE_LOCK:
+                EE_CACHE[key] = val
+        return val
+    return wrapper
 
 
 def safe_get_info(obj, name="value"):
@@ -445,6 +573,7 @@ def safe_get_info(obj, name="value"):
         logger.warning(f"Failed {name}: {e}"); return None
 
 
+@ee_memoized
 def sentinel_composite(region, start_str, end_str, bands):
     try:
         coll = (ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
@@ -468,15 +597,7 @@ def sentinel_composite(region, start_str, end_str, bands):
         logger.error(f"sentinel_composite: {e}"); return None
 
 
-def get_band_stats(comp, region, scale=10):
-    try:
-        s = comp.reduceRegion(reducer=ee.Reducer.mean(), geometry=region,
-                              scale=scale, maxPixels=1e13).getInfo()
-        return {k: (float(v) if v is not None else 0.0) for k, v in s.items()}
-    except Exception as e:
-        logger.error(f"get_band_stats: {e}"); return {}
-
-
+@ee_memoized
 def get_lst(region, end_str):
     try:
         end_dt   = datetime.strptime(end_str, "%Y-%m-%d")
@@ -494,9 +615,10 @@ def get_lst(region, end_str):
         logger.error(f"get_lst: {e}"); return None
 
 
+@ee_memoized
 def get_soil_texture(region):
     try:
-        mode = SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
+        mode = soil_texture_img().clip(region.buffer(500)).reduceRegion(
             ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13).get("b0")
         v = safe_get_info(mode, "texture")
         return int(v) if v is not None else None
@@ -507,88 +629,85 @@ def get_soil_texture(region):
 # ─────────────────────────────────────────────
 #  Derived Parameters
 # ─────────────────────────────────────────────
-def get_ph_new(bs):
-    b2,b3,b4,b5,b8,b11 = bs.get("B2",0),bs.get("B3",0),bs.get("B4",0),bs.get("B5",0),bs.get("B8",0),bs.get("B11",0)
-    ndvi_re = ((b8-b5)/(b8+b5+1e-6)+(b8-b4)/(b8+b4+1e-6))/2
-    ph = 6.5+1.2*ndvi_re+0.8*b11/(b8+1e-6)-0.5*b8/(b4+1e-6)+0.15*(1-(b2+b3+b4)/3)
-    return max(4.0, min(9.0, ph))
-
-def get_organic_carbon_pct(bs):
-    b2,b3,b4,b5,b8,b11,b12 = bs.get("B2",0),bs.get("B3",0),bs.get("B4",0),bs.get("B5",0),bs.get("B8",0),bs.get("B11",0),bs.get("B12",0)
-    ndvi_re = ((b8-b5)/(b8+b5+1e-6)+(b8-b4)/(b8+b4+1e-6))/2
-    L=0.5; savi=((b8-b4)/(b8+b4+L+1e-6))*(1+L)
-    evi=2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
-    oc=1.2+3.5*ndvi_re+2.2*savi-1.5*(b11+b12)/2+0.4*evi
-    return max(0.1, min(5.0, oc))
-
-def get_salinity_ec(bs):
-    b2,b3,b4,b8 = bs.get("B2",0),bs.get("B3",0),bs.get("B4",0),bs.get("B8",0)
-    ndvi=(b8-b4)/(b8+b4+1e-6); brightness=(b2+b3+b4)/3
-    si1=(b3*b4)**0.5; si2=(b3**2+b4**2)**0.5 if (b3**2+b4**2)>0 else 0
-    ec=0.5+abs((si1+si2)/2)*4+(1-max(0,min(1,ndvi)))*2+0.3*(1-brightness)
-    return max(0.0, min(16.0, ec))
-
 def estimate_cec(comp, region, intercept, slope_clay, slope_om):
     if comp is None: return None
     try:
         clay=comp.expression("(B11-B8)/(B11+B8+1e-6)",{"B11":comp.select("B11"),"B8":comp.select("B8")}).rename("clay")
         om=comp.expression("(B8-B4)/(B8+B4+1e-6)",{"B8":comp.select("B8"),"B4":comp.select("B4")}).rename("om")
-        c_m=safe_get_info(clay.reduceRegion(ee.Reducer.mean(),geometry=region,scale=20,maxPixels=1e13).get("clay"))
-        o_m=safe_get_info(om.reduceRegion(ee.Reducer.mean(),geometry=region,scale=20,maxPixels=1e13).get("om"))
+        s=clay.addBands(om).reduceRegion(ee.Reducer.mean(),geometry=region,scale=20,maxPixels=1e13).getInfo()
+        c_m,o_m=s.get("clay"),s.get("om")
         return (intercept+slope_clay*c_m+slope_om*o_m) if c_m and o_m else None
     except: return None
 
-def get_ndvi(bs): b8,b4=bs.get("B8",0),bs.get("B4",0); return (b8-b4)/(b8+b4+1e-6)
-def get_evi(bs):  b8,b4,b2=bs.get("B8",0),bs.get("B4",0),bs.get("B2",0); return 2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
-def get_fvc(bs):  return max(0,min(1,((get_ndvi(bs)-0.2)/(0.8-0.2))**2))
-def get_ndwi(bs): b3,b8=bs.get("B3",0),bs.get("B8",0); return (b3-b8)/(b3+b8+1e-6)
-
-def get_npk_kgha(bs):
-    b2,b3,b4=bs.get("B2",0),bs.get("B3",0),bs.get("B4",0)
-    b5,b6,b7=bs.get("B5",0),bs.get("B6",0),bs.get("B7",0)
-    b8,b8a=bs.get("B8",0),bs.get("B8A",0); b11,b12=bs.get("B11",0),bs.get("B12",0)
-    ndvi=(b8-b4)/(b8+b4+1e-6); evi=2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
-    brightness=(b2+b3+b4)/3; ndre=(b8a-b5)/(b8a+b5+1e-6)
-    ci_re=(b7/(b5+1e-6))-1; mcari=((b5-b4)-0.2*(b5-b3))*(b5/(b4+1e-6))
-    N=max(50,min(600, 280+300*ndre+150*evi+20*(ci_re/5)-80*brightness+30*mcari))
-    si1=(b3*b4)**0.5; si2=(b3**2+b4**2)**0.5 if (b3**2+b4**2)>0 else 0
-    P=max(2,min(60, 11+15*(1-brightness)+6*ndvi+4*abs((si1+si2)/2)+2*b3))
-    K=max(40,min(600, 150+200*b11/(b5+b6+1e-6)+80*(b11-b12)/(b11+b12+1e-6)+60*ndvi))
-    return float(N),float(P),float(K)
-
-def get_calcium_kgha(bs):
-    b2,b3,b4,b8,b11,b12=bs.get("B2",0),bs.get("B3",0),bs.get("B4",0),bs.get("B8",0),bs.get("B11",0),bs.get("B12",0)
-    Ca=550+250*(b11+b12)/(b4+b3+1e-6)+150*(b2+b3+b4)/3-100*(b8-b4)/(b8+b4+1e-6)-80*(b11-b8)/(b11+b8+1e-6)
-    return max(100,min(1200,float(Ca)))
-
-def get_magnesium_kgha(bs):
-    b4,b5,b7,b8,b8a,b11,b12=bs.get("B4",0),bs.get("B5",0),bs.get("B7",0),bs.get("B8",0),bs.get("B8A",0),bs.get("B11",0),bs.get("B12",0)
-    Mg=110+60*(b8a-b5)/(b8a+b5+1e-6)+40*((b7/(b5+1e-6))-1)+30*(b11-b12)/(b11+b12+1e-6)+20*(b8-b4)/(b8+b4+1e-6)
-    return max(10,min(400,float(Mg)))
-
-def get_sulphur_kgha(bs):
-    b3,b4,b5,b8,b11,b12=bs.get("B3",0),bs.get("B4",0),bs.get("B5",0),bs.get("B8",0),bs.get("B11",0),bs.get("B12",0)
-    si1=(b3*b4)**0.5; si2=(b3**2+b4**2)**0.5 if (b3**2+b4**2)>0 else 0
-    S=20+15*b11/(b3+b4+1e-6)+10*abs((si1+si2)/2)+5*(b5/(b4+1e-6)-1)-8*b12/(b11+1e-6)+5*(b8-b4)/(b8+b4+1e-6)
-    return max(2,min(80,float(S)))
+def soil_param_image(comp):
+    """Every spectral soil parameter of `comp`'s bands as one band each."""
+    bands = {k: comp.select(k) for k in ALL_BANDS}
+    def ex(expr, **idx):
+        return comp.expression(expr, {**bands, **idx})
+
+    ndvi = ex("(B8-B4)/(B8+B4+1e-6)")
+    idx  = {
+        "ndvi":       ndvi,
+        "ndvi01":     ndvi.clamp(0, 1),
+        "ndvi_re":    ex("((B8-B5)/(B8+B5+1e-6)+ndvi)/2", ndvi=ndvi),
+        "evi":        ex("2.5*(B8-B4)/(B8+6*B4-7.5*B2+1+1e-6)"),
+        "savi":       ex("((B8-B4)/(B8+B4+0.5+1e-6))*1.5"),
+        "brightness": ex("(B2+B3+B4)/3"),
+        "si":         (bands["B3"].multiply(bands["B4"]).max(0).sqrt()
+                       .add(bands["B3"].hypot(bands["B4"])).divide(2).abs()),
+        "ndre":       ex("(B8A-B5)/(B8A+B5+1e-6)"),
+        "ci_re":      ex("(B7/(B5+1e-6))-1"),
+    }
+    idx["mcari"] = ex("((B5-B4)-0.2*(B5-B3))*(B5/(B4+1e-6))")
+
+    out = []
+    for param, (expr, lo, hi) in SOIL_EXPRESSIONS.items():
+        img = ex(expr, **idx)
+        if lo is not None:
+            img = img.clamp(lo, hi)
+        out.append(img.rename(PARAM_BANDS[param]))
+    return ee.Image.cat(out)
+
+
+def get_soil_params(comp, region, scale=10):
+    """
+    Every spectral soil parameter in one getInfo() round trip. The formulas
+    are applied once to the field's mean bands, not per pixel: ratio terms
+    blow up on dark or water pixels and would dominate a per-pixel mean.
+    """
+    try:
+        means = comp.reduceRegion(reducer=ee.Reducer.mean(), geometry=region,
+                                  scale=scale, maxPixels=1e13)
+        # A fully masked band counts as 0, as in the other language reports
+        means = ee.Dictionary.fromLists(
+            ALL_BANDS, [ee.Algorithms.If(means.get(b), means.get(b), 0) for b in ALL_BANDS])
+        # Constant image of the means, so SOIL_EXPRESSIONS and their clamps
+        # run unchanged; reading it at one point returns the values.
+        s = soil_param_image(means.toImage(ALL_BANDS)).reduceRegion(
+            reducer=ee.Reducer.first(), geometry=region.centroid(1), scale=scale).getInfo()
+        return {p: (float(s[b]) if s.get(b) is not None else None) for p, b in PARAM_BANDS.items()}
+    except Exception as e:
+        logger.error(f"get_soil_params: {e}"); return {p: None for p in PARAM_BANDS}
 
 
 # ─────────────────────────────────────────────
 #  Status & Score
 # ─────────────────────────────────────────────
+def _status_classifier(param, rng):
+    if param == "Soil Texture": return lambda v: "good" if v == 7 else "low"
+    mn, mx = rng
+    if mn is None: return lambda v: "good" if v <= mx else "high"
+    if mx is None: return lambda v: "good" if v >= mn else "low"
+    return lambda v: "low" if v < mn else ("high" if v > mx else "good")
+
+# param -> value classifier specialised on its ideal range
+STATUS_CLASSIFIERS = {p: _status_classifier(p, rng) for p, rng in IDEAL_RANGES.items()}
+
+
 def get_param_status(param, value):
     if value is None: return "na"
-    if param == "Soil Texture": return "good" if value == 7 else "low"
-    rng = IDEAL_RANGES.get(param, (None, None))
-    if isinstance(rng, tuple):
-        mn, mx = rng
-        if mn is None and mx is not None: return "good" if value <= mx else "high"
-        if mx is None and mn is not None: return "good" if value >= mn else "low"
-        if mn is not None and mx is not None:
-            if value < mn: return "low"
-            if value > mx: return "high"
-            return "good"
-    return "good"
+    clf = STATUS_CLASSIFIERS.get(param)
+    return clf(value) if clf else "good"
 
 
 def calculate_soil_health_score(params):
@@ -599,14 +718,20 @@ def calculate_soil_health_score(params):
     return pct, rating, good, total
 
 
-def get_suggestion(param, value):
-    if value is None or param not in SUGGESTIONS: return "-"
-    s  = SUGGESTIONS[param]
-    st = get_param_status(param, value)
+def _suggestion_text(param, st):
+    s = SUGGESTIONS[param]
     if st == "good": return "సరైనది: " + s.get("good", "ప్రస్తుత పద్ధతి కొనసాగించండి.")
     if st == "low":  return "సరిచేయండి: " + s.get("low",  s.get("high", "వ్యవసాయ నిపుణుడిని సంప్రదించండి."))
-    if st == "high": return "సరిచేయండి: " + s.get("high", s.get("low",  "వ్యవసాయ నిపుణుడిని సంప్రదించండి."))
-    return "-"
+    return "సరిచేయండి: " + s.get("high", s.get("low",  "వ్యవసాయ నిపుణుడిని సంప్రదించండి."))
+
+# (param, status) -> full suggestion line, resolved once at import
+SUGGESTION_TEXT = {(p, st): _suggestion_text(p, st)
+                   for p in SUGGESTIONS for st in ("good", "low", "high")}
+
+
+def get_suggestion(param, value, st=None):
+    if value is None: return "-"
+    return SUGGESTION_TEXT.get((param, st or get_param_status(param, value)), "-")
 
 
 def generate_interpretation(param, value):
@@ -632,7 +757,7 @@ def generate_interpretation(param, value):
 
 
 # ─────────────────────────────────────────────
-#  Charts (matplotlib, BytesIO output)
+#  Charts (matplotlib → SVG → vector Drawing)
 # ─────────────────────────────────────────────
 def _bar_color(param, val):
     s = get_param_status(param, val)
@@ -646,13 +771,25 @@ def _set_telugu_ticks(ax, labels):
         ax.set_xticklabels(labels, fontsize=8)
 
 
+def _render_chart(fig, width=14*cm, height=7*cm):
+    """Render a chart as a vector ReportLab Drawing (via SVG) sized for the report."""
+    fig.tight_layout()
+    buf = BytesIO(); fig.savefig(buf, format='svg'); buf.seek(0)
+    drawing = svg2rlg(buf)
+    sx, sy  = width / drawing.width, height / drawing.height
+    drawing.scale(sx, sy)
+    drawing.width, drawing.height = width, height
+    drawing.hAlign = 'LEFT'
+    return drawing
+
+
 def make_nutrient_chart(n, p, k, ca, mg, s):
     pkeys = ["Nitrogen","Phosphorus","Potassium","Calcium","Magnesium","Sulphur"]
     vals  = [n or 0, p or 0, k or 0, ca or 0, mg or 0, s or 0]
     tlbls = ["నైట్రోజన్\n(kg/ha)","భాస్వరం\nP2O5 (kg/ha)","పొటాషియం\nK2O (kg/ha)",
              "కాల్షియం\n(kg/ha)","మెగ్నీషియం\n(kg/ha)","గంధకం\n(kg/ha)"]
     bcs = [_bar_color(pk, v) for pk, v in zip(pkeys, vals)]
-    fig, ax = plt.subplots(figsize=(11, 4.5))
+    fig = Figure(figsize=(11, 4.5)); FigureCanvasAgg(fig); ax = fig.add_subplot()
     bars = ax.bar(range(len(tlbls)), vals, color=bcs, alpha=0.85)
     ymax = max(vals) * 1.4 if any(vals) else 400
     ax.set_ylim(0, ymax)
@@ -665,16 +802,14 @@ def make_nutrient_chart(n, p, k, ca, mg, s):
         kw  = {"ha":"center","va":"bottom","fontsize":7}
         if TELUGU_FP: kw["fontproperties"] = TELUGU_FP
         ax.text(bar.get_x()+bar.get_width()/2, bar.get_height()+ymax*0.02, f"{val:.1f}\n{lbl}", **kw)
-    plt.tight_layout()
-    buf = BytesIO(); plt.savefig(buf, format='png', dpi=120, bbox_inches='tight'); plt.close(); buf.seek(0)
-    return buf
+    return _render_chart(fig)
 
 
 def make_vegetation_chart(ndvi, ndwi):
     tlbls = ["వృక్ష సూచిక\n(NDVI)", "నీటి సూచిక\n(NDWI)"]
     vals  = [ndvi or 0, ndwi or 0]
     bcs   = [_bar_color(p, v) for p, v in zip(["NDVI","NDWI"], vals)]
-    fig, ax = plt.subplots(figsize=(5, 4.5))
+    fig = Figure(figsize=(5, 4.5)); FigureCanvasAgg(fig); ax = fig.add_subplot()
     bars = ax.bar(range(2), vals, color=bcs, alpha=0.85)
     ax.axhline(0, color='black', linewidth=0.5, linestyle='--'); ax.set_ylim(-1, 1)
     if TELUGU_FP:
@@ -687,9 +822,7 @@ def make_vegetation_chart(ndvi, ndwi):
         kw  = {"ha":"center","va":"bottom","fontsize":9}
         if TELUGU_FP: kw["fontproperties"] = TELUGU_FP
         ax.text(bar.get_x()+bar.get_width()/2, yp, f"{val:.2f}\n{lbl}", **kw)
-    plt.tight_layout()
-    buf = BytesIO(); plt.savefig(buf, format='png', dpi=120, bbox_inches='tight'); plt.close(); buf.seek(0)
-    return buf
+    return _render_chart(fig)
 
 
 def make_soil_properties_chart(ph, sal, oc, cec, lst):
@@ -697,7 +830,7 @@ def make_soil_properties_chart(ph, sal, oc, cec, lst):
     tlbls = ["pH\nస్థాయి","EC విద్యుత్\n(mS/cm)","సేంద్రీయ\nకార్బన్ (%)","CEC\n(cmol/kg)","భూ వేడి\n(C)"]
     vals  = [ph or 0, sal or 0, oc or 0, cec or 0, lst or 0]
     bcs   = [_bar_color(pk, v) for pk, v in zip(pkeys, vals)]
-    fig, ax = plt.subplots(figsize=(9, 4.5))
+    fig = Figure(figsize=(9, 4.5)); FigureCanvasAgg(fig); ax = fig.add_subplot()
     bars = ax.bar(range(len(tlbls)), vals, color=bcs, alpha=0.85)
     ymax = max(vals) * 1.4 if any(vals) else 50; ax.set_ylim(0, ymax)
     if TELUGU_FP:
@@ -709,9 +842,7 @@ def make_soil_properties_chart(ph, sal, oc, cec, lst):
         kw  = {"ha":"center","va":"bottom","fontsize":8}
         if TELUGU_FP: kw["fontproperties"] = TELUGU_FP
         ax.text(bar.get_x()+bar.get_width()/2, bar.get_height()+ymax*0.02, f"{val:.2f}\n{lbl}", **kw)
-    plt.tight_layout()
-    buf = BytesIO(); plt.savefig(buf, format='png', dpi=120, bbox_inches='tight'); plt.close(); buf.seek(0)
-    return buf
+    return _render_chart(fig)
 
 
 # ─────────────────────────────────────────────
@@ -733,45 +864,41 @@ def call_groq(prompt: str) -> str:
 #  Core Analysis
 # ─────────────────────────────────────────────
 def run_analysis(req: ReportRequest) -> dict:
+    initialize_ee()
     region = build_region(req)
-    comp   = sentinel_composite(region, req.start_date, req.end_date, ALL_BANDS)
-    texc   = get_soil_texture(region)
-    lst    = get_lst(region, req.end_date)
+    rkey   = region_key(req)
+    # Composite, texture and LST are independent EE queries — overlap their round trips
+    comp_f = EE_EXECUTOR.submit(sentinel_composite, rkey, region, req.start_date, req.end_date, ALL_BANDS)
+    texc_f = EE_EXECUTOR.submit(get_soil_texture, rkey, region)
+    lst_f  = EE_EXECUTOR.submit(get_lst, rkey, region, req.end_date)
+    comp   = comp_f.result()
 
     if comp is None:
-        ph=sal=oc=cec=ndwi=ndvi=evi=fvc=n_val=p_val=k_val=ca_val=mg_val=s_val=None
+        vals = dict.fromkeys(SOIL_EXPRESSIONS)
+        cec  = None
     else:
-        bs    = get_band_stats(comp, region)
-        ph    = get_ph_new(bs);          sal  = get_salinity_ec(bs)
-        oc    = get_organic_carbon_pct(bs)
-        cec   = estimate_cec(comp, region, req.cec_intercept, req.cec_slope_clay, req.cec_slope_om)
-        ndwi  = get_ndwi(bs);            ndvi = get_ndvi(bs)
-        evi   = get_evi(bs);             fvc  = get_fvc(bs)
-        n_val, p_val, k_val = get_npk_kgha(bs)
-        ca_val = get_calcium_kgha(bs);   mg_val = get_magnesium_kgha(bs)
-        s_val  = get_sulphur_kgha(bs)
-
-    return {
-        "pH":ph,"Salinity":sal,"Organic Carbon":oc,"CEC":cec,
-        "Soil Texture":texc,"LST":lst,"NDWI":ndwi,"NDVI":ndvi,
-        "EVI":evi,"FVC":fvc,"Nitrogen":n_val,"Phosphorus":p_val,
-        "Potassium":k_val,"Calcium":ca_val,"Magnesium":mg_val,"Sulphur":s_val,
-    }
+        cec_f = EE_EXECUTOR.submit(estimate_cec, comp, region,
+                                   req.cec_intercept, req.cec_slope_clay, req.cec_slope_om)
+        vals  = get_soil_params(comp, region)
+        cec   = cec_f.result()
+    vals.update({"CEC": cec, "Soil Texture": texc_f.result(), "LST": lst_f.result()})
+    return {p: vals[p] for p in PARAM_ORDER}
 
 
 # ─────────────────────────────────────────────
-#  PDF Generator (Telugu via PIL)
+#  PDF Generator (Telugu: PIL text blocks, native tables)
 # ─────────────────────────────────────────────
-def generate_pdf(params: dict, location: str, date_range: str) -> bytes:
+def generate_pdf(params: dict, location: str, date_range: str, out) -> None:
     REPORT_PARAMS = {k: v for k, v in params.items() if k not in ("EVI", "FVC")}
     score, rating, good_c, total_c = calculate_soil_health_score(REPORT_PARAMS)
 
-    # Charts → BytesIO
-    nc_buf = make_nutrient_chart(params["Nitrogen"], params["Phosphorus"], params["Potassium"],
-                                  params["Calcium"],  params["Magnesium"],  params["Sulphur"])
-    vc_buf = make_vegetation_chart(params["NDVI"], params["NDWI"])
-    pc_buf = make_soil_properties_chart(params["pH"], params["Salinity"],
-                                         params["Organic Carbon"], params["CEC"], params["LST"])
+    # Charts → vector Drawings, rendered concurrently with the Groq calls below
+    nc_f = REPORT_EXECUTOR.submit(make_nutrient_chart, params["Nitrogen"], params["Phosphorus"],
+                                  params["Potassium"], params["Calcium"], params["Magnesium"],
+                                  params["Sulphur"])
+    vc_f = REPORT_EXECUTOR.submit(make_vegetation_chart, params["NDVI"], params["NDWI"])
+    pc_f = REPORT_EXECUTOR.submit(make_soil_properties_chart, params["pH"], params["Salinity"],
+                                  params["Organic Carbon"], params["CEC"], params["LST"])
 
     def fv(p, v): return "N/A" if v is None else f"{v:.2f}{UNIT_MAP.get(p,'')}"
 
@@ -789,11 +916,13 @@ pH={fv('pH',params['pH'])}, EC={fv('Salinity',params['Salinity'])}, నేల={t
 NDVI={fv('NDVI',params['NDVI'])}, NDWI={fv('NDWI',params['NDWI'])}
 భారతీయ వాతావరణానికి అనువైన పంటలు సూచించండి."""
 
-    exec_summary = call_groq(exec_prompt) or ". సారాంశం అందుబాటులో లేదు."
-    recs         = call_groq(rec_prompt)  or ". సిఫార్సులు అందుబాటులో లేవు."
+    exec_f = REPORT_EXECUTOR.submit(call_groq, exec_prompt)
+    recs_f = REPORT_EXECUTOR.submit(call_groq, rec_prompt)
+    exec_summary = exec_f.result() or ". సారాంశం అందుబాటులో లేదు."
+    recs         = recs_f.result() or ". సిఫార్సులు అందుబాటులో లేవు."
+    nc_chart, vc_chart, pc_chart = nc_f.result(), vc_f.result(), pc_f.result()
 
-    pdf_buf = BytesIO()
-    doc = SimpleDocTemplate(pdf_buf, pagesize=A4,
+    doc = SimpleDocTemplate(out, pagesize=A4,
                             rightMargin=2*cm, leftMargin=2*cm,
                             topMargin=3*cm, bottomMargin=2*cm)
     PW_CM = 17.0
@@ -815,27 +944,22 @@ NDVI={fv('NDVI',params['NDVI'])}, NDWI={fv('NDWI',params['NDWI'])}
     # Section 1: Summary
     elems.append(t_heading("1. కార్యనిర్వాహక సారాంశం", PW_CM))
     elems.append(Spacer(1, 0.2*cm))
-    for line in exec_summary.split('\n'):
-        line = line.strip()
-        if line:
-            elems.append(t_para(line, 16, (30,30,30), PW_CM))
-            elems.append(Spacer(1, 0.1*cm))
+    elems.append(t_block(exec_summary))
     elems.append(Spacer(1, 0.3*cm))
 
     # Section 2: Health Score
     elems.append(t_heading("2. నేల ఆరోగ్య అంచనా", PW_CM))
     elems.append(Spacer(1, 0.2*cm))
     score_color = (20,150,20) if score >= 60 else ((200,150,0) if score >= 40 else (200,50,50))
-    score_tbl = build_telugu_table_image(
+    elems.append(build_telugu_table(
         headers=["మొత్తం స్కోర్", "అంచనా", "అత్యుత్తమ పారామీటర్లు"],
         rows=[[
             (f"{score:.1f}%", score_color),
             (rating, score_color),
             (f"{good_c} / {total_c}", (30,30,30))
         ]],
-        col_widths_px=[260, 260, 260], font_size=17
-    )
-    ri = pil_img_to_rl(score_tbl, width_cm=PW_CM); ri.hAlign = 'LEFT'; elems.append(ri)
+        col_widths_cm=[5.6, 5.6, 5.8], font_size=11
+    ))
     elems.append(Spacer(1, 0.3*cm))
     elems.append(PageBreak())
 
@@ -856,35 +980,28 @@ NDVI={fv('NDVI',params['NDVI'])}, NDWI={fv('NDWI',params['NDWI'])}
             (TELUGU_STATUS.get(st,"N/A"), STATUS_COLOR_PIL.get(st,(0,0,0))),
             (generate_interpretation(param, value), (30,30,30))
         ])
-    tbl3_img = build_telugu_table_image(headers=headers3, rows=rows3,
-                                         col_widths_px=[200,130,160,110,300], font_size=14)
-    ri3 = pil_img_to_rl(tbl3_img, width_cm=PW_CM); ri3.hAlign = 'LEFT'; elems.append(ri3)
+    elems.append(build_telugu_table(headers=headers3, rows=rows3,
+                                    col_widths_cm=[3.8, 2.5, 3.0, 2.1, 5.6], font_size=9))
     elems.append(PageBreak())
 
     # Section 4: Charts
     elems.append(t_heading("4. దృశ్యమాన చిత్రీకరణలు", PW_CM))
     elems.append(Spacer(1, 0.2*cm))
-    for lbl, buf in [
-        ("N, P2O5, K2O, Ca, Mg, S పోషక స్థాయిలు (కిలో/హెక్టారు):", nc_buf),
-        ("వృక్ష మరియు నీటి సూచికలు (NDVI, NDWI):", vc_buf),
-        ("నేల లక్షణాలు:", pc_buf),
+    for lbl, chart in [
+        ("N, P2O5, K2O, Ca, Mg, S పోషక స్థాయిలు (కిలో/హెక్టారు):", nc_chart),
+        ("వృక్ష మరియు నీటి సూచికలు (NDVI, NDWI):", vc_chart),
+        ("నేల లక్షణాలు:", pc_chart),
     ]:
         elems.append(t_small(lbl, 15, (30,30,30), PW_CM))
-        if buf:
-            buf.seek(0)
-            ci = RLImage(buf, width=14*cm, height=7*cm)
-            ci.hAlign = 'LEFT'; elems.append(ci)
+        if chart is not None:
+            elems.append(chart)
         elems.append(Spacer(1, 0.3*cm))
     elems.append(PageBreak())
 
     # Section 5: Recommendations
     elems.append(t_heading("5. పంట సిఫార్సులు మరియు చికిత్సలు", PW_CM))
     elems.append(Spacer(1, 0.2*cm))
-    for line in recs.split('\n'):
-        line = line.strip()
-        if line:
-            elems.append(t_para(line, 16, (30,30,30), PW_CM))
-            elems.append(Spacer(1, 0.1*cm))
+    elems.append(t_block(recs))
     elems.append(Spacer(1, 0.3*cm))
     elems.append(PageBreak())
 
@@ -894,22 +1011,15 @@ NDVI={fv('NDVI',params['NDVI'])}, NDWI={fv('NDWI',params['NDWI'])}
     elems.append(t_small("ప్రతి పారామీటర్కు: మంచి స్థాయి నిర్వహించేందుకు లేదా సమస్యలు సరిచేసేందుకు ఏమి చేయాలో తెలుసుకోండి.", 13, (80,80,80), PW_CM))
     elems.append(Spacer(1, 0.2*cm))
 
-    SUG_PARAMS = ["pH","Salinity","Organic Carbon","CEC","Nitrogen","Phosphorus",
-                  "Potassium","Calcium","Magnesium","Sulphur","NDVI","NDWI","LST"]
-    rows6 = []
-    for param in SUG_PARAMS:
-        value = params.get(param)
-        st    = get_param_status(param, value)
-        rows6.append([
-            (TELUGU_PARAM_NAMES.get(param, param), (30,30,30)),
-            (TELUGU_STATUS.get(st, "N/A"), STATUS_COLOR_PIL.get(st, (0,0,0))),
-            (get_suggestion(param, value), (30,30,30))
-        ])
-    tbl6_img = build_telugu_table_image(
+    statuses6 = [(p, params.get(p), get_param_status(p, params.get(p))) for p in SUG_PARAMS]
+    rows6 = [[(TELUGU_PARAM_NAMES.get(p, p), (30,30,30)),
+              (TELUGU_STATUS[st], STATUS_COLOR_PIL[st]),
+              (get_suggestion(p, v, st), (30,30,30))]
+             for p, v, st in statuses6]
+    elems.append(build_telugu_table(
         headers=["పారామీటర్", "స్థితి", "అవసరమైన చర్య"],
-        rows=rows6, col_widths_px=[200,110,590], font_size=14
-    )
-    ri6 = pil_img_to_rl(tbl6_img, width_cm=PW_CM); ri6.hAlign = 'LEFT'; elems.append(ri6)
+        rows=rows6, col_widths_cm=[3.8, 2.1, 11.1], font_size=9
+    ))
     elems.append(Spacer(1, 0.4*cm))
     elems.append(t_small(
         "గమనిక: భాస్వరం (P) మరియు గంధకం (S) విలువలకు స్పెక్ట్రల్ విశ్వసనీయత తక్కువ. అంచనాగా మాత్రమే పరిగణించండి.",
@@ -936,8 +1046,6 @@ NDVI={fv('NDVI',params['NDVI'])}, NDWI={fv('NDWI',params['NDWI'])}
         canv.restoreState()
 
     doc.build(elems, onFirstPage=add_header, onLaterPages=add_header, canvasmaker=canvas.Canvas)
-    pdf_buf.seek(0)
-    return pdf_buf.getvalue()
 
 
 # ─────────────────────────────────────────────
@@ -948,31 +1056,41 @@ async def root():
     return {"status": "ok", "message": "FarmMatrix Telugu Soil Health API is running.", "version": "2.0.0"}
 
 
+def _build_report_sync(req: ReportRequest) -> memoryview:
+    """Blocking part of /report: EE analysis + ReportLab build, run in a worker thread.
+
+    The PDF is finished in a private buffer before anything is sent, so a
+    failed build still maps to HTTP 500 instead of a truncated download.
+    """
+    params     = run_analysis(req)
+    location   = f"Lat: {req.lat:.6f}, Lon: {req.lon:.6f}"
+    date_range = f"{req.start_date} to {req.end_date}"
+    pdf_buf    = BytesIO()
+    generate_pdf(params, location, date_range, pdf_buf)
+    # A view of the finished buffer, not a getvalue() copy; Response sends it as-is
+    return pdf_buf.getbuffer()
+
+
 @app.post("/report", tags=["Report"])
 async def generate_report_endpoint(req: ReportRequest):
     """
     Run full soil analysis and generate a complete Telugu PDF report.
     Accepts polygon_coords as List[List[float]] e.g. [[lon,lat],[lon,lat],...].
     If polygon_coords is null, uses a circular buffer around lat/lon.
-    Returns a downloadable PDF with all text rendered in Telugu via PIL.
+    Returns a downloadable Telugu PDF (PIL-rendered text blocks, native tables).
     """
     try:
-        params     = run_analysis(req)
-        location   = f"Lat: {req.lat:.6f}, Lon: {req.lon:.6f}"
-        date_range = f"{req.start_date} to {req.end_date}"
-        pdf_bytes  = generate_pdf(params, location, date_range)
-
-        # ASCII-only filename — avoids latin-1 encoding error in HTTP headers
-        filename = f"soil_report_telugu_{date.today()}.pdf"
-
-        return StreamingResponse(
-            BytesIO(pdf_bytes),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(len(pdf_bytes)),
-            }
-        )
+        pdf_bytes = await anyio.to_thread.run_sync(
+            _build_report_sync, req, limiter=REPORT_LIMITER)
     except Exception as e:
         logger.error(f"/report error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # ASCII-only filename — avoids latin-1 encoding error in HTTP headers
+    filename = f"soil_report_telugu_{date.today()}.pdf"
+
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,6 +1,9 @@
 import logging
 import os
+from math import ceil
 from datetime import datetime, date, timedelta
+from functools import lru_cache
+from itertools import groupby
 from dateutil.relativedelta import relativedelta
 import streamlit as st
 import folium
@@ -8,8 +11,10 @@ from streamlit_folium import st_folium
 import ee
 import pandas as pd
 from folium.plugins import Draw
-import matplotlib.pyplot as plt
+import matplotlib
 import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import cm
@@ -18,10 +23,11 @@ from reportlab.platypus import (
 )
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
-from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from openai import OpenAI
 
 # ─────────────────────────────────────────────
@@ -34,29 +40,39 @@ HINDI_FONT    = "NotoSerifDevanagari-Regular.ttf"
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# ── Register Hindi font for ReportLab ─────────────────────────────────────────
-if os.path.exists(HINDI_FONT):
+# ── Register Hindi font for ReportLab and Matplotlib ──────────────────────────
+# Streamlit re-executes this script on every widget change; cache_resource
+# keeps the TTF parsing to once per server process.
+@st.cache_resource(show_spinner=False)
+def load_hindi_fonts():
+    if not os.path.exists(HINDI_FONT):
+        logging.warning("NotoSerifDevanagari-Regular.ttf not found. Hindi text may not render.")
+        return False, None
     pdfmetrics.registerFont(TTFont("NotoDevanagari", HINDI_FONT))
-    HINDI_FONT_REGISTERED = True
-else:
-    HINDI_FONT_REGISTERED = False
-    logging.warning("NotoSerifDevanagari-Regular.ttf not found. Hindi text may not render.")
-
-# ── Register Hindi font for Matplotlib ────────────────────────────────────────
-if os.path.exists(HINDI_FONT):
     fm.fontManager.addfont(HINDI_FONT)
-    MATPLOTLIB_HINDI_FONT = fm.FontProperties(fname=HINDI_FONT)
-else:
-    MATPLOTLIB_HINDI_FONT = None
+    props = fm.FontProperties(fname=HINDI_FONT)
+    fm.findfont(props)  # warm the lookup cache before the chart threads start
+    # Make Devanagari the default chart face so titles, ticks and labels need
+    # no per-call fontproperties; DejaVu Sans covers any glyph it lacks.
+    matplotlib.rcParams["font.family"] = [props.get_name(), "DejaVu Sans"]
+    return True, props
+
+
+HINDI_FONT_REGISTERED, MATPLOTLIB_HINDI_FONT = load_hindi_fonts()
 
 # ─────────────────────────────────────────────
 #  Google Earth Engine init
 # ─────────────────────────────────────────────
-try:
-    ee.Initialize()
-except Exception:
-    ee.Authenticate()
-    ee.Initialize()
+@st.cache_resource(show_spinner=False)
+def initialize_ee():
+    try:
+        ee.Initialize()
+    except Exception:
+        ee.Authenticate()
+        ee.Initialize()
+
+
+initialize_ee()
 
 # ─────────────────────────────────────────────
 #  Constants & Lookups
@@ -227,60 +243,51 @@ ALL_BANDS = ["B2", "B3", "B4", "B5", "B6", "B7", "B8", "B8A", "B11", "B12"]
 # ─────────────────────────────────────────────
 #  Utility helpers
 # ─────────────────────────────────────────────
-def safe_get_info(computed_obj, name="value"):
+# The Earth Engine helpers below let request errors propagate, so the
+# st.cache_data fetchers never cache a failure as "no data"; the callers
+# in the UI catch and report them.
+def get_info_float(computed_obj):
     if computed_obj is None:
         return None
-    try:
-        info = computed_obj.getInfo()
-        return float(info) if info is not None else None
-    except Exception as e:
-        logging.warning(f"Failed to fetch {name}: {e}")
-        return None
+    info = computed_obj.getInfo()
+    return float(info) if info is not None else None
 
 
 def sentinel_composite(region, start, end, bands):
     start_str = start.strftime("%Y-%m-%d")
     end_str   = end.strftime("%Y-%m-%d")
-    try:
+    coll = (
+        ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+        .filterDate(start_str, end_str)
+        .filterBounds(region)
+        .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
+        .select(bands)
+    )
+    if coll.size().getInfo() > 0:
+        return coll.median().multiply(0.0001)
+    for days in range(5, 31, 5):
+        sd = (start - timedelta(days=days)).strftime("%Y-%m-%d")
+        ed = (end   + timedelta(days=days)).strftime("%Y-%m-%d")
         coll = (
             ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-            .filterDate(start_str, end_str)
+            .filterDate(sd, ed)
             .filterBounds(region)
-            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
+            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 30))
             .select(bands)
         )
         if coll.size().getInfo() > 0:
+            logging.info(f"Sentinel window expanded to {sd} to {ed}")
             return coll.median().multiply(0.0001)
-        for days in range(5, 31, 5):
-            sd = (start - timedelta(days=days)).strftime("%Y-%m-%d")
-            ed = (end   + timedelta(days=days)).strftime("%Y-%m-%d")
-            coll = (
-                ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-                .filterDate(sd, ed)
-                .filterBounds(region)
-                .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 30))
-                .select(bands)
-            )
-            if coll.size().getInfo() > 0:
-                logging.info(f"Sentinel window expanded to {sd} to {ed}")
-                return coll.median().multiply(0.0001)
-        logging.warning("No Sentinel-2 data available.")
-        return None
-    except Exception as e:
-        logging.error(f"Error in sentinel_composite: {e}")
-        return None
+    logging.warning("No Sentinel-2 data available.")
+    return None
 
 
 def get_band_stats(comp, region, scale=10):
-    try:
-        stats = comp.reduceRegion(
-            reducer=ee.Reducer.mean(), geometry=region,
-            scale=scale, maxPixels=1e13
-        ).getInfo()
-        return {k: (float(v) if v is not None else 0.0) for k, v in stats.items()}
-    except Exception as e:
-        logging.error(f"Error in get_band_stats: {e}")
-        return {}
+    stats = comp.reduceRegion(
+        reducer=ee.Reducer.mean(), geometry=region,
+        scale=scale, maxPixels=1e13
+    ).getInfo()
+    return {k: (float(v) if v is not None else 0.0) for k, v in stats.items()}
 
 
 # ─────────────────────────────────────────────
@@ -291,37 +298,29 @@ def get_lst(region, start, end):
     start_dt  = end_dt - relativedelta(months=1)
     start_str = start_dt.strftime("%Y-%m-%d")
     end_str   = end_dt.strftime("%Y-%m-%d")
-    try:
-        coll = (
-            ee.ImageCollection("MODIS/061/MOD11A2")
-            .filterBounds(region.buffer(5000))
-            .filterDate(start_str, end_str)
-            .select("LST_Day_1km")
-        )
-        if coll.size().getInfo() == 0:
-            return None
-        img   = coll.median().multiply(0.02).subtract(273.15).rename("lst").clip(region.buffer(5000))
-        stats = img.reduceRegion(reducer=ee.Reducer.mean(), geometry=region, scale=1000, maxPixels=1e13).getInfo()
-        val   = stats.get("lst")
-        return float(val) if val is not None else None
-    except Exception as e:
-        logging.error(f"Error in get_lst: {e}")
+    coll = (
+        ee.ImageCollection("MODIS/061/MOD11A2")
+        .filterBounds(region.buffer(5000))
+        .filterDate(start_str, end_str)
+        .select("LST_Day_1km")
+    )
+    if coll.size().getInfo() == 0:
         return None
+    img   = coll.median().multiply(0.02).subtract(273.15).rename("lst").clip(region.buffer(5000))
+    stats = img.reduceRegion(reducer=ee.Reducer.mean(), geometry=region, scale=1000, maxPixels=1e13).getInfo()
+    val   = stats.get("lst")
+    return float(val) if val is not None else None
 
 
 # ─────────────────────────────────────────────
 #  Soil Texture
 # ─────────────────────────────────────────────
 def get_soil_texture(region):
-    try:
-        mode = SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
-            ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13
-        ).get("b0")
-        val = safe_get_info(mode, "texture")
-        return int(val) if val is not None else None
-    except Exception as e:
-        logging.error(f"Error in get_soil_texture: {e}")
-        return None
+    mode = SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
+        ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13
+    ).get("b0")
+    val = get_info_float(mode)
+    return int(val) if val is not None else None
 
 
 # ─────────────────────────────────────────────
@@ -398,22 +397,59 @@ def get_salinity_ec(bs):
 # ─────────────────────────────────────────────
 #  CEC
 # ─────────────────────────────────────────────
-def estimate_cec(comp, region, intercept, slope_clay, slope_om):
+def get_cec_indices(comp, region):
+    """Mean clay and organic-matter indices that feed the CEC model."""
     if comp is None:
+        return None, None
+    clay = comp.expression("(B11-B8)/(B11+B8+1e-6)",
+                           {"B11": comp.select("B11"), "B8": comp.select("B8")}).rename("clay")
+    om   = comp.expression("(B8-B4)/(B8+B4+1e-6)",
+                           {"B8": comp.select("B8"), "B4": comp.select("B4")}).rename("om")
+    stats = clay.addBands(om).reduceRegion(ee.Reducer.mean(), geometry=region,
+                                           scale=20, maxPixels=1e13).getInfo()
+    c_m, o_m = stats.get("clay"), stats.get("om")
+    return (float(c_m) if c_m is not None else None,
+            float(o_m) if o_m is not None else None)
+
+
+def estimate_cec(cec_indices, intercept, slope_clay, slope_om):
+    c_m, o_m = cec_indices or (None, None)
+    if c_m is None or o_m is None:
         return None
-    try:
-        clay = comp.expression("(B11-B8)/(B11+B8+1e-6)",
-                               {"B11": comp.select("B11"), "B8": comp.select("B8")}).rename("clay")
-        om   = comp.expression("(B8-B4)/(B8+B4+1e-6)",
-                               {"B8": comp.select("B8"), "B4": comp.select("B4")}).rename("om")
-        c_m = safe_get_info(clay.reduceRegion(ee.Reducer.mean(), geometry=region, scale=20, maxPixels=1e13).get("clay"), "clay")
-        o_m = safe_get_info(om.reduceRegion(ee.Reducer.mean(),   geometry=region, scale=20, maxPixels=1e13).get("om"),   "om")
-        if c_m is None or o_m is None:
-            return None
-        return intercept + slope_clay * c_m + slope_om * o_m
-    except Exception as e:
-        logging.error(f"Error in estimate_cec: {e}")
+    return intercept + slope_clay * c_m + slope_om * o_m
+
+
+# ─────────────────────────────────────────────
+#  Cached Earth Engine fetches
+# ─────────────────────────────────────────────
+# Keyed by the drawn polygon's coordinates and the date range, so changing
+# the CEC coefficients or any other widget reuses the satellite results.
+# Earth Engine errors propagate out of these, so only real results are cached.
+@st.cache_data(show_spinner=False, ttl=3600)
+def fetch_sentinel_inputs(coords, start, end):
+    """Band means for the polygon, or None without imagery."""
+    region = ee.Geometry.Polygon(coords)
+    comp   = sentinel_composite(region, start, end, ALL_BANDS)
+    if comp is None:
         return None
+    return get_band_stats(comp, region)
+
+
+# Separate from the band means so a failed clay/OM reduction costs only CEC
+@st.cache_data(show_spinner=False, ttl=3600)
+def fetch_cec_indices(coords, start, end):
+    region = ee.Geometry.Polygon(coords)
+    return get_cec_indices(sentinel_composite(region, start, end, ALL_BANDS), region)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def fetch_soil_texture(coords):
+    return get_soil_texture(ee.Geometry.Polygon(coords))
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def fetch_lst(coords, start, end):
+    return get_lst(ee.Geometry.Polygon(coords), start, end)
 
 
 # ─────────────────────────────────────────────
@@ -544,6 +580,7 @@ def get_sulphur_kgha(bs):
 # ─────────────────────────────────────────────
 #  Status helpers
 # ─────────────────────────────────────────────
+@lru_cache(maxsize=512)
 def get_param_status(param, value):
     if value is None:
         return "na"
@@ -609,6 +646,7 @@ def generate_interpretation(param, value):
     return "कोई व्याख्या नहीं।"
 
 
+@lru_cache(maxsize=512)
 def get_suggestion(param, value):
     if value is None or param not in SUGGESTIONS:
         return "—"
@@ -623,28 +661,60 @@ def get_suggestion(param, value):
     return "—"
 
 
-def get_color_for_value(param, value):
-    s = get_param_status(param, value)
-    return 'green' if s == 'good' else ('orange' if s == 'low' else ('red' if s == 'high' else 'grey'))
+STATUS_BAR_COLORS = {"good": "green", "low": "orange", "high": "red"}
+
+
+STATUS_HINDI = {"good": "अच्छा", "low": "कम", "high": "अधिक", "na": "N/A"}
 
 
 def status_hindi(status):
-    return {"good": "अच्छा", "low": "कम", "high": "अधिक", "na": "N/A"}.get(status, "N/A")
+    return STATUS_HINDI.get(status, "N/A")
 
 
-# ─────────────────────────────────────────────
-#  Hindi font helper for matplotlib
-# ─────────────────────────────────────────────
-def hfont():
-    """Return font properties dict for matplotlib Hindi text."""
-    if MATPLOTLIB_HINDI_FONT:
-        return {"fontproperties": MATPLOTLIB_HINDI_FONT}
-    return {}
+STATUS_TEXT_COLORS = {
+    "good": colors.Color(0.1, 0.55, 0.1),
+    "low":  colors.Color(0.85, 0.45, 0.0),
+    "high": colors.red,
+}
+
+
+def status_color_cmds(statuses, col):
+    """TEXTCOLOR commands for a table status column, one per run of equal statuses."""
+    cmds, row = [], 1
+    for status, run in groupby(statuses):
+        n = sum(1 for _ in run)
+        cmds.append(('TEXTCOLOR', (col, row), (col, row + n - 1),
+                     STATUS_TEXT_COLORS.get(status, colors.grey)))
+        row += n
+    return cmds
 
 
 # ─────────────────────────────────────────────
 #  Charts — Hindi labels
 # ─────────────────────────────────────────────
+# Flat-shaded bar charts compress well even at zlib level 1, which is
+# several times faster than the default; tight_layout() already fits the
+# axes, so the extra bbox_inches='tight' render pass is not needed.
+CHART_SAVE_KW = {"pil_kwargs": {"compress_level": 1}}
+
+# Every chart is embedded 13 cm wide; rasterise each one at just enough
+# pixels for ~120 dpi at that size instead of a flat 100 dpi per figure inch.
+CHART_WIDTH_CM, CHART_HEIGHT_CM = 13, 6.5
+CHART_PRINT_DPI = 120
+CHART_STATUS_LABELS = {"good": "अच्छा", "low": "कम", "high": "अधिक"}
+
+
+def _chart_png(fig):
+    dpi = max(72, ceil(CHART_WIDTH_CM / 2.54 * CHART_PRINT_DPI / fig.get_figwidth()))
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, **CHART_SAVE_KW)
+    buf.seek(0)
+    return buf
+
+
+BAR_TEXT_KW = {"ha": "center", "va": "bottom"}
+
+
 def make_nutrient_chart(n_val, p_val, k_val, ca_val, mg_val, s_val):
     try:
         nutrients  = [
@@ -653,17 +723,20 @@ def make_nutrient_chart(n_val, p_val, k_val, ca_val, mg_val, s_val):
         ]
         param_keys = ["Nitrogen", "Phosphorus", "Potassium", "Calcium", "Magnesium", "Sulphur"]
         values     = [n_val or 0, p_val or 0, k_val or 0, ca_val or 0, mg_val or 0, s_val or 0]
-        bar_colors = [get_color_for_value(p, v) for p, v in zip(param_keys, values)]
+        statuses   = [get_param_status(p, v) for p, v in zip(param_keys, values)]
+        bar_colors = [STATUS_BAR_COLORS.get(s, "grey") for s in statuses]
 
-        fig, ax = plt.subplots(figsize=(10, 4))
+        fig = Figure(figsize=(10, 4))
+        FigureCanvasAgg(fig)
+        ax  = fig.add_subplot()
         bars = ax.bar(range(len(nutrients)), values, color=bar_colors, alpha=0.82)
 
         if MATPLOTLIB_HINDI_FONT:
             ax.set_title("मिट्टी के पोषक तत्व (kg/हेक्टेयर) — ICAR मानक",
-                         fontsize=11, **hfont())
-            ax.set_ylabel("kg / हेक्टेयर", **hfont())
+                         fontsize=11)
+            ax.set_ylabel("kg / हेक्टेयर")
             ax.set_xticks(range(len(nutrients)))
-            ax.set_xticklabels(nutrients, fontproperties=MATPLOTLIB_HINDI_FONT, fontsize=8)
+            ax.set_xticklabels(nutrients, fontsize=8)
         else:
             ax.set_title("Soil Nutrients (kg/ha) — ICAR Standard", fontsize=11)
             ax.set_ylabel("kg / hectare")
@@ -673,22 +746,14 @@ def make_nutrient_chart(n_val, p_val, k_val, ca_val, mg_val, s_val):
         ymax = max(values) * 1.35 if any(values) else 400
         ax.set_ylim(0, ymax)
 
-        status_labels = {"good": "अच्छा", "low": "कम", "high": "अधिक"}
-        for bar, val, pk in zip(bars, values, param_keys):
-            st2 = get_param_status(pk, val)
-            lbl = status_labels.get(st2, "N/A")
-            kw  = {"ha": "center", "va": "bottom", "fontsize": 7}
-            if MATPLOTLIB_HINDI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_HINDI_FONT
+        bar_labels = [f"{val:.1f}\n{CHART_STATUS_LABELS.get(s, 'N/A')}"
+                      for val, s in zip(values, statuses)]
+        for bar, lbl in zip(bars, bar_labels):
             ax.text(bar.get_x() + bar.get_width() / 2,
-                    bar.get_height() + ymax * 0.02,
-                    f"{val:.1f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "nutrient_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
+                    bar.get_height() + ymax * 0.02, lbl, fontsize=7, **BAR_TEXT_KW)
+
+        fig.tight_layout()
+        return _chart_png(fig)
     except Exception as e:
         logging.error(f"Error in make_nutrient_chart: {e}")
         return None
@@ -698,14 +763,17 @@ def make_vegetation_chart(ndvi, ndwi):
     try:
         indices    = ["NDVI", "NDWI"]
         values     = [ndvi or 0, ndwi or 0]
-        bar_colors = [get_color_for_value(i, v) for i, v in zip(indices, values)]
+        statuses   = [get_param_status(i, v) for i, v in zip(indices, values)]
+        bar_colors = [STATUS_BAR_COLORS.get(s, "grey") for s in statuses]
 
-        fig, ax = plt.subplots(figsize=(5, 4))
+        fig = Figure(figsize=(5, 4))
+        FigureCanvasAgg(fig)
+        ax  = fig.add_subplot()
         bars = ax.bar(indices, values, color=bar_colors, alpha=0.82)
 
         if MATPLOTLIB_HINDI_FONT:
-            ax.set_title("वनस्पति और जल सूचकांक", fontsize=11, **hfont())
-            ax.set_ylabel("सूचकांक मान", **hfont())
+            ax.set_title("वनस्पति और जल सूचकांक", fontsize=11)
+            ax.set_ylabel("सूचकांक मान")
         else:
             ax.set_title("Vegetation and Water Indices", fontsize=11)
             ax.set_ylabel("Index Value")
@@ -713,22 +781,14 @@ def make_vegetation_chart(ndvi, ndwi):
         ax.set_ylim(-1, 1)
         ax.axhline(0, color='black', linewidth=0.5, linestyle='--')
 
-        status_labels = {"good": "अच्छा", "low": "कम", "high": "अधिक"}
-        for i, (bar, val) in enumerate(zip(bars, values)):
-            st2 = get_param_status(indices[i], val)
-            lbl = status_labels.get(st2, "N/A")
+        bar_labels = [f"{val:.2f}\n{CHART_STATUS_LABELS.get(s, 'N/A')}"
+                      for val, s in zip(values, statuses)]
+        for bar, val, lbl in zip(bars, values, bar_labels):
             ypos = bar.get_height() + 0.03 if val >= 0 else bar.get_height() - 0.08
-            kw   = {"ha": "center", "va": "bottom", "fontsize": 9}
-            if MATPLOTLIB_HINDI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_HINDI_FONT
-            ax.text(bar.get_x() + bar.get_width() / 2, ypos,
-                    f"{val:.2f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "vegetation_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
+            ax.text(bar.get_x() + bar.get_width() / 2, ypos, lbl, fontsize=9, **BAR_TEXT_KW)
+
+        fig.tight_layout()
+        return _chart_png(fig)
     except Exception as e:
         logging.error(f"Error in make_vegetation_chart: {e}")
         return None
@@ -739,14 +799,17 @@ def make_soil_properties_chart(ph, sal_ec, oc_pct, cec, lst):
         labels     = ["pH", "EC (mS/cm)", "OC (%)", "CEC (cmol/kg)", "LST (°C)"]
         param_keys = ["pH", "Salinity", "Organic Carbon", "CEC", "LST"]
         values     = [ph or 0, sal_ec or 0, oc_pct or 0, cec or 0, lst or 0]
-        bar_colors = [get_color_for_value(p, v) for p, v in zip(param_keys, values)]
+        statuses   = [get_param_status(p, v) for p, v in zip(param_keys, values)]
+        bar_colors = [STATUS_BAR_COLORS.get(s, "grey") for s in statuses]
 
-        fig, ax = plt.subplots(figsize=(8, 4))
+        fig = Figure(figsize=(8, 4))
+        FigureCanvasAgg(fig)
+        ax  = fig.add_subplot()
         bars = ax.bar(labels, values, color=bar_colors, alpha=0.82)
 
         if MATPLOTLIB_HINDI_FONT:
-            ax.set_title("मिट्टी के गुण (ICAR मानक)", fontsize=11, **hfont())
-            ax.set_ylabel("मान", **hfont())
+            ax.set_title("मिट्टी के गुण (ICAR मानक)", fontsize=11)
+            ax.set_ylabel("मान")
         else:
             ax.set_title("Soil Properties (ICAR Standard)", fontsize=11)
             ax.set_ylabel("Value")
@@ -754,22 +817,14 @@ def make_soil_properties_chart(ph, sal_ec, oc_pct, cec, lst):
         ymax = max(values) * 1.35 if any(values) else 50
         ax.set_ylim(0, ymax)
 
-        status_labels = {"good": "अच्छा", "low": "कम", "high": "अधिक"}
-        for bar, val, pk in zip(bars, values, param_keys):
-            st2 = get_param_status(pk, val)
-            lbl = status_labels.get(st2, "N/A")
-            kw  = {"ha": "center", "va": "bottom", "fontsize": 8}
-            if MATPLOTLIB_HINDI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_HINDI_FONT
+        bar_labels = [f"{val:.2f}\n{CHART_STATUS_LABELS.get(s, 'N/A')}"
+                      for val, s in zip(values, statuses)]
+        for bar, lbl in zip(bars, bar_labels):
             ax.text(bar.get_x() + bar.get_width() / 2,
-                    bar.get_height() + ymax * 0.02,
-                    f"{val:.2f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "properties_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
+                    bar.get_height() + ymax * 0.02, lbl, fontsize=8, **BAR_TEXT_KW)
+
+        fig.tight_layout()
+        return _chart_png(fig)
     except Exception as e:
         logging.error(f"Error in make_soil_properties_chart: {e}")
         return None
@@ -778,16 +833,40 @@ def make_soil_properties_chart(ph, sal_ec, oc_pct, cec, lst):
 # ─────────────────────────────────────────────
 #  Groq API — Hindi output
 # ─────────────────────────────────────────────
+# One client per server process (not per rerun) so the concurrent report
+# calls share a pool of keep-alive TLS connections to Groq.
+@st.cache_resource(show_spinner=False)
+def groq_client():
+    return OpenAI(
+        api_key=GROQ_API_KEY,
+        base_url="https://api.groq.com/openai/v1",
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+            timeout=30,
+        ),
+    )
+
+
+GROQ_CLIENT = groq_client()
+
+
+# Identical prompts (same field, same readings) reuse the previous answer for a
+# day. st.cache_data survives Streamlit reruns and does not cache exceptions,
+# so a failed request is retried next time.
+@st.cache_data(show_spinner=False, ttl=86400, max_entries=256)
+def _groq_completion(prompt: str) -> str:
+    response = GROQ_CLIENT.chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=700,
+        temperature=0.35,
+    )
+    return response.choices[0].message.content.strip()
+
+
 def call_groq(prompt: str) -> str:
     try:
-        client   = OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=700,
-            temperature=0.35,
-        )
-        return response.choices[0].message.content.strip()
+        return _groq_completion(prompt)
     except Exception as e:
         logging.error(f"Groq API error: {e}")
         return None
@@ -796,12 +875,14 @@ def call_groq(prompt: str) -> str:
 # ─────────────────────────────────────────────
 #  ReportLab Hindi style helper
 # ─────────────────────────────────────────────
+HFONT = "NotoDevanagari" if HINDI_FONT_REGISTERED else "Helvetica"
+
+
 def hindi_para_style(base_style, font_size=9, leading=14, alignment=None, color=None):
     """Create a ParagraphStyle that uses the Devanagari font if available."""
-    font = "NotoDevanagari" if HINDI_FONT_REGISTERED else "Helvetica"
     kwargs = dict(
         parent=base_style,
-        fontName=font,
+        fontName=HFONT,
         fontSize=font_size,
         leading=leading,
     )
@@ -812,24 +893,78 @@ def hindi_para_style(base_style, font_size=9, leading=14, alignment=None, color=
     return ParagraphStyle(f"Hindi_{font_size}_{id(base_style)}", **kwargs)
 
 
+# Like load_hindi_fonts, cache_resource keeps the report styles for the whole
+# server process instead of rebuilding them on every Streamlit rerun.
+@st.cache_resource(show_spinner=False)
+def load_report_styles():
+    sample = getSampleStyleSheet()
+    title = ParagraphStyle('HTitle',
+        parent=sample['Title'], fontName=HFONT, fontSize=18,
+        spaceAfter=16, alignment=TA_CENTER)
+    h2 = ParagraphStyle('HH2',
+        parent=sample['Heading2'], fontName=HFONT, fontSize=12,
+        spaceAfter=8, textColor=colors.darkgreen)
+    body   = hindi_para_style(sample['BodyText'], 9, 14)
+    small  = hindi_para_style(sample['BodyText'], 8, 12)
+    center = hindi_para_style(sample['BodyText'], 10, 14, alignment=TA_CENTER)
+
+    rating_table = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+        ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
+        ('FONTNAME',   (0, 0), (-1, -1), HFONT),
+        ('ALIGN',      (0, 0), (-1, -1), 'CENTER'),
+        ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTSIZE',   (0, 0), (-1, -1), 10),
+        ('BOX',        (0, 0), (-1, -1), 1, colors.black),
+    ])
+
+    # Shared by the parameter (section 3) and suggestion (section 6) tables;
+    # each report appends its status colour commands to a copy. Size and
+    # leading match SMALL_STYLE, so plain-string cells look like Paragraphs.
+    data_table_cmds = (
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+        ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
+        ('FONTNAME',   (0, 0), (-1, -1), HFONT),
+        ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
+        ('FONTSIZE',   (0, 0), (-1, -1), small.fontSize),
+        ('LEADING',    (0, 0), (-1, -1), small.leading),
+        ('BOX',        (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.94, 0.98, 0.94)]),
+    )
+    return title, h2, body, small, center, rating_table, data_table_cmds
+
+
+(TITLE_STYLE, H2_STYLE, BODY_STYLE, SMALL_STYLE, CENTER_STYLE,
+ RATING_TABLE_STYLE, DATA_TABLE_STYLE_CMDS) = load_report_styles()
+
+def bullet_block(text):
+    """One Paragraph for a multi-line LLM answer, lines joined with <br/>."""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return Paragraph("<br/>".join(lines), BODY_STYLE)
+
+
 # ─────────────────────────────────────────────
 #  PDF Report — Full Hindi
 # ─────────────────────────────────────────────
 def generate_report(params, location, date_range):
     try:
         REPORT_PARAMS = {k: v for k, v in params.items() if k not in ("EVI", "FVC")}
+        generated_at  = datetime.now()
+        header_stamp  = f"तैयार: {generated_at:%d %b %Y, %H:%M}"
 
         score, rating   = calculate_soil_health_score(REPORT_PARAMS)
-        interpretations = {p: generate_interpretation(p, v) for p, v in REPORT_PARAMS.items()}
 
-        nutrient_chart   = make_nutrient_chart(
-            params["Nitrogen"], params["Phosphorus"], params["Potassium"],
-            params["Calcium"],  params["Magnesium"],  params["Sulphur"]
-        )
-        vegetation_chart = make_vegetation_chart(params["NDVI"], params["NDWI"])
-        properties_chart = make_soil_properties_chart(
-            params["pH"], params["Salinity"], params["Organic Carbon"],
-            params["CEC"], params["LST"])
+        # One pass classifies every parameter for the rating and both tables
+        statuses    = {}
+        valid_count = good_count = 0
+        for p, v in REPORT_PARAMS.items():
+            statuses[p] = get_param_status(p, v)
+            if v is not None:
+                valid_count += 1
+                if statuses[p] == "good":
+                    good_count += 1
+        interpretations = {p: generate_interpretation(p, v) for p, v in REPORT_PARAMS.items()}
 
         def fmtv(param, v):
             if v is None:
@@ -858,8 +993,29 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
 भारतीय जलवायु के अनुसार उपयुक्त फसलें और सरल उर्वरक उपाय बताएं।
 प्रत्येक बिंदु एक बुलेट (•) से शुरू करें। कोई बोल्ड, कोई markdown नहीं। केवल हिंदी में उत्तर दें।"""
 
-        executive_summary = call_groq(exec_prompt) or "• सारांश उपलब्ध नहीं।"
-        recommendations   = call_groq(rec_prompt)  or "• सुझाव उपलब्ध नहीं।"
+        # Charts and Groq prompts are independent — run them all concurrently.
+        # Each chart owns its Figure/Agg canvas, so no pyplot state is shared.
+        pool = ThreadPoolExecutor(max_workers=5)
+        try:
+            nutrient_future   = pool.submit(
+                make_nutrient_chart,
+                params["Nitrogen"], params["Phosphorus"], params["Potassium"],
+                params["Calcium"],  params["Magnesium"],  params["Sulphur"]
+            )
+            vegetation_future = pool.submit(make_vegetation_chart, params["NDVI"], params["NDWI"])
+            properties_future = pool.submit(
+                make_soil_properties_chart,
+                params["pH"], params["Salinity"], params["Organic Carbon"],
+                params["CEC"], params["LST"])
+            exec_future = pool.submit(call_groq, exec_prompt)
+            rec_future  = pool.submit(call_groq, rec_prompt)
+            nutrient_chart    = nutrient_future.result()
+            vegetation_chart  = vegetation_future.result()
+            properties_chart  = properties_future.result()
+            executive_summary = exec_future.result() or "• सारांश उपलब्ध नहीं।"
+            recommendations   = rec_future.result()  or "• सुझाव उपलब्ध नहीं।"
+        finally:
+            pool.shutdown(wait=False)
 
         # ── PDF Build ──────────────────────────────────────────────────────
         pdf_buffer = BytesIO()
@@ -867,23 +1023,6 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                                 rightMargin=2*cm, leftMargin=2*cm,
                                 topMargin=3*cm,  bottomMargin=2*cm)
 
-        styles = getSampleStyleSheet()
-        HFONT  = "NotoDevanagari" if HINDI_FONT_REGISTERED else "Helvetica"
-
-        title_style = ParagraphStyle('HTitle',
-            parent=styles['Title'], fontName=HFONT, fontSize=18,
-            spaceAfter=16, alignment=TA_CENTER)
-        h2 = ParagraphStyle('HH2',
-            parent=styles['Heading2'], fontName=HFONT, fontSize=12,
-            spaceAfter=8, textColor=colors.darkgreen)
-        body = ParagraphStyle('HBody',
-            parent=styles['BodyText'], fontName=HFONT, fontSize=9, leading=14)
-        small = ParagraphStyle('HSmall',
-            parent=styles['BodyText'], fontName=HFONT, fontSize=8, leading=12)
-        center_body = ParagraphStyle('HCenter',
-            parent=styles['BodyText'], fontName=HFONT, fontSize=10,
-            leading=14, alignment=TA_CENTER)
-
         elements = []
 
         # ── Cover page ──────────────────────────────────────────────────────
@@ -893,44 +1032,46 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
             logo_img.hAlign = 'CENTER'
             elements.append(logo_img)
         elements.append(Spacer(1, 0.8*cm))
-        elements.append(Paragraph("FarmMatrix मिट्टी स्वास्थ्य रिपोर्ट", title_style))
+        elements.append(Paragraph("FarmMatrix मिट्टी स्वास्थ्य रिपोर्ट", TITLE_STYLE))
         elements.append(Spacer(1, 0.4*cm))
-        elements.append(Paragraph(f"<b>स्थान:</b> {location}", center_body))
-        elements.append(Paragraph(f"<b>तिथि सीमा:</b> {date_range}", center_body))
-        elements.append(Paragraph(f"<b>रिपोर्ट तैयार:</b> {datetime.now():%d %B %Y, %H:%M}", center_body))
+        elements.append(Paragraph(f"<b>स्थान:</b> {location}", CENTER_STYLE))
+        elements.append(Paragraph(f"<b>तिथि सीमा:</b> {date_range}", CENTER_STYLE))
+        elements.append(Paragraph(f"<b>रिपोर्ट तैयार:</b> {generated_at:%d %B %Y, %H:%M}", CENTER_STYLE))
         elements.append(PageBreak())
 
         # ── Section 1: Executive Summary ────────────────────────────────────
-        elements.append(Paragraph("1. संक्षिप्त सारांश", h2))
-        for line in executive_summary.split('\n'):
-            if line.strip():
-                elements.append(Paragraph(line.strip(), body))
+        elements.append(Paragraph("1. संक्षिप्त सारांश", H2_STYLE))
+        elements.append(bullet_block(executive_summary))
         elements.append(Spacer(1, 0.4*cm))
 
         # ── Section 2: Soil Health Score ────────────────────────────────────
-        elements.append(Paragraph("2. मिट्टी स्वास्थ्य रेटिंग", h2))
-        good_count  = sum(1 for p, v in REPORT_PARAMS.items() if get_param_status(p, v) == "good")
-        valid_count = len([v for v in REPORT_PARAMS.values() if v is not None])
+        elements.append(Paragraph("2. मिट्टी स्वास्थ्य रेटिंग", H2_STYLE))
         rating_data = [
             ["कुल स्कोर", "रेटिंग", "उचित स्तर पर पैरामीटर"],
             [f"{score:.1f}%", rating, f"{good_count} / {valid_count}"]
         ]
         rt = Table(rating_data, colWidths=[5*cm, 4*cm, 7*cm])
-        rt.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-            ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
-            ('FONTNAME',   (0, 0), (-1, -1), HFONT),
-            ('ALIGN',      (0, 0), (-1, -1), 'CENTER'),
-            ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
-            ('FONTSIZE',   (0, 0), (-1, -1), 10),
-            ('BOX',        (0, 0), (-1, -1), 1, colors.black),
-        ]))
+        rt.setStyle(RATING_TABLE_STYLE)
         elements.append(rt)
         elements.append(Spacer(1, 0.4*cm))
         elements.append(PageBreak())
 
+        # One Paragraph per distinct cell text; parameter names repeat across
+        # the section 3 and section 6 tables, which use the same column width.
+        # Single-word cells never wrap, so they stay plain strings drawn in the
+        # table's own font, which the data-table style sets to SMALL_STYLE's.
+        cell_paras = {}
+
+        def cell_para(text):
+            if " " not in text:
+                return text
+            para = cell_paras.get(text)
+            if para is None:
+                para = cell_paras[text] = Paragraph(text, SMALL_STYLE)
+            return para
+
         # ── Section 3: Parameter Table ───────────────────────────────────────
-        elements.append(Paragraph("3. मिट्टी पैरामीटर विश्लेषण (ICAR मानक)", h2))
+        elements.append(Paragraph("3. मिट्टी पैरामीटर विश्लेषण (ICAR मानक)", H2_STYLE))
         table_data = [["पैरामीटर", "मान", "ICAR आदर्श सीमा", "स्थिति", "व्याख्या"]]
 
         for param, value in REPORT_PARAMS.items():
@@ -940,63 +1081,43 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                 val_text = TEXTURE_CLASSES.get(value, "N/A") if value is not None else "N/A"
             else:
                 val_text = f"{value:.2f}{unit}" if value is not None else "N/A"
-            status   = get_param_status(param, value)
-            st_label = status_hindi(status)
+            st_label = status_hindi(statuses[param])
             table_data.append([
-                Paragraph(hindi_nm, small),
+                cell_para(hindi_nm),
                 val_text,
                 IDEAL_DISPLAY.get(param, "N/A"),
                 st_label,
-                Paragraph(interpretations[param], small)
+                cell_para(interpretations[param])
             ])
 
         tbl = Table(table_data, colWidths=[3*cm, 2.5*cm, 3*cm, 1.8*cm, 5.7*cm])
-        tbl_style = [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-            ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
-            ('FONTNAME',   (0, 0), (-1, -1), HFONT),
-            ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
-            ('FONTSIZE',   (0, 0), (-1, -1), 9),
-            ('BOX',        (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.94, 0.98, 0.94)]),
-        ]
-        for i, (param, value) in enumerate(REPORT_PARAMS.items(), start=1):
-            s = get_param_status(param, value)
-            c = (colors.Color(0.1, 0.55, 0.1) if s == "good" else
-                 colors.Color(0.85, 0.45, 0.0) if s == "low"  else
-                 colors.red if s == "high" else colors.grey)
-            tbl_style.append(('TEXTCOLOR', (3, i), (3, i), c))
-            tbl_style.append(('FONTNAME',  (3, i), (3, i), HFONT))
-        tbl.setStyle(TableStyle(tbl_style))
+        tbl.setStyle(TableStyle([*DATA_TABLE_STYLE_CMDS, *status_color_cmds(statuses.values(), 3)]))
         elements.append(tbl)
         elements.append(PageBreak())
 
         # ── Section 4: Charts ────────────────────────────────────────────────
-        elements.append(Paragraph("4. चार्ट और ग्राफ", h2))
-        for lbl, path in [
+        elements.append(Paragraph("4. चार्ट और ग्राफ", H2_STYLE))
+        for lbl, chart in [
             ("पोषक तत्व स्तर — नाइट्रोजन, फास्फोरस, पोटेशियम, कैल्शियम, मैग्नीशियम, सल्फर (kg/हेक्टेयर)", nutrient_chart),
             ("वनस्पति और जल सूचकांक (NDVI, NDWI)",          vegetation_chart),
             ("मिट्टी के गुण",                                properties_chart),
         ]:
-            if path:
-                elements.append(Paragraph(lbl + ":", body))
-                elements.append(Image(path, width=13*cm, height=6.5*cm))
+            if chart:
+                elements.append(Paragraph(lbl + ":", BODY_STYLE))
+                elements.append(Image(chart, width=CHART_WIDTH_CM*cm, height=CHART_HEIGHT_CM*cm))
                 elements.append(Spacer(1, 0.3*cm))
         elements.append(PageBreak())
 
         # ── Section 5: Crop Recommendations ─────────────────────────────────
-        elements.append(Paragraph("5. फसल सुझाव और उपचार", h2))
-        for line in recommendations.split('\n'):
-            if line.strip():
-                elements.append(Paragraph(line.strip(), body))
+        elements.append(Paragraph("5. फसल सुझाव और उपचार", H2_STYLE))
+        elements.append(bullet_block(recommendations))
         elements.append(Spacer(1, 0.5*cm))
         elements.append(PageBreak())
 
         # ── Section 6: Parameter-wise Suggestions ───────────────────────────
-        elements.append(Paragraph("6. पैरामीटर-वार सुझाव", h2))
+        elements.append(Paragraph("6. पैरामीटर-वार सुझाव", H2_STYLE))
         elements.append(Paragraph(
-            "प्रत्येक पैरामीटर के लिए: अच्छे स्तर को बनाए रखने या समस्या ठीक करने के उपाय।", small))
+            "प्रत्येक पैरामीटर के लिए: अच्छे स्तर को बनाए रखने या समस्या ठीक करने के उपाय।", SMALL_STYLE))
         elements.append(Spacer(1, 0.3*cm))
 
         SUGGESTION_PARAMS = [
@@ -1005,39 +1126,21 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
             "Calcium", "Magnesium", "Sulphur",
             "NDVI", "NDWI", "LST"
         ]
-        sug_data = [["पैरामीटर", "स्थिति", "आवश्यक कार्रवाई"]]
-        for param in SUGGESTION_PARAMS:
+        sug_data     = [["पैरामीटर", "स्थिति", "आवश्यक कार्रवाई"]]
+        sug_statuses = [statuses.get(p, "na") for p in SUGGESTION_PARAMS]
+        for param, status in zip(SUGGESTION_PARAMS, sug_statuses):
             value    = params.get(param)
-            status   = get_param_status(param, value)
             st_label = status_hindi(status)
             sug_text = get_suggestion(param, value)
             hindi_nm = PARAM_HINDI.get(param, param)
             sug_data.append([
-                Paragraph(hindi_nm, small),
+                cell_para(hindi_nm),
                 st_label,
-                Paragraph(sug_text, small)
+                cell_para(sug_text)
             ])
 
         sug_tbl = Table(sug_data, colWidths=[3*cm, 2*cm, 11*cm])
-        sug_style_list = [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-            ('TEXTCOLOR',  (0, 0), (-1, 0), colors.white),
-            ('FONTNAME',   (0, 0), (-1, -1), HFONT),
-            ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
-            ('FONTSIZE',   (0, 0), (-1, -1), 9),
-            ('BOX',        (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.94, 0.98, 0.94)]),
-        ]
-        for i, param in enumerate(SUGGESTION_PARAMS, start=1):
-            value = params.get(param)
-            s     = get_param_status(param, value)
-            c     = (colors.Color(0.1, 0.55, 0.1) if s == "good" else
-                     colors.Color(0.85, 0.45, 0.0) if s == "low"  else
-                     colors.red if s == "high" else colors.grey)
-            sug_style_list.append(('TEXTCOLOR', (1, i), (1, i), c))
-            sug_style_list.append(('FONTNAME',  (1, i), (1, i), HFONT))
-        sug_tbl.setStyle(TableStyle(sug_style_list))
+        sug_tbl.setStyle(TableStyle([*DATA_TABLE_STYLE_CMDS, *status_color_cmds(sug_statuses, 1)]))
         elements.append(sug_tbl)
 
         # ── Header / Footer ──────────────────────────────────────────────────
@@ -1051,8 +1154,7 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                 canv.setFont("Helvetica-Bold", 11)
             canv.drawString(4.5*cm, A4[1] - 2.2*cm, "FarmMatrix मिट्टी स्वास्थ्य रिपोर्ट")
             canv.setFont("Helvetica", 8)
-            canv.drawRightString(A4[0] - 2*cm, A4[1] - 2.2*cm,
-                                 f"तैयार: {datetime.now():%d %b %Y, %H:%M}")
+            canv.drawRightString(A4[0] - 2*cm, A4[1] - 2.2*cm, header_stamp)
             canv.setStrokeColor(colors.darkgreen)
             canv.setLineWidth(1)
             canv.line(2*cm, A4[1] - 3*cm, A4[0] - 2*cm, A4[1] - 3*cm)
@@ -1070,10 +1172,11 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                                    f"पृष्ठ {doc.page}  |  FarmMatrix मिट्टी स्वास्थ्य रिपोर्ट  |  ICAR मानक इकाइयाँ")
             canv.restoreState()
 
-        doc.build(elements,
-                  onFirstPage=lambda c, d: (add_header(c, d), add_footer(c, d)),
-                  onLaterPages=lambda c, d: (add_header(c, d), add_footer(c, d)),
-                  canvasmaker=canvas.Canvas)
+        def decorate_page(canv, doc):
+            add_header(canv, doc)
+            add_footer(canv, doc)
+
+        doc.build(elements, onFirstPage=decorate_page, onLaterPages=decorate_page)
         pdf_buffer.seek(0)
         return pdf_buffer.getvalue()
 
@@ -1123,7 +1226,8 @@ if map_data and "last_active_drawing" in map_data:
     try:
         sel = map_data["last_active_drawing"]
         if sel and "geometry" in sel and "coordinates" in sel["geometry"]:
-            region = ee.Geometry.Polygon(sel["geometry"]["coordinates"])
+            coords = sel["geometry"]["coordinates"]
+            region = ee.Geometry.Polygon(coords)
         else:
             st.error("अमान्य क्षेत्र। कृपया एक वैध पॉलीगन बनाएँ।")
     except Exception as e:
@@ -1135,31 +1239,44 @@ if region:
     progress_bar = st.progress(0)
     status_msg   = st.empty()
 
+    ee_errors = []
+
+    def ee_fetch(label, fetch, *args):
+        try:
+            return fetch(*args)
+        except Exception as e:
+            logging.error(f"{fetch.__name__}: {e}")
+            ee_errors.append(label)
+            return None
+
     status_msg.text("Sentinel-2 उपग्रह छवि प्राप्त हो रही है...")
-    comp = sentinel_composite(region, start_date, end_date, ALL_BANDS)
+    bs = ee_fetch("Sentinel-2", fetch_sentinel_inputs, coords, start_date, end_date)
+    cec_indices = ee_fetch("CEC", fetch_cec_indices, coords, start_date, end_date) if bs is not None else None
     progress_bar.progress(20)
 
     status_msg.text("मिट्टी की बनावट मानचित्र पढ़ा जा रहा है...")
-    texc = get_soil_texture(region)
+    texc = ee_fetch("मिट्टी की बनावट", fetch_soil_texture, coords)
     progress_bar.progress(35)
 
     status_msg.text("MODIS भूमि सतह तापमान (LST) प्राप्त हो रहा है...")
-    lst = get_lst(region, start_date, end_date)
+    lst = ee_fetch("LST", fetch_lst, coords, start_date, end_date)
     progress_bar.progress(50)
 
-    if comp is None:
-        st.warning("Sentinel-2 डेटा नहीं मिला। कृपया तिथि सीमा बढ़ाएँ।")
+    if ee_errors:
+        st.error(f"Earth Engine त्रुटि ({', '.join(ee_errors)}): ये मान प्राप्त नहीं हो सके। "
+                 "कृपया थोड़ी देर बाद पुनः प्रयास करें।")
+
+    if bs is None:
+        if "Sentinel-2" not in ee_errors:
+            st.warning("Sentinel-2 डेटा नहीं मिला। कृपया तिथि सीमा बढ़ाएँ।")
         ph = sal = oc = cec = ndwi = ndvi = evi = fvc = n_val = p_val = k_val = None
         ca_val = mg_val = s_val = None
     else:
-        status_msg.text("बैंड आँकड़े गणना हो रहे हैं...")
-        bs = get_band_stats(comp, region)
-
         status_msg.text("मिट्टी पैरामीटर गणना हो रहे हैं (ICAR मानक)...")
         ph    = get_ph_new(bs)
         sal   = get_salinity_ec(bs)
         oc    = get_organic_carbon_pct(bs)
-        cec   = estimate_cec(comp, region, cec_intercept, cec_slope_clay, cec_slope_om)
+        cec   = estimate_cec(cec_indices, cec_intercept, cec_slope_clay, cec_slope_om)
         ndwi  = get_ndwi(bs)
         ndvi  = get_ndvi(bs)
         evi   = get_evi(bs)
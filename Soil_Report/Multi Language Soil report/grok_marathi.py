@@ -1,6 +1,12 @@
 import logging
+import math
 import os
+import re
+import sys
+import time
+from dataclasses import dataclass
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 import streamlit as st
 import folium
@@ -8,8 +14,10 @@ from streamlit_folium import st_folium
 import ee
 import pandas as pd
 from folium.plugins import Draw
-import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image as PILImage, ImageDraw, ImageFont
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import cm
@@ -22,6 +30,7 @@ from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 
 # ─────────────────────────────────────────────
@@ -29,25 +38,29 @@ from openai import OpenAI
 # ─────────────────────────────────────────────
 GROQ_API_KEY  = "grok-api"
 GROQ_MODEL    = "llama-3.3-70b-versatile"
+GROQ_TIMEOUT_S = 30.0
 LOGO_PATH     = os.path.abspath("LOGO.jpg")
 MARATHI_FONT  = os.path.abspath("NotoSerifDevanagari-Regular.ttf")
+LOGO_AVAILABLE = os.path.exists(LOGO_PATH)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# ── Register Marathi/Devanagari font for ReportLab ────────────────────────────
-if os.path.exists(MARATHI_FONT):
+# ── Register Marathi/Devanagari font for ReportLab and Matplotlib ─────────────
+# Streamlit re-executes this script on every widget change; cache_resource
+# keeps the TTF parsing and the FontProperties lookup to once per process.
+@st.cache_resource(show_spinner=False)
+def load_marathi_fonts():
+    if not os.path.exists(MARATHI_FONT):
+        logging.warning("NotoSerifDevanagari-Regular.ttf not found. Marathi text may not render.")
+        return False, None
     pdfmetrics.registerFont(TTFont("NotoDevanagari", MARATHI_FONT))
-    MARATHI_FONT_REGISTERED = True
-else:
-    MARATHI_FONT_REGISTERED = False
-    logging.warning("NotoSerifDevanagari-Regular.ttf not found. Marathi text may not render.")
-
-# ── Register font for Matplotlib ──────────────────────────────────────────────
-if os.path.exists(MARATHI_FONT):
     fm.fontManager.addfont(MARATHI_FONT)
-    MATPLOTLIB_MARATHI_FONT = fm.FontProperties(fname=MARATHI_FONT)
-else:
-    MATPLOTLIB_MARATHI_FONT = None
+    props = fm.FontProperties(fname=MARATHI_FONT)
+    fm.findfont(props)  # resolve once so chart text skips the font-cache lookup
+    return True, props
+
+
+MARATHI_FONT_REGISTERED, MATPLOTLIB_MARATHI_FONT = load_marathi_fonts()
 
 # ─────────────────────────────────────────────
 #  Google Earth Engine init
@@ -78,72 +91,6 @@ TEXTURE_CLASSES = {
     12: "वाळू (Sand)",
 }
 
-IDEAL_RANGES = {
-    "pH":             (6.5, 7.5),
-    "Soil Texture":   7,
-    "Salinity":       (None, 1.0),
-    "Organic Carbon": (0.75, 1.50),
-    "CEC":            (10, 30),
-    "LST":            (15, 35),
-    "NDVI":           (0.2, 0.8),
-    "EVI":            (0.2, 0.8),
-    "FVC":            (0.3, 0.8),
-    "NDWI":           (-0.3, 0.2),
-    "Nitrogen":       (280, 560),
-    "Phosphorus":     (11, 22),
-    "Potassium":      (108, 280),
-    "Calcium":        (400, 800),
-    "Magnesium":      (50, 200),
-    "Sulphur":        (10, 40),
-}
-
-# Internal English keys → Marathi display names
-PARAM_MARATHI = {
-    "pH":             "pH",
-    "Salinity":       "क्षारता",
-    "Organic Carbon": "सेंद्रिय कार्बन",
-    "CEC":            "CEC",
-    "Soil Texture":   "मातीचा पोत",
-    "LST":            "LST",
-    "NDWI":           "NDWI",
-    "NDVI":           "NDVI",
-    "EVI":            "EVI",
-    "FVC":            "FVC",
-    "Nitrogen":       "नत्र (नायट्रोजन)",
-    "Phosphorus":     "स्फुरद (फॉस्फरस)",
-    "Potassium":      "पालाश (पोटॅशियम)",
-    "Calcium":        "कॅल्शियम",
-    "Magnesium":      "मॅग्नेशियम",
-    "Sulphur":        "गंधक (सल्फर)",
-}
-
-IDEAL_DISPLAY = {
-    "pH":             "6.5–7.5",
-    "Salinity":       "<=1.0 mS/cm",
-    "Organic Carbon": "0.75–1.50 %",
-    "CEC":            "10–30 cmol/kg",
-    "Soil Texture":   "दुमट (Loam)",
-    "LST":            "15–35 °C",
-    "NDWI":           "-0.3–0.2",
-    "NDVI":           "0.2–0.8",
-    "EVI":            "0.2–0.8",
-    "FVC":            "0.3–0.8",
-    "Nitrogen":       "280–560 kg/ha",
-    "Phosphorus":     "11–22 kg/ha",
-    "Potassium":      "108–280 kg/ha",
-    "Calcium":        "400–800 kg/ha",
-    "Magnesium":      "50–200 kg/ha",
-    "Sulphur":        "10–40 kg/ha",
-}
-
-UNIT_MAP = {
-    "pH": "", "Salinity": " mS/cm", "Organic Carbon": " %",
-    "CEC": " cmol/kg", "Soil Texture": "", "LST": " °C",
-    "NDWI": "", "NDVI": "", "EVI": "", "FVC": "",
-    "Nitrogen": " kg/ha", "Phosphorus": " kg/ha", "Potassium": " kg/ha",
-    "Calcium": " kg/ha", "Magnesium": " kg/ha", "Sulphur": " kg/ha",
-}
-
 # ── Marathi suggestions ───────────────────────────────────────────────────────
 SUGGESTIONS = {
     "pH": {
@@ -222,106 +169,168 @@ SUGGESTIONS = {
     },
 }
 
+# ── Per-parameter metadata ───────────────────────────────────────────────────
+@dataclass(slots=True, frozen=True)
+class ParamMeta:
+    marathi: str        # Marathi display name
+    display: str        # ICAR ideal range as shown in the report
+    unit: str
+    range: object       # (min, max) with None for an open end; texture class id
+    suggestions: dict   # status → text, with the fallbacks already resolved
+
+
+def _resolve_suggestions(s):
+    # A parameter without its own "low"/"high" advice borrows the opposite
+    # one, so every status has an entry to look up.
+    if not s:
+        return {}
+    fallback = "कृषी तज्ज्ञाचा सल्ला घ्या."
+    return {
+        "good": s.get("good", "सध्याची पद्धत सुरू ठेवा."),
+        "low":  s.get("low",  s.get("high", fallback)),
+        "high": s.get("high", s.get("low",  fallback)),
+    }
+
+
+PARAM_META = {
+    key: ParamMeta(marathi, display, unit, rng, _resolve_suggestions(SUGGESTIONS.get(key)))
+    for key, (marathi, display, unit, rng) in {
+        "pH":             ("pH",               "6.5–7.5",       "",         (6.5, 7.5)),
+        "Salinity":       ("क्षारता",            "<=1.0 mS/cm",   " mS/cm",   (None, 1.0)),
+        "Organic Carbon": ("सेंद्रिय कार्बन",      "0.75–1.50 %",   " %",       (0.75, 1.50)),
+        "CEC":            ("CEC",              "10–30 cmol/kg", " cmol/kg", (10, 30)),
+        "Soil Texture":   ("मातीचा पोत",         "दुमट (Loam)",    "",         7),
+        "LST":            ("LST",              "15–35 °C",      " °C",      (15, 35)),
+        "NDWI":           ("NDWI",             "-0.3–0.2",      "",         (-0.3, 0.2)),
+        "NDVI":           ("NDVI",             "0.2–0.8",       "",         (0.2, 0.8)),
+        "EVI":            ("EVI",              "0.2–0.8",       "",         (0.2, 0.8)),
+        "FVC":            ("FVC",              "0.3–0.8",       "",         (0.3, 0.8)),
+        "Nitrogen":       ("नत्र (नायट्रोजन)",     "280–560 kg/ha", " kg/ha",   (280, 560)),
+        "Phosphorus":     ("स्फुरद (फॉस्फरस)",    "11–22 kg/ha",   " kg/ha",   (11, 22)),
+        "Potassium":      ("पालाश (पोटॅशियम)",    "108–280 kg/ha", " kg/ha",   (108, 280)),
+        "Calcium":        ("कॅल्शियम",           "400–800 kg/ha", " kg/ha",   (400, 800)),
+        "Magnesium":      ("मॅग्नेशियम",          "50–200 kg/ha",  " kg/ha",   (50, 200)),
+        "Sulphur":        ("गंधक (सल्फर)",       "10–40 kg/ha",   " kg/ha",   (10, 40)),
+    }.items()
+}
+
+# Report-ready suggestion per (param, status), prefixed and interned once at
+# import so the report's suggestion table is one lookup per row with no string
+# concatenation.
+SUGGESTION_TEXT = {
+    (key, status): sys.intern(("ठीक आहे: " if status == "good" else "सुधारणा करा: ") + text)
+    for key, meta in PARAM_META.items()
+    for status, text in meta.suggestions.items()
+}
+
 ALL_BANDS = ["B2", "B3", "B4", "B5", "B6", "B7", "B8", "B8A", "B11", "B12"]
 
 # ─────────────────────────────────────────────
 #  Utility helpers
 # ─────────────────────────────────────────────
-def safe_get_info(computed_obj, name="value"):
-    if computed_obj is None:
-        return None
-    try:
-        info = computed_obj.getInfo()
-        return float(info) if info is not None else None
-    except Exception as e:
-        logging.warning(f"Failed to fetch {name}: {e}")
-        return None
+def as_float(v):
+    return float(v) if v is not None else None
+
+
+def safe_div(num, den):
+    # Exact 0 when a band sum is 0 (masked/shadow pixels) instead of biasing
+    # every ratio with a +1e-6 epsilon in the denominator.
+    return num / den if den else 0.0
+
+
+# Scene Classification (SCL) classes kept per pixel: vegetation, bare soil,
+# water, unclassified and snow. Cloud, shadow, cirrus and defective pixels drop.
+SCL_CLEAR_CLASSES = [4, 5, 6, 7, 11]
+COMPOSITE_FALLBACK_DAYS = 20
+# Loose tile-level prefilter: drops scenes too clouded to be worth masking
+COMPOSITE_MAX_TILE_CLOUD = 60
+
+
+def mask_scl(img):
+    keep = img.select("SCL").remap(SCL_CLEAR_CLASSES, [1] * len(SCL_CLEAR_CLASSES), 0)
+    return img.updateMask(keep)
 
 
 def sentinel_composite(region, start, end, bands):
-    start_str = start.strftime("%Y-%m-%d")
-    end_str   = end.strftime("%Y-%m-%d")
-    try:
-        coll = (
+    """Lazy median composite of SCL cloud-masked Sentinel-2 pixels.
+
+    Masking per pixel makes most scenes usable, so only a loose tile-level
+    cloud filter remains. Pixels the requested window leaves masked (its
+    scenes are clouded over the field) are filled from the ±20-day window,
+    as is the whole composite when the requested window has no scene. This
+    is resolved server-side; the image evaluates to null when neither window
+    has imagery, and pixels masked in both give null band means, which
+    fetch_ee_inputs treats as missing.
+    """
+    def masked(sd, ed):
+        return (
             ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-            .filterDate(start_str, end_str)
+            .filterDate(sd.strftime("%Y-%m-%d"), ed.strftime("%Y-%m-%d"))
             .filterBounds(region)
-            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
+            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", COMPOSITE_MAX_TILE_CLOUD))
+            .select(bands + ["SCL"])
+            .map(mask_scl)
             .select(bands)
         )
-        if coll.size().getInfo() > 0:
-            return coll.median().multiply(0.0001)
-        for days in range(5, 31, 5):
-            sd = (start - timedelta(days=days)).strftime("%Y-%m-%d")
-            ed = (end   + timedelta(days=days)).strftime("%Y-%m-%d")
-            coll = (
-                ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-                .filterDate(sd, ed)
-                .filterBounds(region)
-                .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 30))
-                .select(bands)
-            )
-            if coll.size().getInfo() > 0:
-                logging.info(f"Sentinel window expanded to {sd} to {ed}")
-                return coll.median().multiply(0.0001)
-        logging.warning("No Sentinel-2 data available.")
-        return None
-    except Exception as e:
-        logging.error(f"Error in sentinel_composite: {e}")
-        return None
 
+    pad      = timedelta(days=COMPOSITE_FALLBACK_DAYS)
+    primary  = masked(start, end)
+    fallback = masked(start - pad, end + pad)
+    comp = ee.Algorithms.If(
+        primary.size().gt(0),
+        primary.median().unmask(fallback.median()).multiply(0.0001),
+        ee.Algorithms.If(fallback.size().gt(0), fallback.median().multiply(0.0001), None),
+    )
+    return ee.Image(comp)
 
-def get_band_stats(comp, region, scale=10):
-    try:
-        stats = comp.reduceRegion(
-            reducer=ee.Reducer.mean(), geometry=region,
-            scale=scale, maxPixels=1e13
-        ).getInfo()
-        return {k: (float(v) if v is not None else 0.0) for k, v in stats.items()}
-    except Exception as e:
-        logging.error(f"Error in get_band_stats: {e}")
-        return {}
+
+# The band_means / lst_mean / texture_mode / cec_index_means builders below
+# only describe server-side reductions; fetch_ee_inputs evaluates all of
+# them together in a single getInfo() round-trip.
+def target_scale(region):
+    """Reduction scale giving ~40 samples across the field, never below 10 m.
+
+    The soil formulas (get_ph_new etc.) only consume field-wide band means,
+    not per-pixel values, so a coarser grid on large fields returns the same
+    mean for a fraction of the pixel reads (EE cost grows as 1/scale²).
+    """
+    return region.area(maxError=1).sqrt().divide(40).max(10)
+
+
+def band_means(comp, region, scale=10):
+    return comp.reduceRegion(
+        reducer=ee.Reducer.mean(), geometry=region,
+        scale=scale, maxPixels=1e13
+    )
 
 
 # ─────────────────────────────────────────────
 #  LST
 # ─────────────────────────────────────────────
-def get_lst(region, start, end):
+def lst_mean(region, start, end):
     end_dt    = end
     start_dt  = end_dt - relativedelta(months=1)
     start_str = start_dt.strftime("%Y-%m-%d")
     end_str   = end_dt.strftime("%Y-%m-%d")
-    try:
-        coll = (
-            ee.ImageCollection("MODIS/061/MOD11A2")
-            .filterBounds(region.buffer(5000))
-            .filterDate(start_str, end_str)
-            .select("LST_Day_1km")
-        )
-        if coll.size().getInfo() == 0:
-            return None
-        img   = coll.median().multiply(0.02).subtract(273.15).rename("lst").clip(region.buffer(5000))
-        stats = img.reduceRegion(reducer=ee.Reducer.mean(), geometry=region, scale=1000, maxPixels=1e13).getInfo()
-        val   = stats.get("lst")
-        return float(val) if val is not None else None
-    except Exception as e:
-        logging.error(f"Error in get_lst: {e}")
-        return None
+    coll = (
+        ee.ImageCollection("MODIS/061/MOD11A2")
+        .filterBounds(region.buffer(5000))
+        .filterDate(start_str, end_str)
+        .select("LST_Day_1km")
+    )
+    img   = coll.median().multiply(0.02).subtract(273.15).rename("lst").clip(region.buffer(5000))
+    stats = img.reduceRegion(reducer=ee.Reducer.mean(), geometry=region, scale=1000, maxPixels=1e13)
+    # Empty-collection check happens server-side; null means no MODIS data
+    return ee.Algorithms.If(coll.size().gt(0), stats, None)
 
 
 # ─────────────────────────────────────────────
 #  Soil Texture
 # ─────────────────────────────────────────────
-def get_soil_texture(region):
-    try:
-        mode = SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
-            ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13
-        ).get("b0")
-        val = safe_get_info(mode, "texture")
-        return int(val) if val is not None else None
-    except Exception as e:
-        logging.error(f"Error in get_soil_texture: {e}")
-        return None
+def texture_mode(region):
+    return SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
+        ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13
+    )
 
 
 # ─────────────────────────────────────────────
@@ -335,9 +344,9 @@ def get_ph_new(bs):
         b5  = bs.get("B5",  0.0)
         b8  = bs.get("B8",  0.0)
         b11 = bs.get("B11", 0.0)
-        ndvi_re_avg = ((b8 - b5) / (b8 + b5 + 1e-6) + (b8 - b4) / (b8 + b4 + 1e-6)) / 2.0
-        swir_ratio  = b11 / (b8 + 1e-6)
-        nir_ratio   = b8  / (b4 + 1e-6)
+        ndvi_re_avg = (safe_div(b8 - b5, b8 + b5) + safe_div(b8 - b4, b8 + b4)) / 2.0
+        swir_ratio  = safe_div(b11, b8)
+        nir_ratio   = safe_div(b8, b4)
         brightness  = (b2 + b3 + b4) / 3.0
         pH_est = (6.5 + 1.2 * ndvi_re_avg + 0.8 * swir_ratio
                   - 0.5 * nir_ratio + 0.15 * (1.0 - brightness))
@@ -359,10 +368,10 @@ def get_organic_carbon_pct(bs):
         b8  = bs.get("B8",  0.0)
         b11 = bs.get("B11", 0.0)
         b12 = bs.get("B12", 0.0)
-        ndvi_re_avg = ((b8 - b5) / (b8 + b5 + 1e-6) + (b8 - b4) / (b8 + b4 + 1e-6)) / 2.0
+        ndvi_re_avg = (safe_div(b8 - b5, b8 + b5) + safe_div(b8 - b4, b8 + b4)) / 2.0
         L    = 0.5
-        savi = ((b8 - b4) / (b8 + b4 + L + 1e-6)) * (1 + L)
-        evi  = 2.5 * (b8 - b4) / (b8 + 6 * b4 - 7.5 * b2 + 1 + 1e-6)
+        savi = safe_div(b8 - b4, b8 + b4 + L) * (1 + L)
+        evi  = 2.5 * safe_div(b8 - b4, b8 + 6 * b4 - 7.5 * b2 + 1)
         swir_avg = (b11 + b12) / 2.0
         oc_pct = 1.2 + 3.5 * ndvi_re_avg + 2.2 * savi - 1.5 * swir_avg + 0.4 * evi
         return max(0.1, min(5.0, oc_pct))
@@ -374,21 +383,14 @@ def get_organic_carbon_pct(bs):
 # ─────────────────────────────────────────────
 #  Salinity
 # ─────────────────────────────────────────────
-def get_salinity_ec(bs):
+def get_salinity_ec(bs, idx):
     try:
         b2  = bs.get("B2",  0.0)
         b3  = bs.get("B3",  0.0)
         b4  = bs.get("B4",  0.0)
-        b8  = bs.get("B8",  0.0)
-        b11 = bs.get("B11", 0.0)
-        b12 = bs.get("B12", 0.0)
-        ndvi              = (b8 - b4) / (b8 + b4 + 1e-6)
         brightness        = (b2 + b3 + b4) / 3.0
-        si1               = (b3 * b4) ** 0.5
-        si2               = (b3 ** 2 + b4 ** 2) ** 0.5 if (b3 ** 2 + b4 ** 2) > 0 else 0.0
-        si_combined       = (si1 + si2) / 2.0
-        vegetation_stress = 1.0 - max(0.0, min(1.0, ndvi))
-        ec = 0.5 + abs(si_combined) * 4.0 + vegetation_stress * 2.0 + 0.3 * (1.0 - brightness)
+        vegetation_stress = 1.0 - max(0.0, min(1.0, idx.ndvi))
+        ec = 0.5 + idx.si * 4.0 + vegetation_stress * 2.0 + 0.3 * (1.0 - brightness)
         return max(0.0, min(16.0, ec))
     except Exception as e:
         logging.error(f"Error in get_salinity_ec: {e}")
@@ -398,48 +400,137 @@ def get_salinity_ec(bs):
 # ─────────────────────────────────────────────
 #  CEC
 # ─────────────────────────────────────────────
-def estimate_cec(comp, region, intercept, slope_clay, slope_om):
-    if comp is None:
-        return None
-    try:
-        clay = comp.expression("(B11-B8)/(B11+B8+1e-6)",
-                               {"B11": comp.select("B11"), "B8": comp.select("B8")}).rename("clay")
-        om   = comp.expression("(B8-B4)/(B8+B4+1e-6)",
-                               {"B8": comp.select("B8"), "B4": comp.select("B4")}).rename("om")
-        c_m = safe_get_info(clay.reduceRegion(ee.Reducer.mean(), geometry=region, scale=20, maxPixels=1e13).get("clay"), "clay")
-        o_m = safe_get_info(om.reduceRegion(ee.Reducer.mean(),   geometry=region, scale=20, maxPixels=1e13).get("om"),   "om")
-        if c_m is None or o_m is None:
-            return None
-        return intercept + slope_clay * c_m + slope_om * o_m
-    except Exception as e:
-        logging.error(f"Error in estimate_cec: {e}")
+def cec_index_means(comp, region, scale=20):
+    # Both indices come from one 2-band expression, so B4/B8/B11 are read and
+    # reduced in a single pass: {"clay": ..., "om": ...}
+    idx = comp.expression(
+        "[(B11-B8)/(B11+B8+1e-6), (B8-B4)/(B8+B4+1e-6)]",
+        {"B4": comp.select("B4"), "B8": comp.select("B8"), "B11": comp.select("B11")},
+    ).rename(["clay", "om"])
+    return idx.reduceRegion(ee.Reducer.mean(), geometry=region, scale=scale, maxPixels=1e13)
+
+
+def estimate_cec(clay_mean, om_mean, intercept, slope_clay, slope_om):
+    if clay_mean is None or om_mean is None:
         return None
+    return intercept + slope_clay * clay_mean + slope_om * om_mean
 
 
 # ─────────────────────────────────────────────
-#  Vegetation indices
+#  Batched Earth Engine evaluation
 # ─────────────────────────────────────────────
-def get_ndvi(bs):
-    b8, b4 = bs.get("B8", 0.0), bs.get("B4", 0.0)
-    return (b8 - b4) / (b8 + b4 + 1e-6)
+# Keyed on the polygon's GeoJSON coordinates and the date range, so redrawing
+# or revisiting the same field skips Earth Engine entirely. Only the plain
+# getInfo() result is cached (EE objects are not picklable); errors propagate
+# out of the cached function, so a failed fetch is retried on the next run.
+# Sentinel-2 archives are appended to, not edited, hence the week-long TTL.
+def _ee_batch(coords, start, end):
+    region = ee.Geometry.Polygon(coords)
+    comp   = sentinel_composite(region, start, end, ALL_BANDS)
+    scale  = target_scale(region)
+    return {
+        "lst":     lst_mean(region, start, end),
+        "texture": texture_mode(region),
+        # A null composite (no Sentinel-2 scenes) yields null bands/cec
+        "bands":   ee.Algorithms.If(comp, band_means(comp, region, scale), None),
+        "cec":     ee.Algorithms.If(comp, cec_index_means(comp, region, scale.max(20)), None),
+    }
 
-def get_evi(bs):
-    b8, b4, b2 = bs.get("B8", 0.0), bs.get("B4", 0.0), bs.get("B2", 0.0)
-    return 2.5 * (b8 - b4) / (b8 + 6 * b4 - 7.5 * b2 + 1 + 1e-6)
 
-def get_fvc(bs):
-    ndvi = get_ndvi(bs)
-    return max(0.0, min(1.0, ((ndvi - 0.2) / (0.8 - 0.2)) ** 2))
+@st.cache_data(show_spinner=False, ttl=7 * 24 * 3600, max_entries=128)
+def _ee_inputs_info(coords, start, end):
+    return ee.Dictionary(_ee_batch(coords, start, end)).getInfo()
+
+
+# One input on its own, used only when the combined batch keeps failing, so a
+# broken LST or texture reduction does not take the band means down with it.
+@st.cache_data(show_spinner=False, ttl=7 * 24 * 3600, max_entries=512)
+def _ee_input_info(coords, start, end, key):
+    return _ee_batch(coords, start, end)[key].getInfo()
+
+
+EE_FETCH_ATTEMPTS = 3
+EE_INPUT_KEYS     = ("bands", "cec", "lst", "texture")
+
+
+def fetch_ee_inputs(coords, start, end):
+    """Band means, CEC indices, LST and texture from one (cached) getInfo().
+
+    Earth Engine errors (quota 429s, 503s, aggregation timeouts) are retried
+    with exponential backoff. If the batch still fails, or fails with any
+    other error (connection, timeout, auth), each input is fetched on its
+    own; inputs that fail even then are listed under "errors".
+    """
+    info, errors = None, []
+    for attempt in range(1, EE_FETCH_ATTEMPTS + 1):
+        try:
+            info = _ee_inputs_info(coords, start, end) or {}
+            break
+        except ee.EEException as e:
+            logging.warning(f"Earth Engine fetch failed (attempt {attempt}/{EE_FETCH_ATTEMPTS}): {e}")
+            if attempt < EE_FETCH_ATTEMPTS:
+                time.sleep(2 ** attempt)
+        except Exception as e:
+            logging.warning(f"Earth Engine fetch failed: {e}")
+            break
+    if info is None:
+        info = {}
+        for key in EE_INPUT_KEYS:
+            try:
+                info[key] = _ee_input_info(coords, start, end, key)
+            except Exception as e:
+                logging.error(f"Earth Engine {key} fetch failed: {e}")
+                errors.append(key)
+
+    bands   = info.get("bands")
+    if bands is not None and any(v is None for v in bands.values()):
+        # Every pixel masked (cloud/shadow): missing data, not zero reflectance
+        logging.warning("Sentinel-2 composite fully masked over the field")
+        bands = None
+    cec     = info.get("cec") or {}
+    texture = (info.get("texture") or {}).get("b0")
+    return {
+        "bands":   ({k: float(v) for k, v in bands.items()} if bands is not None else None),
+        "clay":    as_float(cec.get("clay")),
+        "om":      as_float(cec.get("om")),
+        "lst":     as_float((info.get("lst") or {}).get("lst")),
+        "texture": int(texture) if texture is not None else None,
+        "errors":  errors,
+    }
+
 
-def get_ndwi(bs):
-    b3, b8 = bs.get("B3", 0.0), bs.get("B8", 0.0)
-    return (b3 - b8) / (b3 + b8 + 1e-6)
+# ─────────────────────────────────────────────
+#  Vegetation indices
+# ─────────────────────────────────────────────
+@dataclass(slots=True, frozen=True)
+class Indices:
+    ndvi: float
+    evi:  float
+    fvc:  float
+    ndwi: float
+    si:   float  # combined salinity index, shared by salinity, NPK and sulphur
+
+
+def compute_indices(bs):
+    """NDVI, EVI, FVC, NDWI and SI from one read of the bands; FVC reuses NDVI."""
+    b2, b3 = bs.get("B2", 0.0), bs.get("B3", 0.0)
+    b4, b8 = bs.get("B4", 0.0), bs.get("B8", 0.0)
+    ndvi = safe_div(b8 - b4, b8 + b4)
+    return Indices(
+        ndvi=ndvi,
+        evi=2.5 * safe_div(b8 - b4, b8 + 6 * b4 - 7.5 * b2 + 1),
+        fvc=max(0.0, min(1.0, ((ndvi - 0.2) / (0.8 - 0.2)) ** 2)),
+        ndwi=safe_div(b3 - b8, b3 + b8),
+        # Reflectances are non-negative, so the mean of the two salinity
+        # terms needs no abs(); hypot is the C-level sqrt(b3² + b4²).
+        si=(math.sqrt(max(b3 * b4, 0.0)) + math.hypot(b3, b4)) / 2.0,
+    )
 
 
 # ─────────────────────────────────────────────
 #  NPK
 # ─────────────────────────────────────────────
-def get_npk_kgha(bs):
+def get_npk_kgha(bs, idx):
     try:
         b2  = bs.get("B2",  0.0)
         b3  = bs.get("B3",  0.0)
@@ -447,27 +538,22 @@ def get_npk_kgha(bs):
         b5  = bs.get("B5",  0.0)
         b6  = bs.get("B6",  0.0)
         b7  = bs.get("B7",  0.0)
-        b8  = bs.get("B8",  0.0)
         b8a = bs.get("B8A", 0.0)
         b11 = bs.get("B11", 0.0)
         b12 = bs.get("B12", 0.0)
-        ndvi       = (b8  - b4)  / (b8  + b4  + 1e-6)
-        evi        = 2.5 * (b8 - b4) / (b8 + 6 * b4 - 7.5 * b2 + 1 + 1e-6)
+        ndvi, evi  = idx.ndvi, idx.evi
         brightness = (b2 + b3 + b4) / 3.0
-        ndre       = (b8a - b5) / (b8a + b5 + 1e-6)
-        ci_re      = (b7 / (b5 + 1e-6)) - 1.0
-        mcari      = ((b5 - b4) - 0.2 * (b5 - b3)) * (b5 / (b4 + 1e-6))
+        ndre       = safe_div(b8a - b5, b8a + b5)
+        ci_re      = safe_div(b7, b5) - 1.0
+        mcari      = ((b5 - b4) - 0.2 * (b5 - b3)) * safe_div(b5, b4)
         N_kgha = (280.0 + 300.0 * ndre + 150.0 * evi + 20.0 * (ci_re / 5.0)
                   - 80.0 * brightness + 30.0 * mcari)
         N_kgha = max(50.0, min(600.0, N_kgha))
-        si1    = (b3 * b4) ** 0.5
-        si2    = (b3 ** 2 + b4 ** 2) ** 0.5 if (b3 ** 2 + b4 ** 2) > 0 else 0.0
-        mndbsi = (si1 + si2) / 2.0
         P_kgha = (11.0 + 15.0 * (1.0 - brightness) + 6.0 * ndvi
-                  + 4.0 * abs(mndbsi) + 2.0 * b3)
+                  + 4.0 * idx.si + 2.0 * b3)
         P_kgha = max(2.0, min(60.0, P_kgha))
-        potassium_index = b11 / (b5 + b6 + 1e-6)
-        salinity_factor = (b11 - b12) / (b11 + b12 + 1e-6)
+        potassium_index = safe_div(b11, b5 + b6)
+        salinity_factor = safe_div(b11 - b12, b11 + b12)
         K_kgha = (150.0 + 200.0 * potassium_index + 80.0 * salinity_factor + 60.0 * ndvi)
         K_kgha = max(40.0, min(600.0, K_kgha))
         return float(N_kgha), float(P_kgha), float(K_kgha)
@@ -484,10 +570,10 @@ def get_calcium_kgha(bs):
         b8  = bs.get("B8",  0.0)
         b11 = bs.get("B11", 0.0)
         b12 = bs.get("B12", 0.0)
-        carbonate_idx = (b11 + b12) / (b4 + b3 + 1e-6)
+        carbonate_idx = safe_div(b11 + b12, b4 + b3)
         brightness    = (b2 + b3 + b4) / 3.0
-        ndvi          = (b8 - b4) / (b8 + b4 + 1e-6)
-        clay_idx      = (b11 - b8) / (b11 + b8 + 1e-6)
+        ndvi          = safe_div(b8 - b4, b8 + b4)
+        clay_idx      = safe_div(b11 - b8, b11 + b8)
         Ca_kgha = (550.0 + 250.0 * carbonate_idx + 150.0 * brightness
                    - 100.0 * ndvi - 80.0 * clay_idx)
         return max(100.0, min(1200.0, float(Ca_kgha)))
@@ -506,10 +592,10 @@ def get_magnesium_kgha(bs):
         b8a = bs.get("B8A", 0.0)
         b11 = bs.get("B11", 0.0)
         b12 = bs.get("B12", 0.0)
-        re_chl      = (b7 / (b5 + 1e-6)) - 1.0
-        ndre        = (b8a - b5) / (b8a + b5 + 1e-6)
-        mg_clay_idx = (b11 - b12) / (b11 + b12 + 1e-6)
-        ndvi        = (b8 - b4) / (b8 + b4 + 1e-6)
+        re_chl      = safe_div(b7, b5) - 1.0
+        ndre        = safe_div(b8a - b5, b8a + b5)
+        mg_clay_idx = safe_div(b11 - b12, b11 + b12)
+        ndvi        = safe_div(b8 - b4, b8 + b4)
         Mg_kgha = (110.0 + 60.0 * ndre + 40.0 * re_chl + 30.0 * mg_clay_idx + 20.0 * ndvi)
         return max(10.0, min(400.0, float(Mg_kgha)))
     except Exception as e:
@@ -517,24 +603,18 @@ def get_magnesium_kgha(bs):
         return None
 
 
-def get_sulphur_kgha(bs):
+def get_sulphur_kgha(bs, idx):
     try:
-        b2  = bs.get("B2",  0.0)
         b3  = bs.get("B3",  0.0)
         b4  = bs.get("B4",  0.0)
         b5  = bs.get("B5",  0.0)
-        b8  = bs.get("B8",  0.0)
         b11 = bs.get("B11", 0.0)
         b12 = bs.get("B12", 0.0)
-        gypsum_idx   = b11 / (b3 + b4 + 1e-6)
-        si1          = (b3 * b4) ** 0.5
-        si2          = (b3 ** 2 + b4 ** 2) ** 0.5 if (b3 ** 2 + b4 ** 2) > 0 else 0.0
-        salinity_idx = (si1 + si2) / 2.0
-        re_red_ratio = b5 / (b4 + 1e-6)
-        swir_ratio   = b12 / (b11 + 1e-6)
-        ndvi         = (b8 - b4) / (b8 + b4 + 1e-6)
-        S_kgha = (20.0 + 15.0 * gypsum_idx + 10.0 * abs(salinity_idx)
-                  + 5.0 * (re_red_ratio - 1.0) - 8.0 * swir_ratio + 5.0 * ndvi)
+        gypsum_idx   = safe_div(b11, b3 + b4)
+        re_red_ratio = safe_div(b5, b4)
+        swir_ratio   = safe_div(b12, b11)
+        S_kgha = (20.0 + 15.0 * gypsum_idx + 10.0 * idx.si
+                  + 5.0 * (re_red_ratio - 1.0) - 8.0 * swir_ratio + 5.0 * idx.ndvi)
         return max(2.0, min(80.0, float(S_kgha)))
     except Exception as e:
         logging.error(f"Error in get_sulphur_kgha: {e}")
@@ -545,13 +625,21 @@ def get_sulphur_kgha(bs):
 #  Status helpers
 # ─────────────────────────────────────────────
 def get_param_status(param, value):
+    # Charts, score, interpretation and both tables classify the same
+    # readings; rounding keeps float noise from defeating the cache.
+    return _param_status(param, None if value is None else round(value, 4))
+
+
+@lru_cache(maxsize=512)
+def _param_status(param, value):
     if value is None:
         return "na"
-    if param == "Soil Texture":
-        return "good" if value == IDEAL_RANGES.get("Soil Texture", 7) else "low"
-    rng = IDEAL_RANGES.get(param)
-    if rng is None:
+    meta = PARAM_META.get(param)
+    if meta is None:
         return "good"
+    rng = meta.range
+    if param == "Soil Texture":
+        return "good" if value == rng else "low"
     if isinstance(rng, tuple):
         min_val, max_val = rng
         if min_val is None and max_val is not None:
@@ -570,11 +658,8 @@ def status_marathi(status):
 
 
 def calculate_soil_health_score(params):
-    score = 0
-    total = len([v for v in params.values() if v is not None])
-    for param, value in params.items():
-        if get_param_status(param, value) == "good":
-            score += 1
+    score = sum(1 for p, v in params.items() if get_param_status(p, v) == "good")
+    total = sum(1 for v in params.values() if v is not None)
     pct    = (score / total) * 100 if total > 0 else 0
     rating = ("उत्कृष्ट" if pct >= 80 else "चांगले" if pct >= 60 else
               "ठीकठाक"   if pct >= 40 else "खराब")
@@ -600,36 +685,19 @@ def generate_interpretation(param, value):
     if param == "Sulphur":
         return "स्पेक्ट्रल विश्वासार्हता कमी (जिप्सम निर्देशांक). अंदाज म्हणून वापरा."
     status = get_param_status(param, value)
+    meta   = PARAM_META.get(param)
+    rng    = meta.range if meta and isinstance(meta.range, tuple) else (None, None)
     if status == "good":
-        return f"योग्य पातळी ({IDEAL_DISPLAY.get(param, 'N/A')})."
+        return f"योग्य पातळी ({meta.display if meta else 'N/A'})."
     elif status == "low":
-        rng   = IDEAL_RANGES.get(param, (None, None))
-        min_v = rng[0] if isinstance(rng, tuple) else None
-        return f"कमी आहे (किमान {min_v} पेक्षा खाली)."
+        return f"कमी आहे (किमान {rng[0]} पेक्षा खाली)."
     elif status == "high":
-        rng   = IDEAL_RANGES.get(param, (None, None))
-        max_v = rng[1] if isinstance(rng, tuple) else None
-        return f"जास्त आहे (कमाल {max_v} पेक्षा वर)."
+        return f"जास्त आहे (कमाल {rng[1]} पेक्षा वर)."
     return "कोणतीही व्याख्या नाही."
 
 
-def get_suggestion(param, value):
-    if value is None or param not in SUGGESTIONS:
-        return "—"
-    status = get_param_status(param, value)
-    s = SUGGESTIONS[param]
-    if status == "good":
-        return "ठीक आहे: " + s.get("good", "सध्याची पद्धत सुरू ठेवा.")
-    elif status == "low":
-        return "सुधारणा करा: " + s.get("low", s.get("high", "कृषी तज्ज्ञाचा सल्ला घ्या."))
-    elif status == "high":
-        return "सुधारणा करा: " + s.get("high", s.get("low", "कृषी तज्ज्ञाचा सल्ला घ्या."))
-    return "—"
-
-
-def get_color_for_value(param, value):
-    s = get_param_status(param, value)
-    return 'green' if s == 'good' else ('orange' if s == 'low' else ('red' if s == 'high' else 'grey'))
+STATUS_COLORS = {"good": "green", "low": "orange", "high": "red", "na": "grey"}
+CHART_STATUS_LABELS = {"good": "चांगले", "low": "कमी", "high": "जास्त"}
 
 
 # ─────────────────────────────────────────────
@@ -644,163 +712,248 @@ def mfont():
 # ─────────────────────────────────────────────
 #  Charts — Marathi labels
 # ─────────────────────────────────────────────
-def make_nutrient_chart(n_val, p_val, k_val, ca_val, mg_val, s_val):
-    try:
-        nutrients  = [
-            "नत्र\n(kg/ha)", "स्फुरद\nP2O5 (kg/ha)", "पालाश\nK2O (kg/ha)",
-            "कॅल्शियम\n(kg/ha)", "मॅग्नेशियम\n(kg/ha)", "गंधक\n(kg/ha)"
-        ]
-        param_keys = ["Nitrogen", "Phosphorus", "Potassium", "Calcium", "Magnesium", "Sulphur"]
-        values     = [n_val or 0, p_val or 0, k_val or 0, ca_val or 0, mg_val or 0, s_val or 0]
-        bar_colors = [get_color_for_value(p, v) for p, v in zip(param_keys, values)]
-
-        fig, ax = plt.subplots(figsize=(10, 4))
-        bars = ax.bar(range(len(nutrients)), values, color=bar_colors, alpha=0.82)
-
-        if MATPLOTLIB_MARATHI_FONT:
-            ax.set_title("मातीतील पोषकद्रव्ये (kg/हेक्टर) — ICAR मानक",
-                         fontsize=11, **mfont())
-            ax.set_ylabel("kg / हेक्टर", **mfont())
-            ax.set_xticks(range(len(nutrients)))
-            ax.set_xticklabels(nutrients, fontproperties=MATPLOTLIB_MARATHI_FONT, fontsize=8)
-        else:
-            ax.set_title("Soil Nutrients (kg/ha) — ICAR Standard", fontsize=11)
-            ax.set_ylabel("kg / hectare")
-            ax.set_xticks(range(len(nutrients)))
-            ax.set_xticklabels(nutrients, fontsize=8)
-
-        ymax = max(values) * 1.35 if any(values) else 400
-        ax.set_ylim(0, ymax)
-
-        status_labels = {"good": "चांगले", "low": "कमी", "high": "जास्त"}
-        for bar, val, pk in zip(bars, values, param_keys):
-            st2 = get_param_status(pk, val)
-            lbl = status_labels.get(st2, "N/A")
-            kw  = {"ha": "center", "va": "bottom", "fontsize": 7}
-            if MATPLOTLIB_MARATHI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_MARATHI_FONT
-            ax.text(bar.get_x() + bar.get_width() / 2,
-                    bar.get_height() + ymax * 0.02,
-                    f"{val:.1f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "nutrient_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
-    except Exception as e:
-        logging.error(f"Error in make_nutrient_chart: {e}")
-        return None
+# Each chart builds its own pyplot-free Figure on an Agg canvas: nothing is
+# left in pyplot's global figure registry and sessions never share state.
+# tight_layout() already fits the axes, so the second render pass that
+# bbox_inches='tight' triggers is dropped; 90 dpi is ample at 13 cm wide.
+# Each builder returns PNG bytes (no shared files on disk between sessions)
+# and is st.cache_data'd on its readings, so regenerating a report for the
+# same field reuses the rendered charts.
+CHART_DPI = 90
+
+# The nutrient chart is six flat bars with labels, so it is drawn directly
+# with PIL: no matplotlib layout, path rendering or extra libpng passes.
+NUTRIENT_CHART_SIZE = (900, 360)
 
 
+@lru_cache(maxsize=8)
+def pil_font(size):
+    if MARATHI_FONT_REGISTERED:
+        return ImageFont.truetype(MARATHI_FONT, size)
+    return ImageFont.load_default()
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
+def make_nutrient_chart(n_val, p_val, k_val, ca_val, mg_val, s_val):
+    nutrients  = [
+        "नत्र\n(kg/ha)", "स्फुरद\nP2O5 (kg/ha)", "पालाश\nK2O (kg/ha)",
+        "कॅल्शियम\n(kg/ha)", "मॅग्नेशियम\n(kg/ha)", "गंधक\n(kg/ha)"
+    ]
+    param_keys = ["Nitrogen", "Phosphorus", "Potassium", "Calcium", "Magnesium", "Sulphur"]
+    values     = [n_val or 0, p_val or 0, k_val or 0, ca_val or 0, mg_val or 0, s_val or 0]
+    statuses   = [get_param_status(p, v) for p, v in zip(param_keys, values)]
+    bar_colors = [STATUS_COLORS[s] for s in statuses]
+    bar_labels = [CHART_STATUS_LABELS.get(s, "N/A") for s in statuses]
+    if MARATHI_FONT_REGISTERED:
+        title = "मातीतील पोषकद्रव्ये (kg/हेक्टर) — ICAR मानक"
+    else:
+        title = "Soil Nutrients (kg/ha) — ICAR Standard"
+
+    w, h = NUTRIENT_CHART_SIZE
+    left, right, top, bottom = 70, w - 20, 50, h - 55
+    plot_h = bottom - top
+    ymax   = max(values) * 1.35 if any(values) else 400
+
+    img  = PILImage.new("RGB", (w, h), "white")
+    draw = ImageDraw.Draw(img)
+    draw.text((w / 2, 22), title, font=pil_font(18), fill="black", anchor="mm")
+
+    # y-axis gridlines and tick values
+    for i in range(5):
+        y = bottom - plot_h * i / 4
+        draw.line([(left, y), (right, y)], fill=(225, 225, 225))
+        draw.text((left - 6, y), f"{ymax * i / 4:.0f}", font=pil_font(11),
+                  fill="black", anchor="rm")
+    draw.line([(left, top), (left, bottom), (right, bottom)], fill="black")
+
+    slot = (right - left) / len(values)
+    for i, (name, val, color, lbl) in enumerate(zip(nutrients, values, bar_colors, bar_labels)):
+        cx = left + slot * (i + 0.5)
+        y0 = bottom - plot_h * min(val, ymax) / ymax
+        draw.rectangle([(cx - slot * 0.4, y0), (cx + slot * 0.4, bottom)], fill=color)
+        draw.multiline_text((cx, y0 - 4), f"{val:.1f}\n{lbl}", font=pil_font(12),
+                            fill="black", anchor="md", align="center")
+        draw.multiline_text((cx, bottom + 6), name, font=pil_font(12),
+                            fill="black", anchor="ma", align="center")
+
+    buf = BytesIO()
+    img.save(buf, "PNG", compress_level=1)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
 def make_vegetation_chart(ndvi, ndwi):
-    try:
-        indices    = ["NDVI", "NDWI"]
-        values     = [ndvi or 0, ndwi or 0]
-        bar_colors = [get_color_for_value(i, v) for i, v in zip(indices, values)]
+    indices    = ["NDVI", "NDWI"]
+    values     = [ndvi or 0, ndwi or 0]
+    statuses   = [get_param_status(i, v) for i, v in zip(indices, values)]
+    bar_colors = [STATUS_COLORS[s] for s in statuses]
+    bar_labels = [CHART_STATUS_LABELS.get(s, "N/A") for s in statuses]
 
-        fig, ax = plt.subplots(figsize=(5, 4))
-        bars = ax.bar(indices, values, color=bar_colors, alpha=0.82)
+    fig = Figure(figsize=(5, 4))
+    FigureCanvasAgg(fig)
+    ax  = fig.add_subplot()
+    bars = ax.bar(indices, values, color=bar_colors, alpha=0.82)
 
-        if MATPLOTLIB_MARATHI_FONT:
-            ax.set_title("वनस्पती आणि पाणी निर्देशांक", fontsize=11, **mfont())
-            ax.set_ylabel("निर्देशांक मूल्य", **mfont())
-        else:
-            ax.set_title("Vegetation and Water Indices", fontsize=11)
-            ax.set_ylabel("Index Value")
-
-        ax.set_ylim(-1, 1)
-        ax.axhline(0, color='black', linewidth=0.5, linestyle='--')
-
-        status_labels = {"good": "चांगले", "low": "कमी", "high": "जास्त"}
-        for i, (bar, val) in enumerate(zip(bars, values)):
-            st2  = get_param_status(indices[i], val)
-            lbl  = status_labels.get(st2, "N/A")
-            ypos = bar.get_height() + 0.03 if val >= 0 else bar.get_height() - 0.08
-            kw   = {"ha": "center", "va": "bottom", "fontsize": 9}
-            if MATPLOTLIB_MARATHI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_MARATHI_FONT
-            ax.text(bar.get_x() + bar.get_width() / 2, ypos,
-                    f"{val:.2f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "vegetation_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
-    except Exception as e:
-        logging.error(f"Error in make_vegetation_chart: {e}")
-        return None
+    if MATPLOTLIB_MARATHI_FONT:
+        ax.set_title("वनस्पती आणि पाणी निर्देशांक", fontsize=11, **mfont())
+        ax.set_ylabel("निर्देशांक मूल्य", **mfont())
+    else:
+        ax.set_title("Vegetation and Water Indices", fontsize=11)
+        ax.set_ylabel("Index Value")
+
+    ax.set_ylim(-1, 1)
+    ax.axhline(0, color='black', linewidth=0.5, linestyle='--')
+
+    # bar_label places all annotations in one call and flips negative
+    # bars' labels below the bar by itself.
+    ax.bar_label(bars, labels=[f"{v:.2f}\n{l}" for v, l in zip(values, bar_labels)],
+                 padding=3, fontsize=9, **mfont())
+
+    fig.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=CHART_DPI)
+    return buf.getvalue()
 
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
 def make_soil_properties_chart(ph, sal_ec, oc_pct, cec, lst):
-    try:
-        labels     = ["pH", "EC (mS/cm)", "OC (%)", "CEC (cmol/kg)", "LST (°C)"]
-        param_keys = ["pH", "Salinity", "Organic Carbon", "CEC", "LST"]
-        values     = [ph or 0, sal_ec or 0, oc_pct or 0, cec or 0, lst or 0]
-        bar_colors = [get_color_for_value(p, v) for p, v in zip(param_keys, values)]
+    labels     = ["pH", "EC (mS/cm)", "OC (%)", "CEC (cmol/kg)", "LST (°C)"]
+    param_keys = ["pH", "Salinity", "Organic Carbon", "CEC", "LST"]
+    values     = [ph or 0, sal_ec or 0, oc_pct or 0, cec or 0, lst or 0]
+    statuses   = [get_param_status(p, v) for p, v in zip(param_keys, values)]
+    bar_colors = [STATUS_COLORS[s] for s in statuses]
+    bar_labels = [CHART_STATUS_LABELS.get(s, "N/A") for s in statuses]
+
+    fig = Figure(figsize=(8, 4))
+    FigureCanvasAgg(fig)
+    ax  = fig.add_subplot()
+    bars = ax.bar(labels, values, color=bar_colors, alpha=0.82)
 
-        fig, ax = plt.subplots(figsize=(8, 4))
-        bars = ax.bar(labels, values, color=bar_colors, alpha=0.82)
+    if MATPLOTLIB_MARATHI_FONT:
+        ax.set_title("मातीचे गुणधर्म (ICAR मानक)", fontsize=11, **mfont())
+        ax.set_ylabel("मूल्य", **mfont())
+    else:
+        ax.set_title("Soil Properties (ICAR Standard)", fontsize=11)
+        ax.set_ylabel("Value")
 
-        if MATPLOTLIB_MARATHI_FONT:
-            ax.set_title("मातीचे गुणधर्म (ICAR मानक)", fontsize=11, **mfont())
-            ax.set_ylabel("मूल्य", **mfont())
-        else:
-            ax.set_title("Soil Properties (ICAR Standard)", fontsize=11)
-            ax.set_ylabel("Value")
-
-        ymax = max(values) * 1.35 if any(values) else 50
-        ax.set_ylim(0, ymax)
-
-        status_labels = {"good": "चांगले", "low": "कमी", "high": "जास्त"}
-        for bar, val, pk in zip(bars, values, param_keys):
-            st2 = get_param_status(pk, val)
-            lbl = status_labels.get(st2, "N/A")
-            kw  = {"ha": "center", "va": "bottom", "fontsize": 8}
-            if MATPLOTLIB_MARATHI_FONT:
-                kw["fontproperties"] = MATPLOTLIB_MARATHI_FONT
-            ax.text(bar.get_x() + bar.get_width() / 2,
-                    bar.get_height() + ymax * 0.02,
-                    f"{val:.2f}\n{lbl}", **kw)
-
-        plt.tight_layout()
-        path = "properties_chart.png"
-        plt.savefig(path, dpi=100, bbox_inches='tight')
-        plt.close()
-        return path
+    ymax = max(values) * 1.35 if any(values) else 50
+    ax.set_ylim(0, ymax)
+
+    ax.bar_label(bars, labels=[f"{v:.2f}\n{l}" for v, l in zip(values, bar_labels)],
+                 padding=3, fontsize=8, **mfont())
+
+    fig.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=CHART_DPI)
+    return buf.getvalue()
+
+
+# The chart builders above raise instead of returning None, so st.cache_data
+# never keeps a failed render; the report just leaves that chart out.
+def chart_or_none(future):
+    try:
+        return future.result()
     except Exception as e:
-        logging.error(f"Error in make_soil_properties_chart: {e}")
+        logging.error(f"Chart rendering failed: {e}")
         return None
 
 
 # ─────────────────────────────────────────────
 #  Groq API — Marathi output
 # ─────────────────────────────────────────────
-def call_groq(prompt: str) -> str:
+# Built once per server process (Streamlit re-executes this script on every
+# rerun) so calls reuse the client's keep-alive connection pool.
+@st.cache_resource(show_spinner=False)
+def groq_client():
+    # Bounded timeout so a stalled Groq call cannot hang the report thread;
+    # transient 429/5xx responses get two SDK-level retries.
+    return OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1",
+                  timeout=GROQ_TIMEOUT_S, max_retries=2)
+
+
+GROQ_CLIENT = groq_client()
+
+
+# The prompt embeds every reading already rounded to 2 decimals, location and
+# date range, so it is the report's fingerprint: regenerating the same report
+# reuses the answer for an hour. st.cache_data does not cache exceptions, so
+# a failed request is retried on the next click.
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=256)
+def _groq_completion(prompt: str, max_tokens: int) -> str:
+    response = GROQ_CLIENT.chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=0.35,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def call_groq(prompt: str, max_tokens: int = 700) -> str:
     try:
-        client   = OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=700,
-            temperature=0.35,
-        )
-        return response.choices[0].message.content.strip()
+        return _groq_completion(prompt, max_tokens)
     except Exception as e:
         logging.error(f"Groq API error: {e}")
         return None
 
 
+# The summary and the recommendations come back from one completion, split on
+# these markers; the regex tolerates the model re-spacing or re-padding them.
+SUMMARY_MARKER = "===SUMMARY==="
+RECS_MARKER    = "===RECS==="
+_SECTION_SPLIT = re.compile(r"=+\s*RECS\s*=+", re.IGNORECASE)
+_SUMMARY_HEAD  = re.compile(r"^\s*=+\s*SUMMARY\s*=+\s*", re.IGNORECASE)
+
+
+def split_sections(text):
+    """(summary, recommendations) from a batched reply; None for a missing part."""
+    if not text:
+        return None, None
+    parts   = _SECTION_SPLIT.split(text, maxsplit=1)
+    summary = _SUMMARY_HEAD.sub("", parts[0]).strip() or None
+    recs    = parts[1].strip() if len(parts) > 1 else None
+    return summary, recs or None
+
+
 # ─────────────────────────────────────────────
 #  ReportLab Marathi style helper
 # ─────────────────────────────────────────────
+MFONT = "NotoDevanagari" if MARATHI_FONT_REGISTERED else "Helvetica"
+
+
 def mpara_style(base_style, font_size=9, leading=14, alignment=None):
-    font = "NotoDevanagari" if MARATHI_FONT_REGISTERED else "Helvetica"
-    kwargs = dict(parent=base_style, fontName=font, fontSize=font_size, leading=leading)
+    kwargs = dict(parent=base_style, fontName=MFONT, fontSize=font_size, leading=leading)
     if alignment is not None:
         kwargs["alignment"] = alignment
-    return ParagraphStyle(f"Marathi_{font_size}_{id(base_style)}", **kwargs)
+    return ParagraphStyle(f"Marathi_{base_style.name}_{font_size}_{leading}_{alignment}", **kwargs)
+
+
+# Report styles depend only on the registered font. Like load_marathi_fonts,
+# cache_resource builds them once per server process rather than on every
+# Streamlit rerun.
+@st.cache_resource(show_spinner=False)
+def load_report_styles():
+    sample = getSampleStyleSheet()
+    title  = ParagraphStyle('MTitle',
+        parent=sample['Title'], fontName=MFONT, fontSize=18,
+        spaceAfter=16, alignment=TA_CENTER)
+    h2     = ParagraphStyle('MH2',
+        parent=sample['Heading2'], fontName=MFONT, fontSize=12,
+        spaceAfter=8, textColor=colors.darkgreen)
+    body   = mpara_style(sample['BodyText'], 9, 14)
+    small  = mpara_style(sample['BodyText'], 8, 12)
+    center = mpara_style(sample['BodyText'], 10, 14, TA_CENTER)
+    # Status-column text colour in the report tables; "na" falls back to grey.
+    status_colors = {
+        "good": colors.Color(0.1, 0.55, 0.1),
+        "low":  colors.Color(0.85, 0.45, 0.0),
+        "high": colors.red,
+    }
+    return title, h2, body, small, center, status_colors
+
+
+(TITLE_STYLE, H2_STYLE, BODY_STYLE, SMALL_STYLE, CENTER_STYLE,
+ STATUS_TEXT_COLORS) = load_report_styles()
 
 
 # ─────────────────────────────────────────────
@@ -808,48 +961,72 @@ def mpara_style(base_style, font_size=9, leading=14, alignment=None):
 # ─────────────────────────────────────────────
 def generate_report(params, location, date_range):
     try:
+        # One timestamp for the cover and every page header.
+        generated_at  = datetime.now()
         REPORT_PARAMS = {k: v for k, v in params.items() if k not in ("EVI", "FVC")}
         score, rating   = calculate_soil_health_score(REPORT_PARAMS)
         interpretations = {p: generate_interpretation(p, v) for p, v in REPORT_PARAMS.items()}
-
-        nutrient_chart   = make_nutrient_chart(
-            params["Nitrogen"], params["Phosphorus"], params["Potassium"],
-            params["Calcium"],  params["Magnesium"],  params["Sulphur"]
-        )
-        vegetation_chart = make_vegetation_chart(params["NDVI"], params["NDWI"])
-        properties_chart = make_soil_properties_chart(
-            params["pH"], params["Salinity"], params["Organic Carbon"],
-            params["CEC"], params["LST"])
+        # One status pass feeds the rating counts, both tables and their
+        # colour commands.
+        status_map = {p: get_param_status(p, v) for p, v in REPORT_PARAMS.items()}
+        valid_map  = {p: v is not None for p, v in REPORT_PARAMS.items()}
+
+        # The charts and the Groq call are independent: each chart owns its
+        # Figure (Agg drops the GIL while rasterising) and the Groq call only
+        # waits on the network, so all four run on one pool and the slowest
+        # of them sets the latency.
+        pool          = ThreadPoolExecutor(max_workers=4)
+        chart_futures = [
+            pool.submit(make_nutrient_chart,
+                        params["Nitrogen"], params["Phosphorus"], params["Potassium"],
+                        params["Calcium"],  params["Magnesium"],  params["Sulphur"]),
+            pool.submit(make_vegetation_chart, params["NDVI"], params["NDWI"]),
+            pool.submit(make_soil_properties_chart,
+                        params["pH"], params["Salinity"], params["Organic Carbon"],
+                        params["CEC"], params["LST"]),
+        ]
 
         def fmtv(param, v):
             if v is None:
                 return "N/A"
-            u = UNIT_MAP.get(param, "")
-            return f"{v:.2f}{u}"
+            return f"{v:.2f}{PARAM_META[param].unit}"
 
         tex_d = TEXTURE_CLASSES.get(params["Soil Texture"], "N/A") if params["Soil Texture"] else "N/A"
 
-        # ── Groq prompts in Marathi ────────────────────────────────────────
-        exec_prompt = f"""तुम्ही एक अनुभवी कृषी तज्ज्ञ आहात. खालील माती तपासणी अहवालावर आधारित 3-5 मुद्द्यांमध्ये थोडक्यात सारांश लिहा.
-भाषा: सोपी मराठी, शेतकऱ्यांना समजेल अशी. कोणतेही तांत्रिक शब्द वापरू नका.
+        # ── Groq prompt in Marathi ─────────────────────────────────────────
+        # One batched request: the soil context is sent once and the model
+        # answers both sections, separated by the markers.
+        llm_prompt = f"""तुम्ही एक अनुभवी कृषी तज्ज्ञ आणि सल्लागार आहात. खालील माती तपासणी अहवाल वाचा.
 स्थान: {location}
 तारीख: {date_range}
 माती आरोग्य गुण: {score:.1f}% ({rating})
 pH={fmtv('pH', params['pH'])}, EC={fmtv('Salinity', params['Salinity'])}, सेंद्रिय कार्बन={fmtv('Organic Carbon', params['Organic Carbon'])}, CEC={fmtv('CEC', params['CEC'])}
 मातीचा पोत={tex_d}, नत्र={fmtv('Nitrogen', params['Nitrogen'])}, स्फुरद={fmtv('Phosphorus', params['Phosphorus'])} (कमी विश्वासार्ह), पालाश={fmtv('Potassium', params['Potassium'])}
 कॅल्शियम={fmtv('Calcium', params['Calcium'])}, मॅग्नेशियम={fmtv('Magnesium', params['Magnesium'])}, गंधक={fmtv('Sulphur', params['Sulphur'])} (अंदाजित)
-प्रत्येक मुद्दा बुलेट (•) ने सुरू करा. कोणतेही bold किंवा markdown नको. फक्त मराठीत उत्तर द्या."""
-
-        rec_prompt = f"""तुम्ही एक कृषी सल्लागार आहात. खालील माती माहितीवर आधारित महाराष्ट्रातील शेतकऱ्यांसाठी 3-5 व्यावहारिक सुझाव द्या.
-pH={fmtv('pH', params['pH'])}, EC={fmtv('Salinity', params['Salinity'])}, सेंद्रिय कार्बन={fmtv('Organic Carbon', params['Organic Carbon'])}, CEC={fmtv('CEC', params['CEC'])}, माती={tex_d}
-नत्र={fmtv('Nitrogen', params['Nitrogen'])}, स्फुरद={fmtv('Phosphorus', params['Phosphorus'])} (अंदाजित), पालाश={fmtv('Potassium', params['Potassium'])}
-कॅल्शियम={fmtv('Calcium', params['Calcium'])}, मॅग्नेशियम={fmtv('Magnesium', params['Magnesium'])}, गंधक={fmtv('Sulphur', params['Sulphur'])} (अंदाजित)
 NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
-महाराष्ट्राच्या हवामानानुसार योग्य पिके आणि साधे खत उपाय सांगा.
+
+उत्तर दोन भागांत द्या:
+{SUMMARY_MARKER}
+भाग A: 3-5 मुद्द्यांमध्ये थोडक्यात सारांश. भाषा: सोपी मराठी, शेतकऱ्यांना समजेल अशी. कोणतेही तांत्रिक शब्द वापरू नका.
+{RECS_MARKER}
+भाग B: महाराष्ट्रातील शेतकऱ्यांसाठी 3-5 व्यावहारिक सुझाव. महाराष्ट्राच्या हवामानानुसार योग्य पिके आणि साधे खत उपाय सांगा.
+दोन्ही ओळी {SUMMARY_MARKER} आणि {RECS_MARKER} जशाच्या तशा लिहा.
 प्रत्येक मुद्दा बुलेट (•) ने सुरू करा. कोणतेही bold किंवा markdown नको. फक्त मराठीत उत्तर द्या."""
 
-        executive_summary = call_groq(exec_prompt) or "• सारांश उपलब्ध नाही."
-        recommendations   = call_groq(rec_prompt)  or "• सुझाव उपलब्ध नाहीत."
+        llm_future = pool.submit(call_groq, llm_prompt, 1400)
+        # Submitted work still finishes; this only frees the workers after.
+        pool.shutdown(wait=False)
+
+        llm_text = llm_future.result()
+        # Groq down or misconfigured: the tables and charts are still valid,
+        # so build the report without the LLM sections 1 and 5 and say so.
+        llm_ok = llm_text is not None
+        if not llm_ok:
+            logging.error("Groq returned nothing; building the report without sections 1 and 5")
+        summary_text, recs_text = split_sections(llm_text)
+        executive_summary = summary_text or "• सारांश उपलब्ध नाही."
+        recommendations   = recs_text    or "• सुझाव उपलब्ध नाहीत."
+        nutrient_chart, vegetation_chart, properties_chart = (chart_or_none(f) for f in chart_futures)
 
         # ── PDF Build ──────────────────────────────────────────────────────
         pdf_buffer = BytesIO()
@@ -857,50 +1034,40 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                                 rightMargin=2*cm, leftMargin=2*cm,
                                 topMargin=3*cm,  bottomMargin=2*cm)
 
-        styles = getSampleStyleSheet()
-        MFONT  = "NotoDevanagari" if MARATHI_FONT_REGISTERED else "Helvetica"
-
-        title_style = ParagraphStyle('MTitle',
-            parent=styles['Title'], fontName=MFONT, fontSize=18,
-            spaceAfter=16, alignment=TA_CENTER)
-        h2 = ParagraphStyle('MH2',
-            parent=styles['Heading2'], fontName=MFONT, fontSize=12,
-            spaceAfter=8, textColor=colors.darkgreen)
-        body = ParagraphStyle('MBody',
-            parent=styles['BodyText'], fontName=MFONT, fontSize=9, leading=14)
-        small = ParagraphStyle('MSmall',
-            parent=styles['BodyText'], fontName=MFONT, fontSize=8, leading=12)
-        center_body = ParagraphStyle('MCenter',
-            parent=styles['BodyText'], fontName=MFONT, fontSize=10,
-            leading=14, alignment=TA_CENTER)
-
         elements = []
 
         # ── Cover page ──────────────────────────────────────────────────────
         elements.append(Spacer(1, 2*cm))
-        if os.path.exists(LOGO_PATH):
+        if LOGO_AVAILABLE:
             logo_img = Image(LOGO_PATH, width=10*cm, height=10*cm)
             logo_img.hAlign = 'CENTER'
             elements.append(logo_img)
         elements.append(Spacer(1, 0.8*cm))
-        elements.append(Paragraph("FarmMatrix माती आरोग्य अहवाल", title_style))
+        elements.append(Paragraph("FarmMatrix माती आरोग्य अहवाल", TITLE_STYLE))
         elements.append(Spacer(1, 0.4*cm))
-        elements.append(Paragraph(f"<b>स्थान:</b> {location}", center_body))
-        elements.append(Paragraph(f"<b>तारीख श्रेणी:</b> {date_range}", center_body))
-        elements.append(Paragraph(f"<b>अहवाल तयार:</b> {datetime.now():%d %B %Y, %H:%M}", center_body))
+        elements.append(Paragraph(f"<b>स्थान:</b> {location}", CENTER_STYLE))
+        elements.append(Paragraph(f"<b>तारीख श्रेणी:</b> {date_range}", CENTER_STYLE))
+        elements.append(Paragraph(f"<b>अहवाल तयार:</b> {generated_at:%d %B %Y, %H:%M}", CENTER_STYLE))
+        if not llm_ok:
+            elements.append(Spacer(1, 0.6*cm))
+            elements.append(Paragraph(
+                "<b>टीप:</b> AI सेवा उपलब्ध नसल्यामुळे थोडक्यात सारांश (विभाग 1) आणि "
+                "पीक सुझाव (विभाग 5) या अहवालात समाविष्ट नाहीत. कृपया नंतर पुन्हा अहवाल तयार करा.",
+                CENTER_STYLE))
         elements.append(PageBreak())
 
         # ── Section 1: Executive Summary ────────────────────────────────────
-        elements.append(Paragraph("1. थोडक्यात सारांश", h2))
-        for line in executive_summary.split('\n'):
-            if line.strip():
-                elements.append(Paragraph(line.strip(), body))
-        elements.append(Spacer(1, 0.4*cm))
+        if llm_ok:
+            elements.append(Paragraph("1. थोडक्यात सारांश", H2_STYLE))
+            for line in executive_summary.split('\n'):
+                if line.strip():
+                    elements.append(Paragraph(line.strip(), BODY_STYLE))
+            elements.append(Spacer(1, 0.4*cm))
 
         # ── Section 2: Soil Health Score ────────────────────────────────────
-        elements.append(Paragraph("2. माती आरोग्य रेटिंग", h2))
-        good_count  = sum(1 for p, v in REPORT_PARAMS.items() if get_param_status(p, v) == "good")
-        valid_count = len([v for v in REPORT_PARAMS.values() if v is not None])
+        elements.append(Paragraph("2. माती आरोग्य रेटिंग", H2_STYLE))
+        good_count  = sum(1 for s in status_map.values() if s == "good")
+        valid_count = sum(valid_map.values())
         rating_data = [
             ["एकूण गुण", "रेटिंग", "योग्य पातळीवरील घटक"],
             [f"{score:.1f}%", rating, f"{good_count} / {valid_count}"]
@@ -919,25 +1086,37 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
         elements.append(Spacer(1, 0.4*cm))
         elements.append(PageBreak())
 
+        # Marathi names like "pH" or "CEC" fit their column, so only texts with
+        # a space (which may wrap) pay for a Paragraph, memoised per text for
+        # the section 6 table. Both table styles below use SMALL_STYLE's size
+        # and leading, so a bare string and a Paragraph render alike.
+        cell_paras = {}
+
+        def cell_para(text):
+            if " " not in text:
+                return text
+            para = cell_paras.get(text)
+            if para is None:
+                para = cell_paras[text] = Paragraph(text, SMALL_STYLE)
+            return para
+
         # ── Section 3: Parameter Table ───────────────────────────────────────
-        elements.append(Paragraph("3. माती घटक विश्लेषण (ICAR मानक)", h2))
+        elements.append(Paragraph("3. माती घटक विश्लेषण (ICAR मानक)", H2_STYLE))
         table_data = [["घटक", "मूल्य", "ICAR आदर्श श्रेणी", "स्थिती", "स्पष्टीकरण"]]
 
         for param, value in REPORT_PARAMS.items():
-            unit      = UNIT_MAP.get(param, "")
-            marathi_nm = PARAM_MARATHI.get(param, param)
+            meta = PARAM_META[param]
             if param == "Soil Texture":
                 val_text = TEXTURE_CLASSES.get(value, "N/A") if value is not None else "N/A"
             else:
-                val_text = f"{value:.2f}{unit}" if value is not None else "N/A"
-            status   = get_param_status(param, value)
-            st_label = status_marathi(status)
+                val_text = f"{value:.2f}{meta.unit}" if value is not None else "N/A"
+            st_label = status_marathi(status_map[param])
             table_data.append([
-                Paragraph(marathi_nm, small),
+                cell_para(meta.marathi),
                 val_text,
-                IDEAL_DISPLAY.get(param, "N/A"),
+                meta.display,
                 st_label,
-                Paragraph(interpretations[param], small)
+                cell_para(interpretations[param])
             ])
 
         tbl = Table(table_data, colWidths=[3*cm, 2.5*cm, 3*cm, 1.8*cm, 5.7*cm])
@@ -947,46 +1126,45 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
             ('FONTNAME',   (0, 0), (-1, -1), MFONT),
             ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
             ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
-            ('FONTSIZE',   (0, 0), (-1, -1), 9),
+            ('FONTSIZE',   (0, 0), (-1, -1), SMALL_STYLE.fontSize),
+            ('LEADING',    (0, 0), (-1, -1), SMALL_STYLE.leading),
             ('BOX',        (0, 0), (-1, -1), 1, colors.black),
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.94, 0.98, 0.94)]),
         ]
-        for i, (param, value) in enumerate(REPORT_PARAMS.items(), start=1):
-            s = get_param_status(param, value)
-            c = (colors.Color(0.1, 0.55, 0.1) if s == "good" else
-                 colors.Color(0.85, 0.45, 0.0) if s == "low"  else
-                 colors.red if s == "high" else colors.grey)
-            tbl_style.append(('TEXTCOLOR', (3, i), (3, i), c))
-            tbl_style.append(('FONTNAME',  (3, i), (3, i), MFONT))
+        tbl_style.extend(
+            ('TEXTCOLOR', (3, i), (3, i), STATUS_TEXT_COLORS.get(status_map[param], colors.grey))
+            for i, param in enumerate(REPORT_PARAMS, start=1)
+        )
         tbl.setStyle(TableStyle(tbl_style))
         elements.append(tbl)
         elements.append(PageBreak())
 
         # ── Section 4: Charts ────────────────────────────────────────────────
-        elements.append(Paragraph("4. आलेख आणि तक्ते", h2))
-        for lbl, path in [
+        elements.append(Paragraph("4. आलेख आणि तक्ते", H2_STYLE))
+        for lbl, png in [
             ("पोषकद्रव्ये — नत्र, स्फुरद, पालाश, कॅल्शियम, मॅग्नेशियम, गंधक (kg/हेक्टर)", nutrient_chart),
             ("वनस्पती आणि पाणी निर्देशांक (NDVI, NDWI)",                                   vegetation_chart),
             ("मातीचे गुणधर्म",                                                               properties_chart),
         ]:
-            if path:
-                elements.append(Paragraph(lbl + ":", body))
-                elements.append(Image(path, width=13*cm, height=6.5*cm))
+            if png:
+                elements.append(Paragraph(lbl + ":", BODY_STYLE))
+                elements.append(Image(BytesIO(png), width=13*cm, height=6.5*cm))
                 elements.append(Spacer(1, 0.3*cm))
         elements.append(PageBreak())
 
         # ── Section 5: Crop Recommendations ─────────────────────────────────
-        elements.append(Paragraph("5. पीक सुझाव आणि उपचार", h2))
-        for line in recommendations.split('\n'):
-            if line.strip():
-                elements.append(Paragraph(line.strip(), body))
-        elements.append(Spacer(1, 0.5*cm))
-        elements.append(PageBreak())
+        if llm_ok:
+            elements.append(Paragraph("5. पीक सुझाव आणि उपचार", H2_STYLE))
+            for line in recommendations.split('\n'):
+                if line.strip():
+                    elements.append(Paragraph(line.strip(), BODY_STYLE))
+            elements.append(Spacer(1, 0.5*cm))
+            elements.append(PageBreak())
 
         # ── Section 6: Parameter-wise Suggestions ───────────────────────────
-        elements.append(Paragraph("6. घटकनिहाय सुझाव", h2))
+        elements.append(Paragraph("6. घटकनिहाय सुझाव", H2_STYLE))
         elements.append(Paragraph(
-            "प्रत्येक घटकासाठी: चांगली पातळी टिकवण्यासाठी किंवा समस्या दुरुस्त करण्यासाठी काय करावे.", small))
+            "प्रत्येक घटकासाठी: चांगली पातळी टिकवण्यासाठी किंवा समस्या दुरुस्त करण्यासाठी काय करावे.", SMALL_STYLE))
         elements.append(Spacer(1, 0.3*cm))
 
         SUGGESTION_PARAMS = [
@@ -995,18 +1173,13 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
             "Calcium", "Magnesium", "Sulphur",
             "NDVI", "NDWI", "LST"
         ]
-        sug_data = [["घटक", "स्थिती", "आवश्यक कृती"]]
-        for param in SUGGESTION_PARAMS:
-            value      = params.get(param)
-            status     = get_param_status(param, value)
-            st_label   = status_marathi(status)
-            sug_text   = get_suggestion(param, value)
-            marathi_nm = PARAM_MARATHI.get(param, param)
-            sug_data.append([
-                Paragraph(marathi_nm, small),
-                st_label,
-                Paragraph(sug_text, small)
-            ])
+        # Statuses come from status_map, so no row re-derives them.
+        sug_data = [["घटक", "स्थिती", "आवश्यक कृती"]] + [
+            [cell_para(PARAM_META[param].marathi),
+             status_marathi(status_map[param]),
+             cell_para(SUGGESTION_TEXT.get((param, status_map[param]), "—"))]
+            for param in SUGGESTION_PARAMS
+        ]
 
         sug_tbl = Table(sug_data, colWidths=[3*cm, 2*cm, 11*cm])
         sug_style_list = [
@@ -1015,25 +1188,26 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
             ('FONTNAME',   (0, 0), (-1, -1), MFONT),
             ('GRID',       (0, 0), (-1, -1), 0.5, colors.grey),
             ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
-            ('FONTSIZE',   (0, 0), (-1, -1), 9),
+            ('FONTSIZE',   (0, 0), (-1, -1), SMALL_STYLE.fontSize),
+            ('LEADING',    (0, 0), (-1, -1), SMALL_STYLE.leading),
             ('BOX',        (0, 0), (-1, -1), 1, colors.black),
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.94, 0.98, 0.94)]),
         ]
-        for i, param in enumerate(SUGGESTION_PARAMS, start=1):
-            value = params.get(param)
-            s     = get_param_status(param, value)
-            c     = (colors.Color(0.1, 0.55, 0.1) if s == "good" else
-                     colors.Color(0.85, 0.45, 0.0) if s == "low"  else
-                     colors.red if s == "high" else colors.grey)
-            sug_style_list.append(('TEXTCOLOR', (1, i), (1, i), c))
-            sug_style_list.append(('FONTNAME',  (1, i), (1, i), MFONT))
+        sug_style_list.extend(
+            ('TEXTCOLOR', (1, i), (1, i), STATUS_TEXT_COLORS.get(status_map[param], colors.grey))
+            for i, param in enumerate(SUGGESTION_PARAMS, start=1)
+        )
         sug_tbl.setStyle(TableStyle(sug_style_list))
         elements.append(sug_tbl)
 
         # ── Header / Footer ──────────────────────────────────────────────────
+        header_stamp = f"तयार: {generated_at:%d %b %Y, %H:%M}"
+
         def add_header(canv, doc):
             canv.saveState()
-            if os.path.exists(LOGO_PATH):
+            # By file name, the canvas keys the logo XObject on the path, so
+            # the JPEG is read once per document and reused on later pages.
+            if LOGO_AVAILABLE:
                 canv.drawImage(LOGO_PATH, 2*cm, A4[1] - 2.8*cm, width=1.8*cm, height=1.8*cm)
             if MARATHI_FONT_REGISTERED:
                 canv.setFont("NotoDevanagari", 11)
@@ -1041,8 +1215,7 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                 canv.setFont("Helvetica-Bold", 11)
             canv.drawString(4.5*cm, A4[1] - 2.2*cm, "FarmMatrix माती आरोग्य अहवाल")
             canv.setFont("Helvetica", 8)
-            canv.drawRightString(A4[0] - 2*cm, A4[1] - 2.2*cm,
-                                 f"तयार: {datetime.now():%d %b %Y, %H:%M}")
+            canv.drawRightString(A4[0] - 2*cm, A4[1] - 2.2*cm, header_stamp)
             canv.setStrokeColor(colors.darkgreen)
             canv.setLineWidth(1)
             canv.line(2*cm, A4[1] - 3*cm, A4[0] - 2*cm, A4[1] - 3*cm)
@@ -1060,9 +1233,13 @@ NDVI={fmtv('NDVI', params['NDVI'])}, NDWI={fmtv('NDWI', params['NDWI'])}
                                    f"पृष्ठ {doc.page}  |  FarmMatrix माती आरोग्य अहवाल  |  ICAR मानक एकके")
             canv.restoreState()
 
+        def decorate_page(canv, doc):
+            add_header(canv, doc)
+            add_footer(canv, doc)
+
         doc.build(elements,
-                  onFirstPage=lambda c, d: (add_header(c, d), add_footer(c, d)),
-                  onLaterPages=lambda c, d: (add_header(c, d), add_footer(c, d)),
+                  onFirstPage=decorate_page,
+                  onLaterPages=decorate_page,
                   canvasmaker=canvas.Canvas)
         pdf_buffer.seek(0)
         return pdf_buffer.getvalue()
@@ -1108,12 +1285,13 @@ folium.Marker([lat, lon], popup="मध्यबिंदू").add_to(m)
 map_data = st_folium(m, width=700, height=500)
 
 # ── Region selection ──────────────────────────
-region = None
+region = coords = None
 if map_data and "last_active_drawing" in map_data:
     try:
         sel = map_data["last_active_drawing"]
         if sel and "geometry" in sel and "coordinates" in sel["geometry"]:
-            region = ee.Geometry.Polygon(sel["geometry"]["coordinates"])
+            coords = sel["geometry"]["coordinates"]
+            region = ee.Geometry.Polygon(coords)
         else:
             st.error("अवैध क्षेत्र. कृपया वैध पॉलिगन काढा.")
     except Exception as e:
@@ -1125,39 +1303,36 @@ if region:
     progress_bar = st.progress(0)
     status_msg   = st.empty()
 
-    status_msg.text("Sentinel-2 उपग्रह प्रतिमा मिळवत आहे...")
-    comp = sentinel_composite(region, start_date, end_date, ALL_BANDS)
-    progress_bar.progress(20)
-
-    status_msg.text("मातीच्या पोताचा नकाशा वाचत आहे...")
-    texc = get_soil_texture(region)
-    progress_bar.progress(35)
-
-    status_msg.text("MODIS भूपृष्ठ तापमान (LST) मिळवत आहे...")
-    lst = get_lst(region, start_date, end_date)
+    status_msg.text("Sentinel-2, MODIS LST आणि मातीचा पोत मिळवत आहे...")
+    ee_inputs = fetch_ee_inputs(coords, start_date, end_date)
+    texc = ee_inputs["texture"]
+    lst  = ee_inputs["lst"]
+    bs   = ee_inputs["bands"]
     progress_bar.progress(50)
 
-    if comp is None:
-        st.warning("Sentinel-2 डेटा सापडला नाही. कृपया तारीख श्रेणी वाढवा.")
+    ee_errors = ee_inputs["errors"]
+    if ee_errors:
+        st.error(f"Earth Engine त्रुटी ({', '.join(ee_errors)}): हे घटक मिळाले नाहीत. "
+                 "कृपया थोड्या वेळाने पुन्हा प्रयत्न करा.")
+
+    if bs is None:
+        if "bands" not in ee_errors:
+            st.warning("Sentinel-2 डेटा सापडला नाही. कृपया तारीख श्रेणी वाढवा.")
         ph = sal = oc = cec = ndwi = ndvi = evi = fvc = n_val = p_val = k_val = None
         ca_val = mg_val = s_val = None
     else:
-        status_msg.text("बँड आकडेवारी गणना होत आहे...")
-        bs = get_band_stats(comp, region)
-
         status_msg.text("माती घटक गणना होत आहे (ICAR मानक)...")
+        idx   = compute_indices(bs)
         ph    = get_ph_new(bs)
-        sal   = get_salinity_ec(bs)
+        sal   = get_salinity_ec(bs, idx)
         oc    = get_organic_carbon_pct(bs)
-        cec   = estimate_cec(comp, region, cec_intercept, cec_slope_clay, cec_slope_om)
-        ndwi  = get_ndwi(bs)
-        ndvi  = get_ndvi(bs)
-        evi   = get_evi(bs)
-        fvc   = get_fvc(bs)
-        n_val, p_val, k_val = get_npk_kgha(bs)
+        cec   = estimate_cec(ee_inputs["clay"], ee_inputs["om"],
+                             cec_intercept, cec_slope_clay, cec_slope_om)
+        ndwi, ndvi, evi, fvc = idx.ndwi, idx.ndvi, idx.evi, idx.fvc
+        n_val, p_val, k_val = get_npk_kgha(bs, idx)
         ca_val = get_calcium_kgha(bs)
         mg_val = get_magnesium_kgha(bs)
-        s_val  = get_sulphur_kgha(bs)
+        s_val  = get_sulphur_kgha(bs, idx)
         progress_bar.progress(100)
         status_msg.text("✅ विश्लेषण पूर्ण झाले.")
 
@@ -1216,10 +1391,10 @@ if region:
         s        = get_param_status(p, v)
         st_label = status_marathi(s)
         sug_rows.append({
-            "घटक":      PARAM_MARATHI.get(p, p),
-            "मूल्य":    f"{v:.2f}{UNIT_MAP.get(p,'')}" if v is not None else "N/A",
+            "घटक":      PARAM_META[p].marathi,
+            "मूल्य":    f"{v:.2f}{PARAM_META[p].unit}" if v is not None else "N/A",
             "स्थिती":   st_label,
-            "सुझाव":    get_suggestion(p, v).replace("ठीक आहे: ", "").replace("सुधारणा करा: ", ""),
+            "सुझाव":    PARAM_META[p].suggestions.get(s, "—"),
         })
     st.dataframe(pd.DataFrame(sug_rows), use_container_width=True, hide_index=True)
     st.caption(
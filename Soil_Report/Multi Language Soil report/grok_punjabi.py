@@ -1,5 +1,7 @@
 import logging
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 import streamlit as st
@@ -8,9 +10,8 @@ from streamlit_folium import st_folium
 import ee
 import pandas as pd
 from folium.plugins import Draw
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.font_manager import FontProperties
 from PIL import Image, ImageDraw, ImageFont
 from reportlab.lib.pagesizes import A4
@@ -22,6 +23,7 @@ from reportlab.platypus import (
 )
 from reportlab.pdfgen import canvas
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 
 # ─────────────────────────────────────────────
@@ -30,23 +32,21 @@ from openai import OpenAI
 GROQ_API_KEY = "grok-api"
 GROQ_MODEL   = "llama-3.3-70b-versatile"
 LOGO_PATH    = os.path.abspath("LOGO.jpg")
+LOGO_AVAILABLE = os.path.exists(LOGO_PATH)
 
 # ── Punjabi / Gurmukhi Font ───────────────────────────────────────────────────
 # unifont.otf is the ONLY reliable font on this system that renders Gurmukhi
 # correctly. It lives at the path below.
 PUNJABI_FONT_PATH = "unifont.otf"
 
-# Pre-load PIL fonts at various sizes
-_PIL_FONTS: dict = {}
-
+# unifont is parsed once per size for the whole process
+@st.cache_resource(show_spinner=False)
 def pil_font(size: int):
-    if size not in _PIL_FONTS:
-        try:
-            _PIL_FONTS[size] = ImageFont.truetype(PUNJABI_FONT_PATH, size)
-        except Exception as e:
-            logging.error(f"Font load failed: {e}")
-            _PIL_FONTS[size] = ImageFont.load_default()
-    return _PIL_FONTS[size]
+    try:
+        return ImageFont.truetype(PUNJABI_FONT_PATH, size)
+    except Exception as e:
+        logging.error(f"Font load failed: {e}")
+        return ImageFont.load_default()
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -232,8 +232,14 @@ SUGGESTIONS = {
 
 ALL_BANDS = ["B2","B3","B4","B5","B6","B7","B8","B8A","B11","B12"]
 
-# Matplotlib font for Gurmukhi axis labels
-PUNJABI_FP = FontProperties(fname=PUNJABI_FONT_PATH) if os.path.exists(PUNJABI_FONT_PATH) else None
+# Matplotlib font for Gurmukhi axis labels, resolved once per process and
+# shared by all three charts rather than rebuilt on every Streamlit rerun
+@st.cache_resource(show_spinner=False)
+def load_punjabi_fp():
+    return FontProperties(fname=PUNJABI_FONT_PATH) if os.path.exists(PUNJABI_FONT_PATH) else None
+
+
+PUNJABI_FP = load_punjabi_fp()
 
 
 # ═══════════════════════════════════════════════════════
@@ -245,14 +251,15 @@ CONTENT_W = 1100
 DPI       = 150
 
 
-def _measure_text(text: str, font):
-    tmp  = Image.new('RGB', (1, 1))
-    draw = ImageDraw.Draw(tmp)
-    bb   = draw.textbbox((0, 0), text, font=font)
+def _measure_text_uncached(text: str, font):
+    # Straight from the font: no scratch Image/ImageDraw per measurement
+    bb = font.getbbox(text)
     return bb[2] - bb[0], bb[3] - bb[1]
 
 
-def wrap_text(text: str, font, max_w: int):
+# build_table_image wraps every cell twice (row heights, then drawing), and
+# names, statuses and headers recur across tables; a tuple keeps hits immutable.
+def _wrap_text_uncached(text: str, font, max_w: int):
     words = text.split(' ')
     lines, cur = [], ''
     for w in words:
@@ -266,29 +273,66 @@ def wrap_text(text: str, font, max_w: int):
             cur = w
     if cur:
         lines.append(cur)
-    return lines or [text]
+    return tuple(lines) or (text,)
+
+
+def _text_mask_uncached(text: str, font_size: int):
+    """Anti-aliased 'L' mask of one rendered line and its (dx, dy) offset.
+
+    Cached per whole line, not per glyph: Gurmukhi vowel signs and subjoined
+    letters are positioned against their base letter, so only the shaped line
+    is reusable. Headers, status labels and parameter names repeat a lot.
+    """
+    font = pil_font(font_size)
+    l, t, r, b = font.getbbox(text)
+    mask = Image.new('L', (max(r - l, 1), max(b - t, 1)), 0)
+    ImageDraw.Draw(mask).text((-l, -t), text, font=font, fill=255)
+    return mask, l, t
+
+
+# A module-level lru_cache would be rebuilt on every Streamlit rerun and only
+# help within one report. Holding the memo tables in cache_resource keeps them
+# for the whole process; the fonts they key on come from the cached pil_font,
+# so the same size is the same object on every rerun.
+@st.cache_resource(show_spinner=False)
+def text_layout_caches():
+    return (lru_cache(maxsize=2048)(_measure_text_uncached),
+            lru_cache(maxsize=4096)(_wrap_text_uncached),
+            lru_cache(maxsize=1024)(_text_mask_uncached))
+
+
+_measure_text, wrap_text, _text_mask = text_layout_caches()
+
+
+def draw_text(img, xy, text: str, font_size: int, color):
+    """Same result as ImageDraw.text, blitted from the cached line mask."""
+    mask, dx, dy = _text_mask(text, font_size)
+    img.paste(color, (xy[0] + dx, xy[1] + dy), mask)
 
 
 def render_text_image(text: str, font_size: int = 18,
                       color=(0, 0, 0), bg=(255, 255, 255),
-                      max_w: int = CONTENT_W, align: str = 'left'):
+                      max_w: int = CONTENT_W, align: str = 'left',
+                      tight: bool = False):
     font   = pil_font(font_size)
     lines  = wrap_text(text, font, max_w - 10)
     _, lh  = _measure_text('ਅ', font)
     line_h = lh + 8
     total_h = line_h * len(lines) + 12
+    widths  = [_measure_text(line, font)[0] for line in lines]
+    # tight: canvas only as wide as the longest line, so a short heading is
+    # not allocated and PNG-encoded at the full content width
+    canvas_w = min(max_w, max(widths) + 10) if tight else max_w
 
-    img  = Image.new('RGB', (max_w, max(total_h, line_h + 12)), bg)
-    draw = ImageDraw.Draw(img)
-    for i, line in enumerate(lines):
-        lw, _ = _measure_text(line, font)
+    img  = Image.new('RGB', (canvas_w, max(total_h, line_h + 12)), bg)
+    for i, (line, lw) in enumerate(zip(lines, widths)):
         if align == 'center':
-            x = max(0, (max_w - lw) // 2)
+            x = max(0, (canvas_w - lw) // 2)
         elif align == 'right':
-            x = max(0, max_w - lw - 5)
+            x = max(0, canvas_w - lw - 5)
         else:
             x = 5
-        draw.text((x, 6 + i * line_h), line, font=font, fill=color)
+        draw_text(img, (x, 6 + i * line_h), line, font_size, color)
     return img
 
 
@@ -301,19 +345,29 @@ def pil_img_to_rl(pil_img, width_cm=None, height_cm=None):
     return RLImage(buf, width=w_pt, height=h_pt)
 
 
+RL_ALIGN = {'left': 'LEFT', 'center': 'CENTER', 'right': 'RIGHT'}
+
+
 def t_heading(text: str, level: int = 2, pw: float = 17.0):
     fs  = {1: 26, 2: 20, 3: 17}.get(level, 17)
     col = (20, 100, 20)
     px  = int(pw * DPI / 2.54)
-    img = render_text_image(text, font_size=fs, color=col, bg=(255, 255, 255), max_w=px)
-    return pil_img_to_rl(img, width_cm=pw, height_cm=img.height / DPI * 2.54)
+    img = render_text_image(text, font_size=fs, color=col, bg=(255, 255, 255),
+                            max_w=px, tight=True)
+    # Width follows the tight canvas at the same px-per-cm scale
+    ri  = pil_img_to_rl(img)
+    ri.hAlign = 'LEFT'
+    return ri
 
 
 def t_para(text: str, font_size: int = 16, color=(0, 0, 0),
            pw: float = 17.0, align: str = 'left'):
     px  = int(pw * DPI / 2.54)
-    img = render_text_image(text, font_size=font_size, color=color, max_w=px, align=align)
-    return pil_img_to_rl(img, width_cm=pw, height_cm=img.height / DPI * 2.54)
+    img = render_text_image(text, font_size=font_size, color=color, max_w=px,
+                            align=align, tight=True)
+    ri  = pil_img_to_rl(img)
+    ri.hAlign = RL_ALIGN.get(align, 'LEFT')
+    return ri
 
 
 def t_small(text: str, font_size: int = 13, color=(0, 0, 0), pw: float = 17.0):
@@ -361,7 +415,7 @@ def build_table_image(headers, rows, col_widths_px, font_size=14,
     x = BORDER
     draw.rectangle([0, 0, total_w - 1, header_h], fill=header_bg)
     for hdr, cw in zip(headers, col_widths_px):
-        draw.text((x + pad, pad), hdr, font=font, fill=(255, 255, 255))
+        draw_text(img, (x + pad, pad), hdr, font_size, (255, 255, 255))
         x += cw + BORDER
 
     # Data rows
@@ -375,7 +429,7 @@ def build_table_image(headers, rows, col_widths_px, font_size=14,
             tcol = cell[1] if isinstance(cell, tuple) else (0, 0, 0)
             lns  = cell_lines(txt, cw)
             for li, ln in enumerate(lns):
-                draw.text((x + pad, y + pad + li * line_h), ln, font=font, fill=tcol)
+                draw_text(img, (x + pad, y + pad + li * line_h), ln, font_size, tcol)
             x += cw + BORDER
         draw.line([0, y + rh, total_w - 1, y + rh], fill=(180, 180, 180), width=1)
         y += rh + BORDER
@@ -387,180 +441,202 @@ def build_table_image(headers, rows, col_widths_px, font_size=14,
 #  Earth Engine helpers
 # ═══════════════════════════════════════════════════════
 
-def safe_get_info(obj, name="value"):
-    if obj is None:
-        return None
-    try:
-        v = obj.getInfo()
-        return float(v) if v is not None else None
-    except Exception as e:
-        logging.warning(f"Failed {name}: {e}")
-        return None
+def as_float(v):
+    return float(v) if v is not None else None
 
 
 def sentinel_composite(region, start, end, bands):
-    ss, es = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
-    try:
-        coll = (ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-                .filterDate(ss, es).filterBounds(region)
-                .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
+    """Lazy median composite; the widening-window search runs server-side.
+
+    The requested window (<20% cloud) is tried first, then ±5..30 days
+    (<30% cloud), as nested ee.Algorithms.If so no size() is fetched
+    client-side. The image evaluates to null when no window has scenes.
+    """
+    def coll(sd, ed, max_cloud):
+        return (ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+                .filterDate(sd.strftime("%Y-%m-%d"), ed.strftime("%Y-%m-%d"))
+                .filterBounds(region)
+                .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", max_cloud))
                 .select(bands))
-        if coll.size().getInfo() > 0:
-            return coll.median().multiply(0.0001)
-        for days in range(5, 31, 5):
-            sd = (start - timedelta(days=days)).strftime("%Y-%m-%d")
-            ed = (end   + timedelta(days=days)).strftime("%Y-%m-%d")
-            coll = (ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
-                    .filterDate(sd, ed).filterBounds(region)
-                    .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 30))
-                    .select(bands))
-            if coll.size().getInfo() > 0:
-                return coll.median().multiply(0.0001)
-        return None
-    except Exception as e:
-        logging.error(f"sentinel_composite: {e}")
-        return None
+
+    windows = [coll(start, end, 20)] + [
+        coll(start - timedelta(days=days), end + timedelta(days=days), 30)
+        for days in range(5, 31, 5)
+    ]
+    comp = None
+    for c in reversed(windows):
+        comp = ee.Algorithms.If(c.size().gt(0), c.median().multiply(0.0001), comp)
+    return ee.Image(comp)
+
+
+# band_means / lst_mean / texture_mode / cec_index_means only describe the
+# server-side reductions; fetch_ee_inputs evaluates them in one getInfo().
+def band_means(comp, region, scale=10):
+    return comp.reduceRegion(reducer=ee.Reducer.mean(), geometry=region,
+                             scale=scale, maxPixels=1e13)
+
+
+def lst_mean(region, start, end):
+    sd = (end - relativedelta(months=1)).strftime("%Y-%m-%d")
+    ed = end.strftime("%Y-%m-%d")
+    coll = (ee.ImageCollection("MODIS/061/MOD11A2")
+            .filterBounds(region.buffer(5000)).filterDate(sd, ed)
+            .select("LST_Day_1km"))
+    img   = (coll.median().multiply(0.02).subtract(273.15)
+             .rename("lst").clip(region.buffer(5000)))
+    stats = img.reduceRegion(ee.Reducer.mean(), geometry=region,
+                             scale=1000, maxPixels=1e13)
+    # Empty-collection check runs server-side; null means no MODIS data
+    return ee.Algorithms.If(coll.size().gt(0), stats, None)
+
+
+def texture_mode(region):
+    return SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
+        ee.Reducer.mode(), geometry=region, scale=250, maxPixels=1e13)
+
+
+def get_ph_new(bs, idx):
+    b4,b5,b8,b11 = (bs.get(k,0) for k in ["B4","B5","B8","B11"])
+    ndvi_re = ((b8-b5)/(b8+b5+1e-6) + idx.ndvi) / 2
+    ph = 6.5 + 1.2*ndvi_re + 0.8*b11/(b8+1e-6) - 0.5*b8/(b4+1e-6) + 0.15*(1-idx.brightness)
+    return max(4.0, min(9.0, ph))
 
 
-def get_band_stats(comp, region, scale=10):
-    try:
-        s = comp.reduceRegion(reducer=ee.Reducer.mean(), geometry=region,
-                              scale=scale, maxPixels=1e13).getInfo()
-        return {k: (float(v) if v is not None else 0.0) for k, v in s.items()}
-    except Exception as e:
-        logging.error(f"get_band_stats: {e}")
-        return {}
+def get_organic_carbon_pct(bs, idx):
+    b4,b5,b8,b11,b12 = (bs.get(k,0) for k in ["B4","B5","B8","B11","B12"])
+    ndvi_re = ((b8-b5)/(b8+b5+1e-6) + idx.ndvi) / 2
+    L = 0.5
+    savi = ((b8-b4)/(b8+b4+L+1e-6)) * (1+L)
+    oc   = 1.2 + 3.5*ndvi_re + 2.2*savi - 1.5*(b11+b12)/2 + 0.4*idx.evi
+    return max(0.1, min(5.0, oc))
 
 
-def get_lst(region, start, end):
-    try:
-        sd = (end - relativedelta(months=1)).strftime("%Y-%m-%d")
-        ed = end.strftime("%Y-%m-%d")
-        coll = (ee.ImageCollection("MODIS/061/MOD11A2")
-                .filterBounds(region.buffer(5000)).filterDate(sd, ed)
-                .select("LST_Day_1km"))
-        if coll.size().getInfo() == 0:
-            return None
-        img   = (coll.median().multiply(0.02).subtract(273.15)
-                 .rename("lst").clip(region.buffer(5000)))
-        stats = img.reduceRegion(ee.Reducer.mean(), geometry=region,
-                                 scale=1000, maxPixels=1e13).getInfo()
-        v = stats.get("lst")
-        return float(v) if v is not None else None
-    except Exception as e:
-        logging.error(f"get_lst: {e}")
-        return None
+def get_salinity_ec(idx):
+    ec = 0.5 + idx.si*4 + (1-max(0,min(1,idx.ndvi)))*2 + 0.3*(1-idx.brightness)
+    return max(0.0, min(16.0, ec))
 
 
-def get_soil_texture(region):
-    try:
-        mode = SOIL_TEXTURE_IMG.clip(region.buffer(500)).reduceRegion(
-            ee.Reducer.mode(), geometry=region, scale=250,
-            maxPixels=1e13).get("b0")
-        v = safe_get_info(mode, "texture")
-        return int(v) if v is not None else None
-    except Exception as e:
-        logging.error(f"get_soil_texture: {e}")
-        return None
+def cec_index_means(comp, region):
+    # Clay and OM indices as one 2-band image, reduced in a single pass
+    idx = comp.expression("[(B11-B8)/(B11+B8+1e-6), (B8-B4)/(B8+B4+1e-6)]",
+                          {"B4":comp.select("B4"),"B8":comp.select("B8"),
+                           "B11":comp.select("B11")}).rename(["clay", "om"])
+    return idx.reduceRegion(ee.Reducer.mean(), geometry=region, scale=20, maxPixels=1e13)
 
 
-def get_ph_new(bs):
-    b2,b3,b4,b5,b8,b11 = (bs.get(k,0) for k in ["B2","B3","B4","B5","B8","B11"])
-    ndvi_re = ((b8-b5)/(b8+b5+1e-6) + (b8-b4)/(b8+b4+1e-6)) / 2
-    ph = 6.5 + 1.2*ndvi_re + 0.8*b11/(b8+1e-6) - 0.5*b8/(b4+1e-6) + 0.15*(1-(b2+b3+b4)/3)
-    return max(4.0, min(9.0, ph))
+def estimate_cec(c_m, o_m, intercept, slope_clay, slope_om):
+    return (intercept + slope_clay*c_m + slope_om*o_m) if (c_m and o_m) else None
 
 
-def get_organic_carbon_pct(bs):
-    b2,b3,b4,b5,b8,b11,b12 = (bs.get(k,0) for k in ["B2","B3","B4","B5","B8","B11","B12"])
-    ndvi_re = ((b8-b5)/(b8+b5+1e-6) + (b8-b4)/(b8+b4+1e-6)) / 2
-    L = 0.5
-    savi = ((b8-b4)/(b8+b4+L+1e-6)) * (1+L)
-    evi  = 2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
-    oc   = 1.2 + 3.5*ndvi_re + 2.2*savi - 1.5*(b11+b12)/2 + 0.4*evi
-    return max(0.1, min(5.0, oc))
+# Cached on the polygon's GeoJSON coordinates and the date window, so a rerun
+# or redraw of the same field skips Earth Engine entirely. Only the plain
+# getInfo() dict is kept (EE objects are not picklable), and errors raise out
+# of the cached function so a failed fetch is retried on the next run.
+def _ee_batch(coords, start, end):
+    region = ee.Geometry.Polygon(coords)
+    comp   = sentinel_composite(region, start, end, ALL_BANDS)
+    return {
+        "lst":     lst_mean(region, start, end),
+        "texture": texture_mode(region),
+        # A null composite (no Sentinel-2 scenes) yields null bands/cec
+        "bands":   ee.Algorithms.If(comp, band_means(comp, region), None),
+        "cec":     ee.Algorithms.If(comp, cec_index_means(comp, region), None),
+    }
 
 
-def get_salinity_ec(bs):
-    b2,b3,b4,b8 = (bs.get(k,0) for k in ["B2","B3","B4","B8"])
-    ndvi       = (b8-b4)/(b8+b4+1e-6)
-    brightness = (b2+b3+b4)/3
-    si1 = (b3*b4)**0.5
-    si2 = (b3**2+b4**2)**0.5 if (b3**2+b4**2) > 0 else 0
-    ec  = 0.5 + abs((si1+si2)/2)*4 + (1-max(0,min(1,ndvi)))*2 + 0.3*(1-brightness)
-    return max(0.0, min(16.0, ec))
+@st.cache_data(show_spinner=False, ttl=7 * 24 * 3600, max_entries=5)
+def _ee_inputs_info(coords, start, end):
+    return ee.Dictionary(_ee_batch(coords, start, end)).getInfo()
 
 
-def estimate_cec(comp, region, intercept, slope_clay, slope_om):
-    if comp is None:
-        return None
-    try:
-        clay = comp.expression("(B11-B8)/(B11+B8+1e-6)",
-                               {"B11":comp.select("B11"),"B8":comp.select("B8")}).rename("clay")
-        om   = comp.expression("(B8-B4)/(B8+B4+1e-6)",
-                               {"B8":comp.select("B8"),"B4":comp.select("B4")}).rename("om")
-        c_m  = safe_get_info(clay.reduceRegion(ee.Reducer.mean(),geometry=region,scale=20,maxPixels=1e13).get("clay"))
-        o_m  = safe_get_info(om.reduceRegion(ee.Reducer.mean(),geometry=region,scale=20,maxPixels=1e13).get("om"))
-        return (intercept + slope_clay*c_m + slope_om*o_m) if (c_m and o_m) else None
-    except Exception:
-        return None
+# One input on its own, used only when the batch fails, so a broken LST or
+# texture reduction costs that one value rather than every input.
+@st.cache_data(show_spinner=False, ttl=7 * 24 * 3600, max_entries=20)
+def _ee_input_info(coords, start, end, key):
+    return _ee_batch(coords, start, end)[key].getInfo()
+
 
+EE_INPUT_KEYS = ("bands", "cec", "lst", "texture")
 
-def get_ndvi(bs):
-    b8,b4 = bs.get("B8",0), bs.get("B4",0)
-    return (b8-b4)/(b8+b4+1e-6)
 
-def get_evi(bs):
-    b8,b4,b2 = bs.get("B8",0), bs.get("B4",0), bs.get("B2",0)
-    return 2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
+def fetch_ee_inputs(coords, start, end):
+    """Band means, CEC indices, LST and texture from a single getInfo().
 
-def get_fvc(bs):
-    return max(0, min(1, ((get_ndvi(bs)-0.2)/(0.8-0.2))**2))
+    If the batch fails, each input is fetched on its own; the ones that
+    still fail are listed under "errors".
+    """
+    try:
+        info = dict(_ee_inputs_info(coords, start, end) or {})
+        info["errors"] = []
+        return info
+    except Exception as e:
+        logging.error(f"fetch_ee_inputs: {e}")
+    info = {"errors": []}
+    for key in EE_INPUT_KEYS:
+        try:
+            info[key] = _ee_input_info(coords, start, end, key)
+        except Exception as e:
+            logging.error(f"fetch_ee_inputs {key}: {e}")
+            info["errors"].append(key)
+    return info
 
-def get_ndwi(bs):
-    b3,b8 = bs.get("B3",0), bs.get("B8",0)
-    return (b3-b8)/(b3+b8+1e-6)
 
+@dataclass(frozen=True)
+class Indices:
+    ndvi:       float
+    evi:        float
+    fvc:        float
+    ndwi:       float
+    brightness: float
+    si:         float  # salinity index shared by EC, NPK and sulphur
 
-def get_npk_kgha(bs):
-    b2,b3,b4 = bs.get("B2",0),bs.get("B3",0),bs.get("B4",0)
-    b5,b6,b7 = bs.get("B5",0),bs.get("B6",0),bs.get("B7",0)
-    b8,b8a   = bs.get("B8",0),bs.get("B8A",0)
-    b11,b12  = bs.get("B11",0),bs.get("B12",0)
+
+def compute_indices(bs):
+    """Indices the soil formulas share, from one read of the bands."""
+    b2,b3,b4,b8 = (bs.get(k,0) for k in ["B2","B3","B4","B8"])
     ndvi = (b8-b4)/(b8+b4+1e-6)
-    evi  = 2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6)
-    brightness = (b2+b3+b4)/3
+    si1  = (b3*b4)**0.5
+    si2  = (b3**2+b4**2)**0.5 if (b3**2+b4**2) > 0 else 0
+    return Indices(
+        ndvi=ndvi,
+        evi=2.5*(b8-b4)/(b8+6*b4-7.5*b2+1+1e-6),
+        fvc=max(0, min(1, ((ndvi-0.2)/(0.8-0.2))**2)),
+        ndwi=(b3-b8)/(b3+b8+1e-6),
+        brightness=(b2+b3+b4)/3,
+        si=abs((si1+si2)/2),
+    )
+
+
+def get_npk_kgha(bs, idx):
+    b3,b4,b5,b6,b7 = (bs.get(k,0) for k in ["B3","B4","B5","B6","B7"])
+    b8a,b11,b12    = (bs.get(k,0) for k in ["B8A","B11","B12"])
     ndre  = (b8a-b5)/(b8a+b5+1e-6)
     ci_re = (b7/(b5+1e-6)) - 1
     mcari = ((b5-b4) - 0.2*(b5-b3)) * (b5/(b4+1e-6))
-    N = max(50,  min(600, 280+300*ndre+150*evi+20*(ci_re/5)-80*brightness+30*mcari))
-    si1 = (b3*b4)**0.5
-    si2 = (b3**2+b4**2)**0.5 if (b3**2+b4**2) > 0 else 0
-    P = max(2,   min(60,  11+15*(1-brightness)+6*ndvi+4*abs((si1+si2)/2)+2*b3))
-    K = max(40,  min(600, 150+200*b11/(b5+b6+1e-6)+80*(b11-b12)/(b11+b12+1e-6)+60*ndvi))
+    N = max(50,  min(600, 280+300*ndre+150*idx.evi+20*(ci_re/5)-80*idx.brightness+30*mcari))
+    P = max(2,   min(60,  11+15*(1-idx.brightness)+6*idx.ndvi+4*idx.si+2*b3))
+    K = max(40,  min(600, 150+200*b11/(b5+b6+1e-6)+80*(b11-b12)/(b11+b12+1e-6)+60*idx.ndvi))
     return float(N), float(P), float(K)
 
 
-def get_calcium_kgha(bs):
-    b2,b3,b4,b8,b11,b12 = (bs.get(k,0) for k in ["B2","B3","B4","B8","B11","B12"])
-    Ca = 550 + 250*(b11+b12)/(b4+b3+1e-6) + 150*(b2+b3+b4)/3 \
-         - 100*(b8-b4)/(b8+b4+1e-6) - 80*(b11-b8)/(b11+b8+1e-6)
+def get_calcium_kgha(bs, idx):
+    b3,b4,b8,b11,b12 = (bs.get(k,0) for k in ["B3","B4","B8","B11","B12"])
+    Ca = 550 + 250*(b11+b12)/(b4+b3+1e-6) + 150*idx.brightness \
+         - 100*idx.ndvi - 80*(b11-b8)/(b11+b8+1e-6)
     return max(100, min(1200, float(Ca)))
 
 
-def get_magnesium_kgha(bs):
-    b4,b5,b7,b8,b8a,b11,b12 = (bs.get(k,0) for k in ["B4","B5","B7","B8","B8A","B11","B12"])
+def get_magnesium_kgha(bs, idx):
+    b5,b7,b8a,b11,b12 = (bs.get(k,0) for k in ["B5","B7","B8A","B11","B12"])
     Mg = 110 + 60*(b8a-b5)/(b8a+b5+1e-6) + 40*((b7/(b5+1e-6))-1) \
-         + 30*(b11-b12)/(b11+b12+1e-6) + 20*(b8-b4)/(b8+b4+1e-6)
+         + 30*(b11-b12)/(b11+b12+1e-6) + 20*idx.ndvi
     return max(10, min(400, float(Mg)))
 
 
-def get_sulphur_kgha(bs):
-    b3,b4,b5,b8,b11,b12 = (bs.get(k,0) for k in ["B3","B4","B5","B8","B11","B12"])
-    si1 = (b3*b4)**0.5
-    si2 = (b3**2+b4**2)**0.5 if (b3**2+b4**2) > 0 else 0
-    S   = 20 + 15*b11/(b3+b4+1e-6) + 10*abs((si1+si2)/2) \
-          + 5*(b5/(b4+1e-6)-1) - 8*b12/(b11+1e-6) + 5*(b8-b4)/(b8+b4+1e-6)
+def get_sulphur_kgha(bs, idx):
+    b3,b4,b5,b11,b12 = (bs.get(k,0) for k in ["B3","B4","B5","B11","B12"])
+    S   = 20 + 15*b11/(b3+b4+1e-6) + 10*idx.si \
+          + 5*(b5/(b4+1e-6)-1) - 8*b12/(b11+1e-6) + 5*idx.ndvi
     return max(2, min(80, float(S)))
 
 
@@ -568,21 +644,26 @@ def get_sulphur_kgha(bs):
 #  Status & Scoring
 # ═══════════════════════════════════════════════════════
 
+def _status_fn(ideal):
+    # Specialised once per parameter: a range check becomes one tuple index
+    if not isinstance(ideal, tuple):          # Soil Texture: one ideal class
+        return lambda v: "good" if v == ideal else "low"
+    mn, mx = ideal
+    if mn is None:
+        return lambda v: ("good", "high")[v > mx]
+    if mx is None:
+        return lambda v: ("low", "good")[v >= mn]
+    return lambda v: ("low", "good", "high")[(v >= mn) + (v > mx)]
+
+
+_STATUS_FNS = {p: _status_fn(r) for p, r in IDEAL_RANGES.items()}
+
+
 def get_param_status(param, value):
     if value is None:
         return "na"
-    if param == "Soil Texture":
-        return "good" if value == IDEAL_RANGES[param] else "low"
-    mn, mx = IDEAL_RANGES.get(param, (None, None))
-    if mn is None and mx is not None:
-        return "good" if value <= mx else "high"
-    if mx is None and mn is not None:
-        return "good" if value >= mn else "low"
-    if mn is not None and mx is not None:
-        if value < mn: return "low"
-        if value > mx: return "high"
-        return "good"
-    return "good"
+    fn = _STATUS_FNS.get(param)
+    return fn(value) if fn else "good"
 
 
 def calculate_soil_health_score(params):
@@ -660,6 +741,24 @@ def _set_punjabi_ticks(ax, labels, fp):
     ax.set_xticklabels(labels, fontproperties=fp, fontsize=8)
 
 
+CHART_DPI = 90
+
+
+def fig_jpeg(fig):
+    """JPEG bytes of a chart, encoded in memory rather than via a temp file.
+
+    90 dpi is plenty for a 14 cm print width, and ReportLab embeds JPEG data
+    as-is instead of Flate-compressing raw pixels during doc.build.
+    """
+    buf = BytesIO()
+    fig.savefig(buf, format='jpg', dpi=CHART_DPI, bbox_inches='tight',
+                pil_kwargs={'quality': 85})
+    return buf.getvalue()
+
+
+# Keyed on the plotted values: regenerating a report for the same field
+# skips matplotlib entirely.
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
 def make_nutrient_chart(n, p, k, ca, mg, s):
     fp    = PUNJABI_FP
     pkeys = ["Nitrogen","Phosphorus","Potassium","Calcium","Magnesium","Sulphur"]
@@ -668,7 +767,9 @@ def make_nutrient_chart(n, p, k, ca, mg, s):
              "ਪੋਟਾਸ਼ੀਅਮ\nK2O (kg/ha)","ਕੈਲਸ਼ੀਅਮ\n(kg/ha)",
              "ਮੈਗਨੀਸ਼ੀਅਮ\n(kg/ha)","ਗੰਧਕ\n(kg/ha)"]
     bcs = [_bar_color(pk, v) for pk, v in zip(pkeys, vals)]
-    fig, ax = plt.subplots(figsize=(11, 4.5))
+    fig = Figure(figsize=(11, 4.5))
+    FigureCanvasAgg(fig)
+    ax  = fig.add_subplot(111)
     bars = ax.bar(range(len(tlbls)), vals, color=bcs, alpha=0.85)
     ymax = max(vals)*1.4 if any(vals) else 400
     ax.set_ylim(0, ymax)
@@ -682,19 +783,19 @@ def make_nutrient_chart(n, p, k, ca, mg, s):
         if fp:
             ax.text(bar.get_x()+bar.get_width()/2, bar.get_height()+ymax*0.02,
                     f"{val:.1f}\n{lbl}", ha='center', va='bottom', fontproperties=fp, fontsize=7)
-    plt.tight_layout()
-    path = "nutrient_chart.png"
-    plt.savefig(path, dpi=120, bbox_inches='tight')
-    plt.close()
-    return path
+    fig.tight_layout()
+    return fig_jpeg(fig)
 
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
 def make_vegetation_chart(ndvi, ndwi):
     fp    = PUNJABI_FP
     tlbls = ["ਬਨਸਪਤੀ ਸੂਚਕ\n(NDVI)", "ਪਾਣੀ ਸੂਚਕ\n(NDWI)"]
     vals  = [ndvi or 0, ndwi or 0]
     bcs   = [_bar_color(p, v) for p, v in zip(["NDVI","NDWI"], vals)]
-    fig, ax = plt.subplots(figsize=(5, 4.5))
+    fig = Figure(figsize=(5, 4.5))
+    FigureCanvasAgg(fig)
+    ax  = fig.add_subplot(111)
     bars = ax.bar(range(2), vals, color=bcs, alpha=0.85)
     ax.axhline(0, color='black', linewidth=0.5, linestyle='--')
     ax.set_ylim(-1, 1)
@@ -708,20 +809,20 @@ def make_vegetation_chart(ndvi, ndwi):
         if fp:
             ax.text(bar.get_x()+bar.get_width()/2, yp, f"{val:.2f}\n{lbl}",
                     ha='center', va='bottom', fontproperties=fp, fontsize=9)
-    plt.tight_layout()
-    path = "vegetation_chart.png"
-    plt.savefig(path, dpi=120, bbox_inches='tight')
-    plt.close()
-    return path
+    fig.tight_layout()
+    return fig_jpeg(fig)
 
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
 def make_soil_properties_chart(ph, sal, oc, cec, lst):
     fp    = PUNJABI_FP
     pkeys = ["pH","Salinity","Organic Carbon","CEC","LST"]
     tlbls = ["pH\nਪੱਧਰ","EC ਬਿਜਲਈ\n(mS/cm)","ਜੈਵਿਕ\nਕਾਰਬਨ (%)","CEC\n(cmol/kg)","ਭੂਮੀ ਤਾਪ\n(C)"]
     vals  = [ph or 0, sal or 0, oc or 0, cec or 0, lst or 0]
     bcs   = [_bar_color(pk, v) for pk, v in zip(pkeys, vals)]
-    fig, ax = plt.subplots(figsize=(9, 4.5))
+    fig = Figure(figsize=(9, 4.5))
+    FigureCanvasAgg(fig)
+    ax  = fig.add_subplot(111)
     bars = ax.bar(range(len(tlbls)), vals, color=bcs, alpha=0.85)
     ymax = max(vals)*1.4 if any(vals) else 50
     ax.set_ylim(0, ymax)
@@ -734,11 +835,8 @@ def make_soil_properties_chart(ph, sal, oc, cec, lst):
         if fp:
             ax.text(bar.get_x()+bar.get_width()/2, bar.get_height()+ymax*0.02,
                     f"{val:.2f}\n{lbl}", ha='center', va='bottom', fontproperties=fp, fontsize=8)
-    plt.tight_layout()
-    path = "properties_chart.png"
-    plt.savefig(path, dpi=120, bbox_inches='tight')
-    plt.close()
-    return path
+    fig.tight_layout()
+    return fig_jpeg(fig)
 
 
 # ═══════════════════════════════════════════════════════
@@ -767,13 +865,6 @@ def generate_report(params, location, date_range):
         REPORT_PARAMS = {k: v for k, v in params.items() if k not in ("EVI", "FVC")}
         score, rating, good_c, total_c = calculate_soil_health_score(REPORT_PARAMS)
 
-        # Charts
-        nc = make_nutrient_chart(params["Nitrogen"], params["Phosphorus"], params["Potassium"],
-                                  params["Calcium"], params["Magnesium"], params["Sulphur"])
-        vc = make_vegetation_chart(params["NDVI"], params["NDWI"])
-        pc = make_soil_properties_chart(params["pH"], params["Salinity"],
-                                         params["Organic Carbon"], params["CEC"], params["LST"])
-
         def fv(param, v):
             if v is None: return "N/A"
             return f"{v:.2f}{UNIT_MAP.get(param,'')}"
@@ -812,8 +903,27 @@ def generate_report(params, location, date_range):
             f"ਭਾਰਤੀ ਮੌਸਮ ਲਈ ਢੁਕਵੀਆਂ ਫਸਲਾਂ ਦੀ ਸਿਫਾਰਸ਼ ਕਰੋ।"
         )
 
-        exec_summary = call_groq(exec_prompt) or ". ਸੰਖੇਪ ਉਪਲਬਧ ਨਹੀਂ।"
-        recs         = call_groq(rec_prompt)  or ". ਸਿਫਾਰਸ਼ਾਂ ਉਪਲਬਧ ਨਹੀਂ।"
+        # Charts and both Groq calls run together on one pool. Each chart draws
+        # on its own Figure/Agg canvas with no pyplot state, so workers share
+        # nothing, and the slowest task sets the latency.
+        pool = ThreadPoolExecutor(max_workers=5)
+        try:
+            chart_futures = [
+                pool.submit(make_nutrient_chart, params["Nitrogen"], params["Phosphorus"],
+                            params["Potassium"], params["Calcium"], params["Magnesium"],
+                            params["Sulphur"]),
+                pool.submit(make_vegetation_chart, params["NDVI"], params["NDWI"]),
+                pool.submit(make_soil_properties_chart, params["pH"], params["Salinity"],
+                            params["Organic Carbon"], params["CEC"], params["LST"]),
+            ]
+            exec_future = pool.submit(call_groq, exec_prompt)
+            rec_future  = pool.submit(call_groq, rec_prompt)
+        finally:
+            pool.shutdown(wait=False)
+
+        exec_summary = exec_future.result() or ". ਸੰਖੇਪ ਉਪਲਬਧ ਨਹੀਂ।"
+        recs         = rec_future.result()  or ". ਸਿਫਾਰਸ਼ਾਂ ਉਪਲਬਧ ਨਹੀਂ।"
+        nc, vc, pc   = (f.result() for f in chart_futures)
 
         # ─── Build PDF ────────────────────────────────────────────────────
         pdf_buf = BytesIO()
@@ -825,7 +935,7 @@ def generate_report(params, location, date_range):
 
         # ── COVER PAGE ────────────────────────────────────────────────────
         elems.append(Spacer(1, 1.5*cm))
-        if os.path.exists(LOGO_PATH):
+        if LOGO_AVAILABLE:
             li = RLImage(LOGO_PATH, width=9*cm, height=9*cm)
             li.hAlign = 'CENTER'
             elems.append(li)
@@ -897,14 +1007,14 @@ def generate_report(params, location, date_range):
         # ── SEC 4: CHARTS ─────────────────────────────────────────────────
         elems.append(t_heading("4. ਦ੍ਰਿਸ਼ਟੀਕੋਣ", 2, PW))
         elems.append(Spacer(1, 0.2*cm))
-        for lbl, cpath in [
+        for lbl, jpg in [
             ("N, P2O5, K2O, Ca, Mg, S ਪੋਸ਼ਕ ਤੱਤ (ਕਿਲੋ/ਹੈਕਟੇਅਰ):", nc),
             ("ਬਨਸਪਤੀ ਅਤੇ ਪਾਣੀ ਸੂਚਕ (NDVI, NDWI):", vc),
             ("ਮਿੱਟੀ ਦੇ ਗੁਣ:", pc),
         ]:
             elems.append(t_small(lbl, 14, (30,30,30), PW))
-            if cpath and os.path.exists(cpath):
-                ci = RLImage(cpath, width=14*cm, height=7*cm)
+            if jpg:
+                ci = RLImage(BytesIO(jpg), width=14*cm, height=7*cm)
                 ci.hAlign = 'LEFT'
                 elems.append(ci)
             elems.append(Spacer(1, 0.3*cm))
@@ -958,7 +1068,9 @@ def generate_report(params, location, date_range):
         # ─── Header / Footer ──────────────────────────────────────────────
         def add_header(canv, doc):
             canv.saveState()
-            if os.path.exists(LOGO_PATH):
+            # Passed by file name, the canvas keys the logo XObject on the
+            # path: the JPEG is read on the first page and reused after.
+            if LOGO_AVAILABLE:
                 canv.drawImage(LOGO_PATH, 2*cm, A4[1]-2.8*cm, width=1.8*cm, height=1.8*cm)
             canv.setFont("Helvetica-Bold", 11)
             canv.drawString(4.5*cm, A4[1]-2.2*cm, "FarmMatrix Soil Health Report (Punjabi)")
@@ -1025,52 +1137,53 @@ folium.TileLayer("https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}", attr="Goo
 folium.Marker([lat, lon], popup="ਕੇਂਦਰ").add_to(m)
 map_data = st_folium(m, width=700, height=500)
 
-region = None
+coords = None
 if map_data and "last_active_drawing" in map_data:
     try:
         sel = map_data["last_active_drawing"]
         if sel and "geometry" in sel and "coordinates" in sel["geometry"]:
-            region = ee.Geometry.Polygon(sel["geometry"]["coordinates"])
+            coords = sel["geometry"]["coordinates"]
         else:
             st.error("ਗਲਤ ਖੇਤਰ। ਸਹੀ ਬਹੁਭੁਜ ਬਣਾਓ।")
     except Exception as e:
         st.error(f"ਖੇਤਰ ਬਣਾਉਣ ਵਿੱਚ ਗਲਤੀ: {e}")
 
-if region:
+if coords:
     st.subheader(f"ਵਿਸ਼ਲੇਸ਼ਣ: {start_date} ਤੋਂ {end_date} ਤੱਕ")
     pb = st.progress(0)
     sm = st.empty()
 
-    sm.text("Sentinel-2 ਤਸਵੀਰਾਂ ਪ੍ਰਾਪਤ ਕਰ ਰਹੇ ਹਾਂ...")
-    comp = sentinel_composite(region, start_date, end_date, ALL_BANDS)
-    pb.progress(20)
-
-    sm.text("ਮਿੱਟੀ ਬਣਤਰ ਨਕਸ਼ਾ ਪੜ੍ਹ ਰਹੇ ਹਾਂ...")
-    texc = get_soil_texture(region)
-    pb.progress(35)
-
-    sm.text("MODIS ਭੂਮੀ ਤਾਪਮਾਨ ਪ੍ਰਾਪਤ ਕਰ ਰਹੇ ਹਾਂ...")
-    lst = get_lst(region, start_date, end_date)
+    sm.text("Sentinel-2, ਮਿੱਟੀ ਬਣਤਰ ਅਤੇ ਭੂਮੀ ਤਾਪਮਾਨ ਡੇਟਾ ਪ੍ਰਾਪਤ ਕਰ ਰਹੇ ਹਾਂ...")
+    ee_info = fetch_ee_inputs(coords, start_date, end_date)
+    texc = as_float((ee_info.get("texture") or {}).get("b0"))
+    texc = int(texc) if texc is not None else None
+    lst  = as_float((ee_info.get("lst") or {}).get("lst"))
     pb.progress(50)
 
-    if comp is None:
-        st.warning("Sentinel-2 ਡੇਟਾ ਉਪਲਬਧ ਨਹੀਂ। ਤਾਰੀਖ਼ ਸੀਮਾ ਵਧਾਓ।")
+    if ee_info["errors"]:
+        st.error(f"Earth Engine ਗਲਤੀ ({', '.join(ee_info['errors'])}): ਇਹ ਮੁੱਲ ਪ੍ਰਾਪਤ ਨਹੀਂ ਹੋਏ। "
+                 "ਕਿਰਪਾ ਕਰਕੇ ਥੋੜ੍ਹੀ ਦੇਰ ਬਾਅਦ ਦੁਬਾਰਾ ਕੋਸ਼ਿਸ਼ ਕਰੋ।")
+
+    if ee_info.get("bands") is None:
+        if "bands" not in ee_info["errors"]:
+            st.warning("Sentinel-2 ਡੇਟਾ ਉਪਲਬਧ ਨਹੀਂ। ਤਾਰੀਖ਼ ਸੀਮਾ ਵਧਾਓ।")
         ph=sal=oc=cec=ndwi=ndvi=evi=fvc=n_val=p_val=k_val=ca_val=mg_val=s_val=None
     else:
         sm.text("ਮਿੱਟੀ ਪੈਰਾਮੀਟਰ ਗਣਨਾ ਕਰ ਰਹੇ ਹਾਂ...")
-        bs   = get_band_stats(comp, region)
-        ph   = get_ph_new(bs)
-        sal  = get_salinity_ec(bs)
-        oc   = get_organic_carbon_pct(bs)
-        cec  = estimate_cec(comp, region, cec_intercept, cec_slope_clay, cec_slope_om)
-        ndwi = get_ndwi(bs)
-        ndvi = get_ndvi(bs)
-        evi  = get_evi(bs)
-        fvc  = get_fvc(bs)
-        n_val, p_val, k_val = get_npk_kgha(bs)
-        ca_val = get_calcium_kgha(bs)
-        mg_val = get_magnesium_kgha(bs)
-        s_val  = get_sulphur_kgha(bs)
+        bs   = {k: (float(v) if v is not None else 0.0)
+                for k, v in (ee_info.get("bands") or {}).items()}
+        cec_info = ee_info.get("cec") or {}
+        idx  = compute_indices(bs)
+        ph   = get_ph_new(bs, idx)
+        sal  = get_salinity_ec(idx)
+        oc   = get_organic_carbon_pct(bs, idx)
+        cec  = estimate_cec(as_float(cec_info.get("clay")), as_float(cec_info.get("om")),
+                            cec_intercept, cec_slope_clay, cec_slope_om)
+        ndwi, ndvi, evi, fvc = idx.ndwi, idx.ndvi, idx.evi, idx.fvc
+        n_val, p_val, k_val = get_npk_kgha(bs, idx)
+        ca_val = get_calcium_kgha(bs, idx)
+        mg_val = get_magnesium_kgha(bs, idx)
+        s_val  = get_sulphur_kgha(bs, idx)
         pb.progress(100)
         sm.text("ਵਿਸ਼ਲੇਸ਼ਣ ਮੁਕੰਮਲ! ✅")
 